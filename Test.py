@@ -1,7 +1,8 @@
 import numpy as np
 import json
+import pandas as pd
 import matplotlib.pyplot as plt
-from scipy.interpolate import griddata
+from surrogate import fit_surrogate, results_from_2D
 
 
 import json
@@ -52,6 +53,9 @@ x = list(x)
 y = list(y)
 LCOA = KPI_total["LCOA - monthly (EUR/tNH3)"]
 
+# Surrogate model of the LCOA over x and y, fitted to the calculated points (see surrogate)
+surrogate = fit_surrogate(results_from_2D(data), kpis=["LCOA - monthly (EUR/tNH3)"])
+
 print(x)
 print(y)
 print(LCOA)
@@ -68,12 +72,13 @@ xi = np.linspace(min(x), max(x), 100)  # Fine grid in x
 yi = np.linspace(min(y), max(y), 100)  # Fine grid in y
 X, Y = np.meshgrid(xi, yi)
 
-# Interpolate KPI values over the grid
-Z = griddata((x, y), kpi, (X, Y), method='cubic')
+# Interpolate KPI values over the grid by the surrogate
+Z = surrogate.predict(pd.DataFrame({xy_data["x"]: X.ravel(), xy_data["y"]: Y.ravel()}))[
+    "LCOA - monthly (EUR/tNH3)"].to_numpy().reshape(X.shape)
 
 # Plot the heatmap
 plt.figure(figsize=(8, 6))
-contour = plt.contourf(X, Y, Z, levels=20, cmap='viridis')  # 'cubic' interpolation
+contour = plt.contourf(X, Y, Z, levels=20, cmap='viridis')  # surrogate interpolation
 plt.colorbar(contour, label="KPI Value")
 plt.scatter(x, y, color='red', marker='o', label="Evaluation Points")  # Mark original points
 plt.xlabel("X")
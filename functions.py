@@ -1 +1,26 @@
-import plant_init
\ No newline at end of file
+####################################################################################################################
+# functions provides utilities shared by plant_calc(), kpi_calc() and visualize()
+# - shutdown_events(): run-length encoding of the shutdowns of a plant component from its hourly output
+####################################################################################################################
+
+import numpy as np
+import pandas as pd
+import plant_init
+
+
+def shutdown_events(output, calendar=None):
+    """Returns the shutdowns (runs of zero output) of a plant component, given its non-negative output per time step
+    (e.g. syn_NH3_out_tNH3 of df_out, time step 0 included), in one vectorized pass: the time step t0 each shutdown
+    started at and its duration in hours. A shutdown from time step 0 on does not count time step 0 itself (duration 0
+    if the output is only 0 at time step 0). With the RES_Calendar of the profiles (time step i is hour i - 1), the
+    calendar year of each t0 is added."""
+    output = np.asarray(output)
+    zero = np.diff(np.r_[False, output == 0, False].astype(np.int8))
+    t0 = np.flatnonzero(zero == 1)
+    duration = np.flatnonzero(zero == -1) - t0 - (t0 == 0)
+
+    events = pd.DataFrame({'t0': t0, 'duration': duration})
+    if calendar is not None:
+        events['year'] = calendar.year[calendar.month_id[np.maximum(t0 - 1, 0)]]
+
+    return events
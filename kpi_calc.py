@@ -2,25 +2,85 @@
 # kpi_calc() returns LCOA on a monthly resolution and a list of commercial, technical and regulatory
 # KPIs. As an input the function requires
 # - a plant configuration as is returned by plant_init() and
-# - a plant calculation as is returned by plant_cals()
+# - a plant calculation as is returned by plant_cals() (the columns of the output profile 'kpi' suffice), or its
+#   monthly aggregates as are returned by plant_calc(..., aggregates=True)
+# - optionally the RES_Calendar of the RES profiles used in plant_calc() (see res_data), which is otherwise derived
+#   from the DateTimes column of df_out
+# Only the monthly and annual sums of the few df_out columns in sum_columns are aggregated (output_sums()), and the
+# LCOA cash-flow series are NumPy vectors over the months of the project
+# lcoa_samples() evaluates the LCOA and cost KPIs of one plant calculation for arrays of economic parameters (e.g.
+# Monte Carlo samples) at once, as matrix operations over the monthly discount and CPI factors
 #################################################################################################################
 
+import time
+import numpy as np
 import pandas as pd
-
-def kpi_calc(df_out, plant_config):
+import res_data
+from functions import shutdown_events
+from plant_calc import PlantAggregates
+from plant_init import economic_parameters
+
+# df_out columns whose monthly sums, annual sums and totals enter the LCOA and KPIs
+sum_columns = [
+    'p_Wind_MW',
+    'p_PV_MW',
+    'p_Total_RES_MW',
+    'p_Grid_MW',
+    'p_Surplus_RES_MW',
+    'el_el_in_MW',
+    'syn_NH3_out_tNH3'
+]
+
+
+def shutdown_stats(output):
+    """Returns count, sum and mean of the durations of the shutdowns of a plant component (see
+    functions.shutdown_events()) that start after time step 0, given its output per time step (e.g. syn_NH3_out_tNH3)."""
+    events = shutdown_events(output)
+    durations = events['duration'].to_numpy()[events['t0'].to_numpy() > 0]
+    count = len(durations)
+    return {'count': count, 'sum': durations.sum(), 'mean': durations.sum(dtype=np.float64) / count if count else np.nan}
+
+
+def output_sums(df_out, calendar=None):
+    """Returns the monthly sums, annual sums and totals of the sum_columns (dicts of column: value(s)), the average NH3
+    carbon intensity and the Electrolysis and Haber-Bosch shutdown statistics of df_out or of its PlantAggregates."""
+    if isinstance(df_out, PlantAggregates):
+        # Monthly sums accumulated by plant_calc()
+        year_start = np.flatnonzero(np.r_[True, df_out.calendar.year[1:] != df_out.calendar.year[:-1]])
+        month_sum = {column: df_out.sum[column] for column in sum_columns}
+        year_sum = {column: np.add.reduceat(df_out.sum[column], year_start) for column in sum_columns}
+        total_sum = {column: df_out.sum[column].sum() for column in sum_columns}
+        avg_ci = df_out.sum['syn_NH3_out_ci_gCO2pMJ'].sum() / df_out.count.sum()
+        return (month_sum, year_sum, total_sum, avg_ci, df_out.shutdown_stats('el_shutdown'),
+                df_out.shutdown_stats('syn_shutdown'))
+
+    # Hourly values without initial time step 0
+    if calendar is None:
+        calendar = res_data.build_calendar(df_out['DateTimes'].iloc[1:])
+
+    values = pd.DataFrame({column: df_out[column].to_numpy()[1:] for column in sum_columns}, copy=False)
+
+    # Monthly and annual sums are grouped on the calendar ids. The grouped sum is compensated (as the sums of
+    # DataFrame.resample()), totals and means are plain NumPy sums (as those of DataFrame.agg())
+    df_month_sum = values.groupby(calendar.month_id).sum()
+    df_year_sum = values.groupby(calendar.year_id).sum()
+    month_sum = {column: df_month_sum[column].to_numpy() for column in sum_columns}
+    year_sum = {column: df_year_sum[column].to_numpy() for column in sum_columns}
+    total_sum = {column: values[column].to_numpy().sum() for column in sum_columns}
+
+    ci = df_out['syn_NH3_out_ci_gCO2pMJ'].to_numpy()[1:]
+    avg_ci = ci.sum(dtype=np.float64) / len(ci)
+
+    return (month_sum, year_sum, total_sum, avg_ci, shutdown_stats(df_out['el_H2_out_tH2'].to_numpy()),
+            shutdown_stats(df_out['syn_NH3_out_tNH3'].to_numpy()))
+
+
+def kpi_calc(df_out, plant_config, calendar=None):
 
     # Plant calculation output data handling/aggregation
     ###################################################################################################################
-    # Adjust output dataframe
-    df_out['DateTimes'] = pd.to_datetime(df_out['DateTimes'], format='%Y-%m-%d %H:%M')
-    df_out = df_out.drop(columns=['operation_mode'])
-    df_out = df_out.drop([0])
-    df_out.set_index('DateTimes', inplace=True)
-
-    # Create aggregated data description on daily, monthly and annual basis
-    df_out_month = df_out.resample('ME').agg(['count', 'sum', 'mean', 'max', 'min'])
-    df_out_year = df_out.resample('YE').agg(['count', 'sum', 'mean', 'max', 'min'])
-    df_out_total = df_out.agg(['count', 'sum', 'mean', 'max', 'min'])
+    month_sum, year_sum, total_sum, avg_ci, el_SD_agg, syn_SD_agg = output_sums(df_out, calendar=calendar)
+    years = len(year_sum['syn_NH3_out_tNH3'])
 
     # Define Calc variables
     ###################################################################################################################
@@ -70,75 +130,84 @@ def kpi_calc(df_out, plant_config):
 
     # Set up indexations for orientation
     ###################################################################################################################
-    index_year = [0]
-    index_month = [0]
+    # Month 0 (entry) followed by 12 months per year of construction and operation
+    index_year = np.r_[0, np.repeat(np.arange(1, construction_phase_a + years + 1), 12)]
+    index_month = np.r_[0, np.tile(np.arange(1, 13), construction_phase_a + years)]
+
+    index_operational = (index_year > construction_phase_a).astype(np.int64)
 
-    for year in range(1, construction_phase_a + len(df_out_year.index) + 1):
-        for month in range(1, 13):
-            index_year.append(year)
-            index_month.append(month)
+    # Powers are taken element-wise with pow(), as NumPy's vectorized power may differ in the last digit
+    discount_factor = 1 / np.array([pow(1 + WACC, i / 12) for i in range(len(index_year))])
 
-    index_operational = [1 if i > construction_phase_a else 0 for i in index_year]
+    CPI_factor = np.array([pow(1 + CPI, i / 12) for i in range(len(index_year))])
 
-    discount_factor = [1 / pow(1 + WACC, i / 12) for i in range(len(index_year))]
+    # Monthly series of the project: 0 until the end of construction, then the monthly sums of the plant operation
+    def project_series(month_sum):
+        return np.r_[np.zeros(1 + 12 * construction_phase_a), month_sum]
 
-    CPI_factor = [pow(1 + CPI, i / 12) for i in range(len(index_year))]
+    def divide(a, b):
+        return np.divide(a, b, out=np.zeros(len(a)), where=b != 0)
 
     # Cost serieses
     ###################################################################################################################
     # Component & Total CapEx
-    # c_CapEx_EUR = c_CapEx_HaberBosch = c_CapEx_BESS = c_CapEx_Ely = c_CapEx_cH2 = [0] * len(index_year)
-
-    c_CapEx_HaberBosch = [CapEx_HaberBosch] + [0] * (len(index_year) - 1)
-    c_CapEx_BESS = [CapEx_BESS] + [0] * (len(index_year) - 1)
-    c_CapEx_Ely = [CapEx_Ely] + [0] * (len(index_year) - 1)
-    c_CapEx_cH2 = [CapEx_cH2] + [0] * (len(index_year) - 1)
-    c_CapEx_EUR = [CapEx_Total] + [0] * (len(index_year) - 1)
+    c_CapEx_HaberBosch = np.zeros(len(index_year))
+    c_CapEx_BESS = np.zeros(len(index_year))
+    c_CapEx_Ely = np.zeros(len(index_year))
+    c_CapEx_cH2 = np.zeros(len(index_year))
+    c_CapEx_EUR = np.zeros(len(index_year))
+    c_CapEx_HaberBosch[0] = CapEx_HaberBosch
+    c_CapEx_BESS[0] = CapEx_BESS
+    c_CapEx_Ely[0] = CapEx_Ely
+    c_CapEx_cH2[0] = CapEx_cH2
+    c_CapEx_EUR[0] = CapEx_Total
 
     # OpEx
-    c_OpEx_EUR = [i_op * i_cpi * O_M_cost / 12 for i_op, i_cpi in zip(index_operational, CPI_factor)]
+    c_OpEx_EUR = index_operational * CPI_factor * O_M_cost / 12
 
     # Electricity bought from RES and Grid
     # Wind PPA
-    el_RES_wind_MWh = [0] + [0] * 12 * construction_phase_a + df_out_month.p_Wind_MW["sum"].tolist()
-    c_RES_wind_EUR = [RES_Wind_PPA_price_EURpMWh * i for i in el_RES_wind_MWh]
+    el_RES_wind_MWh = project_series(month_sum['p_Wind_MW'])
+    c_RES_wind_EUR = RES_Wind_PPA_price_EURpMWh * el_RES_wind_MWh
 
     # PV PPA
-    el_RES_pv_MWh = [0] + [0] * 12 * construction_phase_a + df_out_month.p_PV_MW["sum"].tolist()
-    c_RES_pv_EUR = [RES_PV_PPA_price_EURpMWh * i for i in el_RES_pv_MWh]
+    el_RES_pv_MWh = project_series(month_sum['p_PV_MW'])
+    c_RES_pv_EUR = RES_PV_PPA_price_EURpMWh * el_RES_pv_MWh
 
     # RES total
-    el_RES_MWh = [a + b for a,b in zip(el_RES_wind_MWh,el_RES_pv_MWh)]
-    c_RES_EUR = [a + b for a,b in zip(c_RES_wind_EUR,c_RES_pv_EUR)]
-    sc_RES_PPA_EURpMWh = [a / b if b != 0 else 0 for a,b in zip(c_RES_EUR,el_RES_MWh)]
+    el_RES_MWh = el_RES_wind_MWh + el_RES_pv_MWh
+    c_RES_EUR = c_RES_wind_EUR + c_RES_pv_EUR
+    sc_RES_PPA_EURpMWh = divide(c_RES_EUR, el_RES_MWh)
 
     # RES surplus & used
-    el_RES_surplus_MWh = [0] + [0] * 12 * construction_phase_a + df_out_month.p_Surplus_RES_MW["sum"].tolist()
-    el_RES_used_MWh = [a - b for a,b in zip(el_RES_MWh,el_RES_surplus_MWh)]
-    sc_RES_used_EURpMWh = [a / b if b != 0 else 0 for a,b in zip(c_RES_EUR,el_RES_used_MWh)]
+    el_RES_surplus_MWh = project_series(month_sum['p_Surplus_RES_MW'])
+    el_RES_used_MWh = el_RES_MWh - el_RES_surplus_MWh
+    sc_RES_used_EURpMWh = divide(c_RES_EUR, el_RES_used_MWh)
 
     # Grid
-    el_grid_MWh = [0] + [0] * 12 * construction_phase_a + df_out_month.p_Grid_MW["sum"].tolist()
-    c_grid_EUR = [Grid_price_EURpMWh * i for i in el_grid_MWh]
+    el_grid_MWh = project_series(month_sum['p_Grid_MW'])
+    c_grid_EUR = Grid_price_EURpMWh * el_grid_MWh
 
     # RES + Grid Total
-    el_RES_grid_MWh = [a + b for a,b in zip(el_RES_MWh,el_grid_MWh)]
-    c_RES_grid_EUR = [a + b for a,b in zip(c_RES_EUR,c_grid_EUR)]
-    sc_RES_grid_EURpMWh = [a / b if b != 0 else 0 for a,b in zip(c_RES_grid_EUR,el_RES_grid_MWh)]
+    el_RES_grid_MWh = el_RES_MWh + el_grid_MWh
+    c_RES_grid_EUR = c_RES_EUR + c_grid_EUR
+    sc_RES_grid_EURpMWh = divide(c_RES_grid_EUR, el_RES_grid_MWh)
 
     # Surplus sales
-    r_RES_surplus_sales_EURpMWh = [- RES_Surplus_sales_price_EURpMWh * i for i in el_RES_surplus_MWh]
+    r_RES_surplus_sales_EURpMWh = - RES_Surplus_sales_price_EURpMWh * el_RES_surplus_MWh
 
     # Total cost
-    c_Total_EUR = [sum(i) for i in zip(c_CapEx_EUR, c_OpEx_EUR, c_RES_grid_EUR, r_RES_surplus_sales_EURpMWh)]
-    c_Total_discounted_EUR = [a * b for a,b in zip(c_Total_EUR, discount_factor)]
+    c_Total_EUR = c_CapEx_EUR + c_OpEx_EUR + c_RES_grid_EUR + r_RES_surplus_sales_EURpMWh
+    c_Total_discounted_EUR = c_Total_EUR * discount_factor
 
     # Total ammonia production
-    NH3_out_tNH3 = [0] + [0] * 12 * construction_phase_a + df_out_month.syn_NH3_out_tNH3["sum"].tolist()
-    NH3_out_discounted = [a * b for a,b in zip(NH3_out_tNH3, discount_factor)]
+    NH3_out_tNH3 = project_series(month_sum['syn_NH3_out_tNH3'])
+    NH3_out_discounted = NH3_out_tNH3 * discount_factor
 
-    # Levelized Cost of Ammonia
-    LCOA = sum(c_Total_discounted_EUR) / sum(NH3_out_discounted) if sum(NH3_out_discounted) > 0 else 0
+    # Levelized Cost of Ammonia (sums in month order)
+    sum_c_Total_discounted_EUR = np.cumsum(c_Total_discounted_EUR)[-1]
+    sum_NH3_out_discounted = np.cumsum(NH3_out_discounted)[-1]
+    LCOA = sum_c_Total_discounted_EUR / sum_NH3_out_discounted if sum_NH3_out_discounted > 0 else 0
 
 
     # Set up output dataframe for levelized cost calculation
@@ -199,69 +268,61 @@ def kpi_calc(df_out, plant_config):
     ###################################################################################################################
 
     # Average annual NH3 production (tNH3)
-    avg_NH3_out_tNH3 = df_out_total.loc['sum', 'syn_NH3_out_tNH3'] / len(df_out_year)
+    avg_NH3_out_tNH3 = total_sum['syn_NH3_out_tNH3'] / years
 
     # Average NH3 CI (gCO2/MJ)
-    avg_NH3_out_CI_gCO2pMJ = df_out_total.loc['mean', 'syn_NH3_out_ci_gCO2pMJ']
+    avg_NH3_out_CI_gCO2pMJ = avg_ci
 
     # Average annual Haber-Bosch FLH (FLH)
-    avg_HB_FLH = sum([i / HaberBosch_capacity_tNH3ph for i in df_out_year.syn_NH3_out_tNH3['sum'].tolist()]) / len(df_out_year)
+    avg_HB_FLH = np.cumsum(year_sum['syn_NH3_out_tNH3'] / HaberBosch_capacity_tNH3ph)[-1] / years
 
     # Average annual Electrolysis FLH (FLH)
-    avg_Ely_FLH = sum([i / Electrolysis_capacity_MW for i in df_out_year.el_el_in_MW['sum'].tolist()]) / len(df_out_year)
+    avg_Ely_FLH = np.cumsum(year_sum['el_el_in_MW'] / Electrolysis_capacity_MW)[-1] / years
 
     # Average annual RES FLH (FLH)
-    avg_RES_FLH = sum([i / (RES_Wind_Pnom_MW + RES_PV_Pnom_MW) for i in df_out_year.p_Total_RES_MW['sum'].tolist()]) / len(df_out_year)
+    avg_RES_FLH = np.cumsum(year_sum['p_Total_RES_MW'] / (RES_Wind_Pnom_MW + RES_PV_Pnom_MW))[-1] / years
 
     # Average annual RES production (MWh)
-    avg_Total_RES_MWh = df_out_total.loc['sum', 'p_Total_RES_MW'] / len(df_out_year)
+    avg_Total_RES_MWh = total_sum['p_Total_RES_MW'] / years
 
     # Average annual RES consumed (MWh)
-    avg_RES_consumed_MWh = (df_out_total.loc['sum', 'p_Total_RES_MW'] - df_out_total.loc['sum', 'p_Surplus_RES_MW']) / len(df_out_year)
+    avg_RES_consumed_MWh = (total_sum['p_Total_RES_MW'] - total_sum['p_Surplus_RES_MW']) / years
 
     # Average annual RES surplus (MWh)
-    avg_RES_surplus_MWh = df_out_total.loc['sum', 'p_Surplus_RES_MW'] / len(df_out_year)
+    avg_RES_surplus_MWh = total_sum['p_Surplus_RES_MW'] / years
 
     # Curtailment (%)
-    curtailment = df_out_total.loc['sum', 'p_Surplus_RES_MW'] / df_out_total.loc['sum', 'p_Total_RES_MW']
+    curtailment = total_sum['p_Surplus_RES_MW'] / total_sum['p_Total_RES_MW']
 
     # Average annual Grid consumption (MWh)
-    avg_Grid_MWh = df_out_total.loc['sum', 'p_Grid_MW'] / len(df_out_year)
+    avg_Grid_MWh = total_sum['p_Grid_MW'] / years
 
     # Specific cost of produced RES (EUR/MWh)
-    sc_RES_out_EURpMWh = (df_out_total.loc['sum', 'p_Wind_MW'] * RES_Wind_PPA_price_EURpMWh + df_out_total.loc['sum', 'p_PV_MW'] * RES_PV_PPA_price_EURpMWh) / df_out_total.loc['sum', 'p_Total_RES_MW']
+    sc_RES_out_EURpMWh = (total_sum['p_Wind_MW'] * RES_Wind_PPA_price_EURpMWh + total_sum['p_PV_MW'] * RES_PV_PPA_price_EURpMWh) / total_sum['p_Total_RES_MW']
 
     # Specific cost of consumed RES (EUR/MWh)
-    sc_RES_consumed_EURpMWh = sc_RES_out_EURpMWh * df_out_total.loc['sum', 'p_Total_RES_MW'] / (df_out_total.loc['sum', 'p_Total_RES_MW'] - df_out_total.loc['sum', 'p_Surplus_RES_MW'])
+    sc_RES_consumed_EURpMWh = sc_RES_out_EURpMWh * total_sum['p_Total_RES_MW'] / (total_sum['p_Total_RES_MW'] - total_sum['p_Surplus_RES_MW'])
 
     # Specific cost of consumed RES + Grid (EUR/MWh)
-    sc_RES_consumed_Grid_EURpMWh = (sc_RES_out_EURpMWh * df_out_total.loc['sum', 'p_Total_RES_MW'] + df_out_total.loc['sum', 'p_Grid_MW'] * Grid_price_EURpMWh) / (df_out_total.loc['sum', 'p_Total_RES_MW'] - df_out_total.loc['sum', 'p_Surplus_RES_MW'] + df_out_total.loc['sum', 'p_Grid_MW'])
+    sc_RES_consumed_Grid_EURpMWh = (sc_RES_out_EURpMWh * total_sum['p_Total_RES_MW'] + total_sum['p_Grid_MW'] * Grid_price_EURpMWh) / (total_sum['p_Total_RES_MW'] - total_sum['p_Surplus_RES_MW'] + total_sum['p_Grid_MW'])
 
     # Average annual Nr of Electrolysis Shutdowns
-    el_SD = df_out.el_shutdown
-    el_SD = el_SD[el_SD > 0]
-    el_SD_agg = el_SD.agg(['count', 'sum', 'mean', 'max', 'min'])
-
-    avg_Ely_SD_count = el_SD_agg['count'] / len(df_out_year)
+    avg_Ely_SD_count = el_SD_agg['count'] / years
 
     # Average Electrolysis Shutdown Duration (hours)
     avg_Ely_SD_duration = el_SD_agg['mean']
 
     # Average annual Electrolysis downtime (hours)
-    avg_Ely_downtime = el_SD_agg['sum'] / len(df_out_year)
+    avg_Ely_downtime = el_SD_agg['sum'] / years
 
     # Average annual Nr of Haber-Bosch Shutdowns
-    syn_SD = df_out.syn_shutdown
-    syn_SD = syn_SD[syn_SD > 0]
-    syn_SD_agg = syn_SD.agg(['count', 'sum', 'mean', 'max', 'min'])
-
-    avg_HB_SD_count = syn_SD_agg['count'] / len(df_out_year)
+    avg_HB_SD_count = syn_SD_agg['count'] / years
 
     # Average Haber-Bosch Shutdown Duration (hours)
     avg_HB_SD_duration = syn_SD_agg['mean']
 
     # Average annual Haber-Bosch downtime (hours)
-    avg_HB_downtime = syn_SD_agg['sum'] / len(df_out_year)
+    avg_HB_downtime = syn_SD_agg['sum'] / years
 
     # Set up KPI output Dataframe
     ###################################################################################################################
@@ -292,4 +353,140 @@ def kpi_calc(df_out, plant_config):
 
     dict_KPI = {key: float(value) for key, value in dict_KPI.items()}
 
-    return df_lcoa_T, dict_KPI
\ No newline at end of file
+    return df_lcoa_T, dict_KPI
+
+
+def lcoa_samples(df_out, plant_config, samples, calendar=None, percentiles=(0.05, 0.5, 0.95), block_size=10000):
+    """Returns the LCOA and cost KPIs of one plant calculation (df_out or its PlantAggregates) for many sets of economic
+    parameters at once. samples maps economic plant_init() parameters (see plant_init.economic_parameters) to arrays of
+    sample values or scalars, all other parameters are taken from plant_config. Returns df_samples (the sampled
+    parameters and KPIs of each sample) and df_summary (count, mean, std, min, percentiles and max of each KPI).
+    Samples are evaluated in blocks of block_size to limit the memory of the sample x month matrices."""
+    invalid = [name for name in samples if name not in economic_parameters]
+    if invalid:
+        raise ValueError(f"Invalid economic parameters {invalid} - choose from {list(economic_parameters)}")
+
+    # Values of all economic parameters, broadcast to the number of samples
+    values = {name: plant_config[group][key]['value'] for name, (group, key) in economic_parameters.items()}
+    values.update(samples)
+    values = dict(zip(values, np.broadcast_arrays(*[np.atleast_1d(np.asarray(value, dtype=np.float64))
+                                                    for value in values.values()])))
+    n_samples = len(values['WACC'])
+
+    # Plant operation (identical for all samples)
+    month_sum, year_sum, total_sum, avg_ci, el_SD_agg, syn_SD_agg = output_sums(df_out, calendar=calendar)
+    years = len(year_sum['syn_NH3_out_tNH3'])
+
+    # Total CapEx and annual O&M cost of each sample
+    CapEx_Total = (values['HaberBosch_specific_cost_EURptNH3ph'] * plant_config['HaberBosch']['capacity_tNH3ph']['value']
+                   + values['BESS_specific_cost_EURpMWh'] * plant_config['BESS']['capacity_MWh']['value']
+                   + values['Electrolysis_specific_cost_EURpMW'] * plant_config['Electrolysis']['capacity_MW']['value']
+                   + values['H2Storage_specific_cost_EURptH2'] * plant_config['H2Storage']['capacity_tH2']['value'])
+    O_M_cost = values['O_M_CapEx_share'] * CapEx_Total
+
+    # Discounted total cost and NH3 output of each sample. The months of the project depend on the construction phase,
+    # the samples of each construction phase are evaluated together
+    c_Total_discounted_EUR = np.zeros(n_samples)
+    NH3_out_discounted = np.zeros(n_samples)
+
+    for construction_phase_a in np.unique(values['construction_phase_a']):
+        rows = np.flatnonzero(values['construction_phase_a'] == construction_phase_a)
+        index_months = np.arange(1 + 12 * (int(construction_phase_a) + years))
+        index_operational = (index_months > 12 * construction_phase_a).astype(np.float64)
+
+        # Monthly series of the plant operation (0 until the end of construction): Wind, PV, Grid, Surplus RES, NH3
+        el_series = np.zeros((5, len(index_months)))
+        for row, column in enumerate(['p_Wind_MW', 'p_PV_MW', 'p_Grid_MW', 'p_Surplus_RES_MW', 'syn_NH3_out_tNH3']):
+            el_series[row, 1 + 12 * int(construction_phase_a):] = month_sum[column]
+
+        for start in range(0, len(rows), block_size):
+            block = rows[start:start + block_size]
+
+            # Sample x month matrices of the discount and CPI factors
+            discount_factor = 1 / np.power(1 + values['WACC'][block, None], index_months / 12)
+            CPI_factor = np.power(1 + values['CPI'][block, None], index_months / 12)
+
+            # Discounted sums of the monthly series and of the CPI indexed O&M months
+            el_discounted = discount_factor @ el_series.T
+            OpEx_discounted = (discount_factor * CPI_factor) @ index_operational * O_M_cost[block] / 12
+
+            c_Total_discounted_EUR[block] = (
+                CapEx_Total[block]
+                + OpEx_discounted
+                + values['RES_Asset_Wind_PPA_price_EURpMWh'][block] * el_discounted[:, 0]
+                + values['RES_Asset_PV_PPA_price_EURpMWh'][block] * el_discounted[:, 1]
+                + values['grid_el_price_EURpMWh'][block] * el_discounted[:, 2]
+                - values['RES_Surplus_sales_price_EURpMWh'][block] * el_discounted[:, 3]
+            )
+            NH3_out_discounted[block] = el_discounted[:, 4]
+
+    # Levelized Cost of Ammonia
+    LCOA = np.divide(c_Total_discounted_EUR, NH3_out_discounted, out=np.zeros(n_samples), where=NH3_out_discounted > 0)
+
+    # Specific cost of produced, consumed and consumed RES + Grid (EUR/MWh)
+    c_RES_EUR = (total_sum['p_Wind_MW'] * values['RES_Asset_Wind_PPA_price_EURpMWh']
+                 + total_sum['p_PV_MW'] * values['RES_Asset_PV_PPA_price_EURpMWh'])
+    el_RES_consumed_MWh = total_sum['p_Total_RES_MW'] - total_sum['p_Surplus_RES_MW']
+    sc_RES_out_EURpMWh = c_RES_EUR / total_sum['p_Total_RES_MW']
+    sc_RES_consumed_EURpMWh = c_RES_EUR / el_RES_consumed_MWh
+    sc_RES_consumed_Grid_EURpMWh = ((c_RES_EUR + total_sum['p_Grid_MW'] * values['grid_el_price_EURpMWh'])
+                                    / (el_RES_consumed_MWh + total_sum['p_Grid_MW']))
+
+    df_samples = pd.DataFrame({name: values[name] for name in samples})
+    df_samples['LCOA - monthly (EUR/tNH3)'] = LCOA
+    df_samples['Total CapEx (EUR)'] = CapEx_Total
+    df_samples['Specific cost of produced RES (EUR/MWh)'] = sc_RES_out_EURpMWh
+    df_samples['Specific cost of consumed RES (EUR/MWh)'] = sc_RES_consumed_EURpMWh
+    df_samples['Specific cost of consumed RES + Grid (EUR/MWh)'] = sc_RES_consumed_Grid_EURpMWh
+
+    df_summary = df_samples.drop(columns=list(samples)).describe(percentiles=list(percentiles))
+
+    return df_samples, df_summary
+
+if __name__ == '__main__':
+    # Benchmark kpi_calc() on df_out and on the PlantAggregates of the same plant against the resample aggregation of
+    # all df_out columns (count, sum, mean, max and min per month, per year and in total) that it replaces
+
+    from plant_calc import plant_calc
+    from plant_init import plant_init
+
+    runs = 10
+    plant_config = plant_init()
+    calendar = res_data.load_res_profiles()[0].calendar()
+    df_out = plant_calc(plant_config)
+    plant_aggregates = plant_calc(plant_config, columns='kpi', aggregates=True)
+
+    df_resample = df_out.drop(columns=['DateTimes', 'operation_mode']).drop([0])
+    df_resample.index = pd.DatetimeIndex(calendar.DateTimes, name='DateTimes')
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        df_resample.resample('ME').agg(['count', 'sum', 'mean', 'max', 'min'])
+        df_resample.resample('YE').agg(['count', 'sum', 'mean', 'max', 'min'])
+        df_resample.agg(['count', 'sum', 'mean', 'max', 'min'])
+    end_time = time.perf_counter()
+    print(f"Resample aggregation of all df_out columns: {(end_time - start_time) / runs:.6f} seconds")
+
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        kpi_calc(df_out, plant_config, calendar=calendar)
+    end_time = time.perf_counter()
+    print(f"kpi_calc() runtime (df_out): {(end_time - start_time) / runs:.6f} seconds")
+
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        kpi_calc(plant_aggregates, plant_config)
+    end_time = time.perf_counter()
+    print(f"kpi_calc() runtime (PlantAggregates): {(end_time - start_time) / runs:.6f} seconds")
+
+    # Monte Carlo evaluation of the LCOA over 100000 samples of WACC, CPI and grid price
+    rng = np.random.default_rng(0)
+    samples = {
+        'WACC': rng.uniform(0.04, 0.12, 100000),
+        'CPI': rng.uniform(0.0, 0.04, 100000),
+        'grid_el_price_EURpMWh': rng.uniform(50, 250, 100000)
+    }
+    start_time = time.perf_counter()
+    df_samples, df_summary = lcoa_samples(plant_aggregates, plant_config, samples)
+    end_time = time.perf_counter()
+    print(f"lcoa_samples() runtime (100000 samples): {end_time - start_time:.6f} seconds")
+    print(df_summary)
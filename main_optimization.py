@@ -0,0 +1,200 @@
+#################################################################################################################
+# main_optimization minimizes the LCOA (or another KPI of kpi_calc()) over chosen plant_init() parameters within
+# bounds, optionally subject to constraints on other KPIs (e.g. a maximum NH3 carbon intensity or a maximum number of
+# Haber-Bosch shutdowns). optimize_plant() is a bounded pattern search (derivative-free): each iteration polls the
+# neighbours of the incumbent point along every parameter at the current step size, moves to the best feasible
+# improvement or halves the step size otherwise. The poll points of an iteration are calculated as one batch, in
+# parallel by a pool of worker processes if workers > 1. Points are memoized, so that revisited points are not
+# calculated again (across runs, plant calculations are served by the result cache if enabled, see result_cache).
+# The convergence history (incumbent per iteration) is logged and returned as DataFrame.
+# The examples of constraint_violation() are checked by python -m doctest main_optimization.py
+#################################################################################################################
+
+import inspect
+import json
+import math
+import os
+import time
+import numpy as np
+import pandas as pd
+from plant_calc import parallel_imap
+from plant_init import plant_init, parameter_class
+from sweep import block_results
+
+# Constraint operators of optimize_plant(): violation of a KPI value against its limit
+constraint_operators = {
+    '<=': lambda value, limit: max(value - limit, 0.0),
+    '>=': lambda value, limit: max(limit - value, 0.0)
+}
+
+# KPIs that are NaN for a known reason and the value taken for them in constraints: the average shutdown durations are
+# NaN if there are no shutdowns, which meets any maximum shutdown duration. Any other NaN KPI violates its constraints
+nan_KPI_values = {
+    'Average Electrolysis Shutdown Duration (hours)': 0.0,
+    'Average Haber-Bosch Shutdown Duration (hours)': 0.0
+}
+
+
+def constraint_violation(dict_KPI, constraints):
+    """Returns the total violation of constraints ({KPI name: (operator, limit)}) by dict_KPI, each relative to
+    abs(limit) (or absolute for a limit of 0). 0 if all constraints are met, inf if a constrained KPI is NaN (except
+    those of nan_KPI_values).
+
+    >>> duration = 'Average Haber-Bosch Shutdown Duration (hours)'
+    >>> constraint_violation({duration: float('nan')}, {duration: ('<=', 10.0)})
+    0.0
+    >>> constraint_violation({duration: float('nan')}, {duration: ('>=', 10.0)})
+    1.0
+    >>> ci = 'Average annual NH3 CI (gCO2/MJ)'
+    >>> constraint_violation({ci: float('nan')}, {ci: ('<=', 20.0)})
+    inf
+    >>> constraint_violation({ci: 25.0, duration: float('nan')}, {ci: ('<=', 20.0), duration: ('<=', 10.0)})
+    0.25
+    """
+    violation = 0.0
+    for name, (operator, limit) in constraints.items():
+        if name not in dict_KPI:
+            raise ValueError(f"Invalid constraint KPI {name!r} - constraints have to be kpi_calc() KPIs")
+        value = dict_KPI[name]
+        if math.isnan(value):
+            if name not in nan_KPI_values:
+                return math.inf
+            value = nan_KPI_values[name]
+        violation += constraint_operators[operator](value, limit) / (abs(limit) or 1.0)
+    return violation
+
+
+def optimize_plant(bounds, constraints=None, kpi='LCOA - monthly (EUR/tNH3)', start=None, step=0.25, min_step=1 / 64,
+                   max_evaluations=500, workers=1, chunksize=None):
+    """Minimizes kpi over the plant_init() parameters of bounds ({name: (low, high)}) subject to constraints
+    ({KPI name: ('<=' or '>=', limit)}) by a bounded pattern search. The search starts at start ({name: value},
+    default: the plant_init() defaults clipped to the bounds) with a step size of step (fraction of each parameter
+    range), which is halved when no poll point improves on the incumbent, until it is below min_step or
+    max_evaluations points are calculated. Feasible points rank before infeasible ones, infeasible points by their
+    constraint violation (see constraint_violation()), points without NH3 production are infeasible and points with
+    a NaN kpi rank last.
+    Returns the best plant_init() **kwargs, its KPI dictionary and the convergence history (DataFrame)."""
+    constraints = constraints or {}
+    for name, (low, high) in bounds.items():
+        parameter_class(name)  # raises ValueError for invalid plant_init() parameters
+        if not low < high:
+            raise ValueError(f"Invalid bounds of {name!r} - low has to be < high")
+    for name, (operator, limit) in constraints.items():
+        if operator not in constraint_operators:
+            raise ValueError(f"Invalid constraint operator {operator!r} of {name!r} - use '<=' or '>='")
+
+    names = list(bounds)
+    low = np.array([bounds[name][0] for name in names], dtype=np.float64)
+    high = np.array([bounds[name][1] for name in names], dtype=np.float64)
+
+    # The search runs in unit coordinates (0 = low, 1 = high) of each parameter
+    if start is None:
+        defaults = inspect.signature(plant_init).parameters
+        start = {name: defaults[name].default for name in names}
+    x = np.clip((np.array([start[name] for name in names], dtype=np.float64) - low) / (high - low), 0.0, 1.0)
+
+    memo = {}  # (violation, kpi value, KPI dictionary) of each calculated point (rounded unit coordinates)
+
+    def key(u):
+        return tuple(np.round(u, 12).tolist())
+
+    def point_kwargs(u):
+        return dict(zip(names, (low + u * (high - low)).tolist()))
+
+    def evaluate(batch):
+        # Calculate the points of batch that are not memoized yet, one point per task
+        new = list(dict.fromkeys(key(u) for u in batch if key(u) not in memo))
+        new = new[:max(max_evaluations - len(memo), 0)]
+        tasks = [([n], [point_kwargs(np.array(u))]) for n, u in enumerate(new)]
+        for u, rows in zip(new, parallel_imap(block_results, tasks, workers=workers, chunksize=chunksize)):
+            dict_KPI = {name: value for name, value in rows[0].items() if name != 'point' and name not in names}
+            violation = constraint_violation(dict_KPI, constraints)
+            if not dict_KPI['Average annual NH3 production (tNH3)'] > 0:
+                violation = np.inf
+            memo[u] = (violation, dict_KPI[kpi], dict_KPI)
+
+    def rank(u):
+        # A NaN kpi value ranks last, NaN would not compare
+        violation, value, _ = memo[key(u)]
+        return violation, math.inf if math.isnan(value) else value
+
+    history = []
+
+    def log(iteration, step):
+        violation, value, dict_KPI = memo[key(x)]
+        history.append({'iteration': iteration, 'evaluations': len(memo), 'step': step, kpi: value,
+                        'violation': violation, **point_kwargs(x)})
+        print(f"Iteration {iteration}: {len(memo)} evaluations, step {step:.6f}, {kpi} {value:.4f}, "
+              f"violation {violation:.6f}, {json.dumps(point_kwargs(x))}")
+
+    evaluate([x])
+    iteration = 0
+    log(iteration, step)
+
+    while step >= min_step and len(memo) < max_evaluations:
+        iteration += 1
+
+        # Poll the neighbours of the incumbent along every parameter (clipped to the bounds)
+        poll = []
+        for d in range(len(names)):
+            for direction in (1.0, -1.0):
+                u = x.copy()
+                u[d] = min(max(u[d] + direction * step, 0.0), 1.0)
+                if u[d] != x[d]:
+                    poll.append(u)
+        evaluate(poll)
+
+        poll = [u for u in poll if key(u) in memo]
+        best = min(poll, key=rank, default=None)
+        if best is not None and rank(best) < rank(x):
+            x = best
+        else:
+            step /= 2
+
+        log(iteration, step)
+
+    violation, value, dict_KPI = memo[key(x)]
+    if violation > 0:
+        print(f"No feasible point found - the least infeasible point violates the constraints by {violation:.6f}")
+
+    return point_kwargs(x), dict_KPI, pd.DataFrame(history)
+
+
+def main():
+    pd.set_option("expand_frame_repr", False)
+    pd.set_option("display.min_rows", 10)
+
+    # 1. Define optimization parameters, their bounds and the KPI constraints
+    # Choose parameters according to plant_init() keys and constraints according to kpi_calc() KPIs
+    ##########################################
+    bounds = {
+        'RES_Asset_Wind_Pnom_MW': (20, 400),
+        'RES_Asset_PV_Pnom_MW': (20, 400),
+        'Electrolysis_capacity_MW': (50, 200),
+        'BESS_capacity_MWh': (0, 200),
+        'H2Storage_capacity_tH2': (0, 200)
+    }
+    constraints = {
+        'Average annual NH3 CI (gCO2/MJ)': ('<=', 20),
+        'Average annual Nr of Haber-Bosch Shutdowns': ('<=', 150)
+    }
+    ##########################################
+
+
+    # 2. Run optimization
+    ##########################################
+    best_kwargs, dict_KPI, df_history = optimize_plant(bounds, constraints=constraints, workers=os.cpu_count())
+
+    print(df_history)
+    print(json.dumps(best_kwargs, indent=4))
+    for key, value in dict_KPI.items():
+        print(f"{key} : {round(value, 2)}")
+
+
+if __name__ == '__main__':
+    start_time = time.perf_counter()
+    main()
+    end_time = time.perf_counter()
+
+    elapsed_time = end_time - start_time
+    print(f"Function runtime: {elapsed_time:.6f} seconds")
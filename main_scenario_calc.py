@@ -9,6 +9,7 @@ from plant_init import *
 from to_excel import *
 from visualize import *
 from kpi_calc import *
+import res_data
 import json
 
 def main():
@@ -31,9 +32,13 @@ def main():
     print(df_out)
 
 
+    # Calendar index of the RES profiles used in plant_calc() (shared by kpi_calc() and visualize())
+    calendar = res_data.load_res_profiles()[0].calendar()
+
+
     # 3. KPI + LCOA calculation
     ##########################################
-    KPI_calc_out = kpi_calc(df_out=df_out, plant_config=plant_config)
+    KPI_calc_out = kpi_calc(df_out=df_out, plant_config=plant_config, calendar=calendar)
 
     df_lcoa = KPI_calc_out[0]
     print(df_lcoa)
@@ -68,7 +73,7 @@ def main():
     fig_name = ''
     ##########################################
 
-    visualize(df_out, plant_config, fig_name=fig_name)
+    visualize(df_out, plant_config, fig_name=fig_name, calendar=calendar)
 
 
 if __name__ == '__main__':
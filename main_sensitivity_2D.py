@@ -6,6 +6,8 @@
 from plant_calc import *
 from plant_init import *
 from kpi_calc import *
+from sweep import technical_group_KPIs, list_points, run_sweep, read_results
+import result_cache
 import json
 import time
 import os
@@ -22,7 +24,9 @@ def generate_xy_inputs(x, y, x0, y0, dx, dy, x_steps, y_steps):
     xy_input_data = {"x": x, "y": y, "xy_input": xy_input}
     return xy_input_data
 
-def calc_2D(xy_input_data):
+def calc_2D(xy_input_data, workers=1, chunksize=None, path=None):
+    """Returns the plant configuration values and KPIs of all (x, y) inputs. With a path, each completed step is stored
+    in the result store at path (see sweep.run_sweep()) and a restarted calculation resumes from the stored steps."""
     x = xy_input_data["x"]
     y = xy_input_data["y"]
     xy_input = xy_input_data["xy_input"]
@@ -33,25 +37,36 @@ def calc_2D(xy_input_data):
 
     total_steps = len(xy_input)
 
-    for step, (i_x, i_y) in enumerate(xy_input, start=1):
-        # Compute percentage progress
-        percent = (step / total_steps) * 100
+    # Initialize plant configurations
+    plant_kwargs = [{x: i_x, y: i_y} for i_x, i_y in xy_input]
+    plant_configs = [plant_init(**kwargs) for kwargs in plant_kwargs]
 
-        # Print progress message
-        print(f"Progress: {percent:.2f}% (step {step} of {total_steps})")
+    if path is not None:
+        # Perform calculations of the steps not yet stored, then read all steps from the result store (in input order)
+        run_sweep(list_points(plant_kwargs), path, workers=workers, chunksize=chunksize)
+        df_results = read_results(path).sort_values('point').drop(columns=['point', x, y])
+        KPI_list = df_results.to_dict('records')
 
-        # Create input dictionary for initialization
-        plant_init_input = {x: i_x, y: i_y}
+    else:
+        # Plant configurations that only differ in economic parameters (see plant_init.parameter_class()) share one
+        # plant calculation: plant_calc() runs once per technical group, kpi_calc() for each configuration of the group
+        groups = technical_groups(plant_kwargs)
+        total_groups = len(groups)
+
+        # Perform calculations, in parallel by a pool of workers processes if workers > 1 (results in input order)
+        group_KPI_list = parallel_imap(technical_group_KPIs, [[plant_configs[n] for n in group] for group in groups],
+                                       workers=workers, chunksize=chunksize)
 
-        # Initialize plant configuration
-        plant_config = plant_init(**plant_init_input)
+        KPI_list = [None] * total_steps
+        for step, (group, group_KPIs) in enumerate(zip(groups, group_KPI_list), start=1):
+            # Print progress message
+            print(f"Progress: {step / total_groups * 100:.2f}% (plant calculation {step} of {total_groups}, "
+                  f"{len(group)} of {total_steps} steps)")
 
-        # Perform calculations
-        df_out = plant_calc(plant_config=plant_config)
-        KPI_calc_out = kpi_calc(df_out=df_out, plant_config=plant_config)
+            for n, dict_KPI in zip(group, group_KPIs):
+                KPI_list[n] = dict_KPI
 
-        # Extract KPI dictionary
-        dict_KPI = KPI_calc_out[1]
+    for plant_config, dict_KPI in zip(plant_configs, KPI_list):
 
         # Function to recursively extract 'value' fields from plant_config
         def extract_values(nested_dict, parent_key=""):
@@ -73,6 +88,10 @@ def calc_2D(xy_input_data):
                 KPI_total[key] = []
             KPI_total[key].append(value)
 
+    # Result cache statistics of this process (plant calculations of worker processes are counted by the workers)
+    if result_cache.enabled:
+        print(f"Result cache: {result_cache.cache_stats()}")
+
     return plant_config_total, KPI_total
 
 def store_results(x, y, data):
@@ -127,8 +146,12 @@ def main():
 
 
     # 2. Iterative calculation of input configurations input(x,y)
+    # Set sweep_path to a result store directory (e.g. f"Output_Data/sweep_x_{x}_y_{y}") to store each completed step,
+    # a restart then resumes from the stored steps of the same calculation (see sweep.run_sweep())
+    ##########################################
+    sweep_path = None
     ##########################################
-    calc_2D_out = calc_2D(xy_input_data)
+    calc_2D_out = calc_2D(xy_input_data, workers=os.cpu_count(), path=sweep_path)
 
     plant_config_total = calc_2D_out[0]
     KPI_total = calc_2D_out[1]
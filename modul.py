@@ -1,3 +1,7 @@
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from operator import itemgetter
+
 
 class RES_Asset:
     def __init__(
@@ -57,6 +61,408 @@ class H2Storage:
         self.flex_use = flex_use
         self.ci_max_gCO2pMJ = ci_max_gCO2pMJ
 
+class H2Storage_Ledger:
+    # Exact FIFO ledger of the H2 batches [time step, tH2, ci_gCO2pMJ] stored in the cH2-Storage (plant_calc(ledger=
+    # 'exact'), the default). SOC and CO2 (tH2 * ci) are the sums over the stored batches taken oldest first, exactly
+    # as sum() over a list of the batches gives them, so that the dispatch is bit-identical to the list of batches it
+    # replaces. Batches are therefore never merged.
+    # Batches are kept in a list with a head index (first stored batch) and compacted from time to time. The running
+    # sums of the stored tH2 (prefix: SOC up to and including each batch) are extended when batches are added.
+    # prefix and an index of the batches with ci > 0 answer the vent-and-replace search of Condition 7 by bisection.
+    # Bit-identity has a price: a sum taken oldest first changes in every term when the oldest batch changes, so each
+    # vent and withdrawal recomputes the sums over all stored batches, O(number of batches). H2Storage_Ledger_Running
+    # keeps the cost per hour constant instead, at the price of round-off differences.
+    compact_batches = 64  # Removed batches that trigger a compaction of the lists
+    kind = 'exact'
+
+    def __init__(
+            self,
+            SOC_t0_tH2,
+            ci_t0_gCO2pMJ
+    ):
+        self.clear()
+        self.add(0, SOC_t0_tH2, ci_t0_gCO2pMJ)
+
+    def avg_ci_gCO2pMJ(self):
+        return self.CO2_tH2_gCO2pMJ / self.SOC_tH2 if self.SOC_tH2 > 0 else 0
+
+    def stored_batches(self):
+        """Returns the batches currently stored, oldest first."""
+        return self.batches[self.head:]
+
+    def add(self, ts, tH2, ci_gCO2pMJ):
+        """Stores a batch of tH2 with ci_gCO2pMJ produced in time step ts."""
+        self.batches.append([ts, tH2, ci_gCO2pMJ])
+        self.SOC_tH2 += tH2
+        self.prefix.append(self.SOC_tH2)
+        self.CO2_front_gCO2pMJ = self.CO2_tH2_gCO2pMJ
+        self.CO2_tH2_gCO2pMJ += tH2 * ci_gCO2pMJ
+        if ci_gCO2pMJ > 0:
+            self.ci_index.append(len(self.batches) - 1)
+        if tH2 < 0:
+            self.negative += 1
+
+    def extend(self, tH2):
+        """Adds tH2 to the last stored batch (H2 of the same time step and ci)."""
+        batch = self.batches[-1]
+        self._resize(batch, batch[1] + tH2)
+        self.SOC_tH2 = (self.prefix[-2] if len(self.batches) - 1 > self.head else 0) + batch[1]
+        self.prefix[-1] = self.SOC_tH2
+        self.CO2_tH2_gCO2pMJ = self.CO2_front_gCO2pMJ + batch[1] * batch[2]
+
+    def vent_search(self, tH2):
+        """Finds the latest batch (batch_TS) with ci > 0 that lies within the first tH2 of the storage, i.e. how far
+        back H2 can be vented and replaced with tH2 of lower ci H2. Returns batch_TS, the total H2 stored up to and
+        including batch_TS and whether such a batch exists."""
+        batches = self.batches
+        if self.head == len(batches) or not tH2 > 0:
+            return 0, 0, False
+
+        if self.negative:
+            k = self._vent_scan(tH2)
+        else:
+            # Batch k lies within the first tH2 if the H2 stored in front of it (prefix[k - 1]) is less than tH2. The
+            # first batch always does, the last qualifying batch is the first whose prefix reaches tH2.
+            k_max = bisect_left(self.prefix, tH2, self.head, len(batches) - 1)
+
+            # Latest batch with ci > 0 up to k_max
+            c = bisect_right(self.ci_index, k_max, self.ci_head) - 1
+            k = self.ci_index[c] if c >= self.ci_head else -1
+
+        if k < 0:
+            return 0, 0, False
+
+        # Total of the batches stored up to and including time step batch_TS
+        batch_TS = batches[k][0]
+        return batch_TS, self.prefix[bisect_right(batches, batch_TS, k, len(batches), key=itemgetter(0)) - 1], True
+
+    def vent(self, batch_TS, remain_tH2=None):
+        """Vents all batches stored before batch_TS. The batches of batch_TS are vented in full (remain_tH2 = None) or
+        the first of them partially, down to remain_tH2."""
+        batches = self.batches
+        if remain_tH2 is None:
+            self._advance(bisect_right(batches, batch_TS, self.head, len(batches), key=itemgetter(0)))
+        else:
+            k = bisect_left(batches, batch_TS, self.head, len(batches), key=itemgetter(0))
+            if k < len(batches):
+                batch = batches[k]
+                self._resize(batch, batch[1] - (batch[1] - remain_tH2))
+            self._advance(k)
+
+    def withdraw(self, tH2):
+        """Withdraws tH2 (less than the stored H2) first-in-first-out and returns the average ci of the withdrawn H2."""
+        batches = self.batches
+        current_sum = 0
+        CO2_out = 0
+
+        for k in range(self.head, len(batches)):
+            batch = batches[k]
+            if current_sum + batch[1] > tH2:
+                # Withdraw the remaining portion from the current batch. The batches before it are taken out of
+                # storage, except those of the same time step.
+                removed_amount = tH2 - current_sum
+                CO2_out += removed_amount * batch[2]
+                self._resize(batch, batch[1] - removed_amount)
+                self._advance(bisect_left(batches, batch[0], self.head, k, key=itemgetter(0)))
+                break
+            else:
+                # Fully withdraw the batch
+                current_sum += batch[1]
+                CO2_out += batch[1] * batch[2]
+
+        return CO2_out / tH2
+
+    def snapshot(self):
+        """Returns a copy of the ledger state (see restore()), e.g. for checkpoints of plant_calc()."""
+        return {
+            'kind': self.kind,
+            'batches': [list(batch) for batch in self.batches],
+            'prefix': list(self.prefix),
+            'head': self.head,
+            'ci_index': list(self.ci_index),
+            'ci_head': self.ci_head,
+            'negative': self.negative,
+            'SOC_tH2': self.SOC_tH2,
+            'CO2_tH2_gCO2pMJ': self.CO2_tH2_gCO2pMJ,
+            'CO2_front_gCO2pMJ': self.CO2_front_gCO2pMJ
+        }
+
+    def restore(self, snapshot):
+        """Restores the ledger state of a snapshot(). The ledger continues exactly as the ledger the snapshot was
+        taken from."""
+        if snapshot.get('kind') != self.kind:
+            raise ValueError(f"Snapshot of the ledger {snapshot.get('kind')!r}, not of the ledger {self.kind!r}")
+        self.batches = [list(batch) for batch in snapshot['batches']]
+        self.prefix = list(snapshot['prefix'])
+        self.head = snapshot['head']
+        self.ci_index = list(snapshot['ci_index'])
+        self.ci_head = snapshot['ci_head']
+        self.negative = snapshot['negative']
+        self.SOC_tH2 = snapshot['SOC_tH2']
+        self.CO2_tH2_gCO2pMJ = snapshot['CO2_tH2_gCO2pMJ']
+        self.CO2_front_gCO2pMJ = snapshot['CO2_front_gCO2pMJ']
+
+    def clear(self):
+        self.batches = []
+        self.prefix = []
+        self.head = 0
+        self.ci_index = []
+        self.ci_head = 0
+        self.negative = 0  # Number of stored batches of negative tH2 (round-off), which leave prefix unsorted
+        self.SOC_tH2 = 0
+        self.CO2_tH2_gCO2pMJ = 0
+        self.CO2_front_gCO2pMJ = 0  # CO2 of all but the last batch
+
+    def _resize(self, batch, tH2):
+        # Sets the tH2 of a stored batch, keeping count of the batches of negative tH2
+        self.negative += (tH2 < 0) - (batch[1] < 0)
+        batch[1] = tH2
+
+    def _vent_scan(self, tH2):
+        # vent_search() by a scan of the batches, for an unsorted prefix
+        k_vent = -1
+        for k in range(self.head, len(self.batches)):
+            if self.batches[k][2] > 0 and (self.prefix[k - 1] if k > self.head else 0) < tH2:
+                k_vent = k
+        return k_vent
+
+    def _advance(self, k):
+        # Batch k becomes the first stored batch, the running sums are recomputed over the stored batches
+        if k == len(self.batches):
+            self.clear()
+            return
+
+        for batch in self.batches[self.head:k]:
+            self.negative -= batch[1] < 0
+        self.head = k
+        self.ci_head = bisect_left(self.ci_index, k, self.ci_head)
+
+        if self.head >= self.compact_batches and 2 * self.head >= len(self.batches):
+            del self.batches[:self.head]
+            del self.prefix[:self.head]
+            self.ci_index = [c - self.head for c in self.ci_index[self.ci_head:]]
+            self.ci_head = 0
+            self.head = 0
+
+        # O(number of stored batches), see above
+        stored = self.batches[self.head:]
+        self.prefix[self.head:] = list(accumulate([batch[1] for batch in stored], initial=0))[1:]
+        CO2 = list(accumulate([batch[1] * batch[2] for batch in stored], initial=0))
+        self.SOC_tH2 = self.prefix[-1]
+        self.CO2_tH2_gCO2pMJ = CO2[-1]
+        self.CO2_front_gCO2pMJ = CO2[-2]
+
+class H2Storage_Ledger_Running:
+    # FIFO ledger of the H2 batches stored in the cH2-Storage at a constant cost per hour (plant_calc(ledger=
+    # 'running')). Each batch (time step ts, ci_gCO2pMJ) is stored by the totals of tH2 and CO2 (tH2 * ci) added to the
+    # storage up to and including it (end_tH2, end_CO2), the totals taken out of the storage are front_tH2 and
+    # front_CO2. SOC and CO2 are differences of two totals, a withdrawal moves the front and removes the emptied batches
+    # (amortized O(1)) and the vent-and-replace search of Condition 7 bisects end_tH2. A batch of the same ci as the
+    # last stored batch is merged into it (it then carries the time step of its oldest part).
+    # Results are not bit-identical to H2Storage_Ledger (the reference): differences of totals do not round like sums
+    # taken oldest first. Where the dispatch decides on a tie (e.g. a storage full up to round-off), the decision may
+    # differ and the dispatch then departs from the reference. KPIs differed by up to 0.33 % in the plants checked.
+    compact_batches = 64  # Removed batches that trigger a compaction of the lists
+    kind = 'running'
+
+    def __init__(
+            self,
+            SOC_t0_tH2,
+            ci_t0_gCO2pMJ
+    ):
+        self.clear()
+        self.add(0, SOC_t0_tH2, ci_t0_gCO2pMJ)
+
+    @property
+    def SOC_tH2(self):
+        return self.end_tH2[-1] - self.front_tH2 if self.end_tH2 else 0
+
+    @property
+    def CO2_tH2_gCO2pMJ(self):
+        return self.end_CO2[-1] - self.front_CO2 if self.end_CO2 else 0
+
+    def avg_ci_gCO2pMJ(self):
+        SOC_tH2 = self.SOC_tH2
+        return self.CO2_tH2_gCO2pMJ / SOC_tH2 if SOC_tH2 > 0 else 0
+
+    def stored_batches(self):
+        """Returns the batches currently stored, oldest first."""
+        return [[self.ts[k], self._amount(k), self.ci[k]] for k in range(self.head, len(self.ts))]
+
+    def add(self, ts, tH2, ci_gCO2pMJ):
+        """Stores a batch of tH2 with ci_gCO2pMJ produced in time step ts."""
+        if len(self.ts) > self.head and self.ci[-1] == ci_gCO2pMJ:
+            self.extend(tH2)
+            return
+
+        self.ts.append(ts)
+        self.ci.append(ci_gCO2pMJ)
+        self.end_tH2.append((self.end_tH2[-1] if self.end_tH2 else self.front_tH2) + tH2)
+        self.end_CO2.append((self.end_CO2[-1] if self.end_CO2 else self.front_CO2) + tH2 * ci_gCO2pMJ)
+        if ci_gCO2pMJ > 0:
+            self.ci_index.append(len(self.ts) - 1)
+        if tH2 < 0:
+            self.negative += 1
+
+    def extend(self, tH2):
+        """Adds tH2 to the last stored batch (H2 of the same time step and ci)."""
+        before_tH2 = self._amount(len(self.ts) - 1)
+        self.end_tH2[-1] += tH2
+        self.end_CO2[-1] += tH2 * self.ci[-1]
+        self.negative += (before_tH2 + tH2 < 0) - (before_tH2 < 0)
+
+    def vent_search(self, tH2):
+        """Finds the latest batch (batch_TS) with ci > 0 that lies within the first tH2 of the storage, i.e. how far
+        back H2 can be vented and replaced with tH2 of lower ci H2. Returns batch_TS, the total H2 stored up to and
+        including batch_TS and whether such a batch exists."""
+        n = len(self.ts)
+        if self.head == n or not tH2 > 0:
+            return 0, 0, False
+
+        if self.negative:
+            k = self._vent_scan(tH2)
+        else:
+            # Batch k lies within the first tH2 if the H2 stored in front of it is less than tH2. The first batch
+            # always does, the last qualifying batch is the first whose end reaches tH2.
+            k_max = bisect_left(self.end_tH2, self.front_tH2 + tH2, self.head, n - 1)
+
+            # Latest batch with ci > 0 up to k_max
+            c = bisect_right(self.ci_index, k_max, self.ci_head) - 1
+            k = self.ci_index[c] if c >= self.ci_head else -1
+
+        if k < 0:
+            return 0, 0, False
+
+        # Total of the batches stored up to and including time step batch_TS
+        batch_TS = self.ts[k]
+        return batch_TS, self.end_tH2[bisect_right(self.ts, batch_TS, k, n) - 1] - self.front_tH2, True
+
+    def vent(self, batch_TS, remain_tH2=None):
+        """Vents all batches stored before batch_TS. The batches of batch_TS are vented in full (remain_tH2 = None) or
+        the first of them partially, down to remain_tH2."""
+        n = len(self.ts)
+        if remain_tH2 is None:
+            self._advance(bisect_right(self.ts, batch_TS, self.head, n))
+            return
+
+        k = bisect_left(self.ts, batch_TS, self.head, n)
+        if k == n:
+            self._advance(k)
+            return
+
+        self.negative += (remain_tH2 < 0) - (self._amount(k) < 0)
+        self._advance(k, self.end_tH2[k] - remain_tH2, self.end_CO2[k] - remain_tH2 * self.ci[k])
+
+    def withdraw(self, tH2):
+        """Withdraws tH2 (less than the stored H2) first-in-first-out and returns the average ci of the withdrawn H2."""
+        n = len(self.ts)
+        target_tH2 = self.front_tH2 + tH2
+
+        # First batch that is not emptied by the withdrawal
+        if self.negative:
+            k = next((k for k in range(self.head, n) if self.end_tH2[k] > target_tH2), n)
+        else:
+            k = bisect_right(self.end_tH2, target_tH2, self.head, n)
+
+        if k == n:
+            # Nothing is left in storage (round-off), the storage is not changed
+            return self.CO2_tH2_gCO2pMJ / tH2
+
+        start_tH2 = self.end_tH2[k - 1] if k > self.head else self.front_tH2
+        start_CO2 = self.end_CO2[k - 1] if k > self.head else self.front_CO2
+        front_CO2 = start_CO2 + (target_tH2 - start_tH2) * self.ci[k]
+        CO2_out = front_CO2 - self.front_CO2
+
+        self.negative += (self.end_tH2[k] - target_tH2 < 0) - (self.end_tH2[k] - start_tH2 < 0)
+        self._advance(k, target_tH2, front_CO2)
+        return CO2_out / tH2
+
+    def snapshot(self):
+        """Returns a copy of the ledger state (see restore()), e.g. for checkpoints of plant_calc()."""
+        return {
+            'kind': self.kind,
+            'ts': list(self.ts),
+            'ci': list(self.ci),
+            'end_tH2': list(self.end_tH2),
+            'end_CO2': list(self.end_CO2),
+            'head': self.head,
+            'front_tH2': self.front_tH2,
+            'front_CO2': self.front_CO2,
+            'ci_index': list(self.ci_index),
+            'ci_head': self.ci_head,
+            'negative': self.negative
+        }
+
+    def restore(self, snapshot):
+        """Restores the ledger state of a snapshot(). The ledger continues exactly as the ledger the snapshot was
+        taken from."""
+        if snapshot.get('kind') != self.kind:
+            raise ValueError(f"Snapshot of the ledger {snapshot.get('kind')!r}, not of the ledger {self.kind!r}")
+        self.ts = list(snapshot['ts'])
+        self.ci = list(snapshot['ci'])
+        self.end_tH2 = list(snapshot['end_tH2'])
+        self.end_CO2 = list(snapshot['end_CO2'])
+        self.head = snapshot['head']
+        self.front_tH2 = snapshot['front_tH2']
+        self.front_CO2 = snapshot['front_CO2']
+        self.ci_index = list(snapshot['ci_index'])
+        self.ci_head = snapshot['ci_head']
+        self.negative = snapshot['negative']
+
+    def clear(self):
+        self.ts = []
+        self.ci = []
+        self.end_tH2 = []
+        self.end_CO2 = []
+        self.head = 0
+        self.front_tH2 = 0
+        self.front_CO2 = 0
+        self.ci_index = []
+        self.ci_head = 0
+        self.negative = 0  # Number of stored batches of negative tH2 (round-off), which leave end_tH2 unsorted
+
+    def _amount(self, k):
+        # tH2 of stored batch k
+        return self.end_tH2[k] - (self.end_tH2[k - 1] if k > self.head else self.front_tH2)
+
+    def _vent_scan(self, tH2):
+        # vent_search() by a scan of the batches, for an unsorted end_tH2
+        k_vent = -1
+        for k in range(self.head, len(self.ts)):
+            if self.ci[k] > 0 and (self.end_tH2[k - 1] if k > self.head else self.front_tH2) - self.front_tH2 < tH2:
+                k_vent = k
+        return k_vent
+
+    def _advance(self, k, front_tH2=None, front_CO2=None):
+        # Batch k becomes the first stored batch, the batches before it are removed. The front moves to the start of
+        # batch k or into it (front_tH2, front_CO2)
+        n = len(self.ts)
+        if k == n:
+            self.clear()
+            return
+
+        for j in range(self.head, k):
+            self.negative -= self._amount(j) < 0
+        if front_tH2 is None:
+            front_tH2 = self.end_tH2[k - 1] if k > self.head else self.front_tH2
+            front_CO2 = self.end_CO2[k - 1] if k > self.head else self.front_CO2
+        self.front_tH2 = front_tH2
+        self.front_CO2 = front_CO2
+        self.head = k
+        self.ci_head = bisect_left(self.ci_index, k, self.ci_head)
+
+        if self.head >= self.compact_batches and 2 * self.head >= n:
+            # The totals are taken relative to the front again, so that they stay small
+            del self.ts[:self.head]
+            del self.ci[:self.head]
+            self.end_tH2 = [end - self.front_tH2 for end in self.end_tH2[self.head:]]
+            self.end_CO2 = [end - self.front_CO2 for end in self.end_CO2[self.head:]]
+            self.front_tH2 = 0
+            self.front_CO2 = 0
+            self.ci_index = [c - self.head for c in self.ci_index[self.ci_head:]]
+            self.ci_head = 0
+            self.head = 0
+
 class Electrolysis:
     def __init__(
             self,
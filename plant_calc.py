@@ -3,16 +3,383 @@
 # plant_calc() calculates the plant operation vor a pre defined plant setup and returns the entire time series in
 # the df_out pandas dataframe. The parameter store_to_csv checks whether the results shall be stored to the
 # out.csv file and is defaulted as False
+# operating_envelope() gives the degradation affected plant properties and operating limits of each month, which
+# plant_calc() applies at every month boundary
+# With engine='jit' the hourly dispatch runs in the Numba-compiled kernel of plant_calc_jit (optional dependency numba)
+# instead of the Python loop, which remains the reference
+# Plants without BESS and cH2-Storage are calculated in closed form by dispatch_storage_free() (identical df_out)
+# Optionally plant_calc() records the plant state at each month boundary (checkpoints) and resumes from such a state
+# ledger='running' keeps the cH2-Storage batches at a constant cost per hour instead of the exact (bit-identical) ledger
+# parallel_imap() calculates tasks (e.g. blocks of sweep points) in parallel by a process pool, results in input order
+# columns= restricts df_out to a list of columns or an output profile of output_profiles ('full', 'kpi', 'minimal')
+# With aggregates=True plant_calc() returns only the monthly aggregates of df_out (PlantAggregates), which are
+# computed from the hourly results once the calculation is complete and accepted by kpi_calc() in place of df_out
+# Results are served from / stored to the on-disk result cache if it is enabled (opt-in, see result_cache)
 #################################################################################################################
 
 
+import importlib.util
+import math
+import multiprocessing
+import os
+import re
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from calendar import monthrange
-from calendar import isleap
+import functions
 import modul
+import res_data
+import result_cache
+
+# Columns of df_out
+output_columns = [
+    'DateTimes',
+    'p_Wind_CF',
+    'p_Wind_MW',
+    'p_PV_CF',
+    'p_PV_MW',
+    'p_Total_RES_MW',
+    'p_Grid_MW',
+    'p_Surplus_RES_MW',
+    'p_Total_consump_MW',
+    'el_el_in_MW',
+    'el_H2_out_tH2',
+    'bess_el_in_MWh',
+    'bess_el_charge_MWh',
+    'bess_SOC_MW',
+    'bess_el_discharge_MWh',
+    'bess_el_out_MWh',
+    'bess_el_loss_MWh',
+    'ch2_comp_el_in_MWh',
+    'ch2_comp_el_in_grid_MWh',
+    'ch2_in_tH2',
+    'ch2_SOC',
+    'ch2_out_tH2',
+    'ch2_vent_tH2',
+    'ch2_in_ci_gCO2pMJ',
+    'ch2_out_ci_gCO2pMJ',
+    'ch2_avg_ci_gCO2pMJ',
+    'syn_el_in_MWh',
+    'syn_el_in_grid_MWh',
+    'syn_H2_in_tH2',
+    'syn_NH3_out_tNH3',
+    'syn_NH3_out_ci_gCO2pMJ',
+    'operation_mode',
+    'syn_shutdown',
+    'el_shutdown',
+    'bess_capacity_MWh',
+    'bess_charge_eff',
+    'bess_discharge_eff',
+    'el_specific_el_MWhptH2'
+]
+
+# Ledgers of the cH2-Storage batches (ledger=) of plant_calc(): 'exact' gives df_out bit-identical to a list of the
+# batches at a cost per hour that grows with the number of stored batches, 'running' a constant cost per hour
+ch2_ledgers = {
+    'exact': modul.H2Storage_Ledger,
+    'running': modul.H2Storage_Ledger_Running
+}
+
+# Output profiles (columns=) of plant_calc(): 'full' gives all columns, 'kpi' the columns read by kpi_calc() and
+# 'minimal' the columns of the LCOA (RES, grid and surplus energy, NH3 output)
+output_profiles = {
+    'full': output_columns,
+    'kpi': [
+        'DateTimes',
+        'p_Wind_MW',
+        'p_PV_MW',
+        'p_Total_RES_MW',
+        'p_Grid_MW',
+        'p_Surplus_RES_MW',
+        'el_el_in_MW',
+        'el_H2_out_tH2',
+        'syn_NH3_out_tNH3',
+        'syn_NH3_out_ci_gCO2pMJ'
+    ],
+    'minimal': [
+        'DateTimes',
+        'p_Wind_MW',
+        'p_PV_MW',
+        'p_Grid_MW',
+        'p_Surplus_RES_MW',
+        'syn_NH3_out_tNH3'
+    ]
+}
+
+####################################################################################################################
+# Operation mode codes
+# The decision path of each hour is recorded as an integer: bit n - 1 is set if Condition n has been checked and bit
+# n + 15 if it was TRUE. Bits 32 - 35 give the operating mode of Condition 11 (con_11_mode_ids) and bit 36 marks a
+# blocked Synthesis (Syn_block). df_out['operation_mode'] holds the decoded labels as a categorical column
+####################################################################################################################
+
+op_mode_con_11_shift = 32
+op_mode_syn_block = 1 << 36
+
+con_11_subcon_1_mode_1 = 1
+con_11_subcon_1_mode_2 = 2
+con_11_subcon_1_mode_3 = 3
+con_11_subcon_1_mode_4 = 4
+con_11_subcon_2_mode_1 = 5
+con_11_subcon_2_mode_2 = 6
+con_11_subcon_2_mode_3 = 7
+con_11_subcon_2_mode_4 = 8
+con_11_subcon_3_mode_1 = 9
+con_11_subcon_3_mode_2 = 10
+con_11_subcon_3_mode_3 = 11
+
+con_11_mode_ids = {
+    'con_11_T_subcon_1_mode_1': con_11_subcon_1_mode_1,
+    'con_11_T_subcon_1_mode_2': con_11_subcon_1_mode_2,
+    'con_11_T_subcon_1_mode_3': con_11_subcon_1_mode_3,
+    'con_11_T_subcon_1_mode_4': con_11_subcon_1_mode_4,
+    'con_11_T_subcon_2_mode_1': con_11_subcon_2_mode_1,
+    'con_11_T_subcon_2_mode_2': con_11_subcon_2_mode_2,
+    'con_11_T_subcon_2_mode_3': con_11_subcon_2_mode_3,
+    'con_11_T_subcon_2_mode_4': con_11_subcon_2_mode_4,
+    'con_11_T_subcon_3_mode_1': con_11_subcon_3_mode_1,
+    'con_11_T_subcon_3_mode_2': con_11_subcon_3_mode_2,
+    'con_11_T_subcon_3_mode_3': con_11_subcon_3_mode_3
+}
+con_11_modes = {mode_id: mode for mode, mode_id in con_11_mode_ids.items()}
+
+
+def op_mode_bits(n, outcome):
+    """Returns the operation mode bits of Condition n with the outcome TRUE/FALSE."""
+    return (1 << (n - 1)) | ((1 << (n + 15)) if outcome else 0)
+
+
+def op_mode_is_true(code, n):
+    """Returns whether Condition n was TRUE in the operation mode code."""
+    return code & (1 << (n + 15)) != 0
+
+
+def operation_mode_str(code):
+    """Returns the operation mode label of an operation mode code (e.g. 'con_1_T_con_2_F_con_4_T_con_5_T')."""
+    if code & op_mode_syn_block:
+        parts = ['Syn_block']
+        first = 13
+    else:
+        parts = []
+        first = 1
+
+    for n in range(first, 17):
+        if code >> (n - 1) & 1:
+            if n == 11 and code >> (n + 15) & 1:
+                parts.append(con_11_modes[code >> op_mode_con_11_shift & 15])
+            else:
+                parts.append(f"con_{n}_{'T' if code >> (n + 15) & 1 else 'F'}")
+
+    return '_'.join(parts)
+
+
+def operation_mode_code(mode):
+    """Returns the operation mode code of an operation mode label (inverse of operation_mode_str())."""
+    code = 0
+    if mode.startswith('Syn_block'):
+        code = op_mode_syn_block
+        mode = mode[len('Syn_block'):]
+
+    for n, outcome, subcon in re.findall(r'con_(\d+)_([TF])(_subcon_\d+_mode_\d+)?', mode):
+        code |= op_mode_bits(int(n), outcome == 'T')
+        if subcon:
+            code |= con_11_mode_ids[f'con_{n}_{outcome}{subcon}'] << op_mode_con_11_shift
+
+    return code
+
+
+def decode_operation_mode(codes):
+    """Returns the operation mode labels of an array of operation mode codes as a pandas Categorical. Each distinct
+    code is decoded once, the category codes (.codes) are small integers, e.g. for mode histograms with np.bincount."""
+    unique_codes, inverse = np.unique(codes, return_inverse=True)
+    return pd.Categorical.from_codes(inverse, categories=[operation_mode_str(int(code)) for code in unique_codes])
+
+
+def select_columns(columns):
+    """Returns the df_out columns of an output profile (see output_profiles) or list of column names, in the order of
+    output_columns."""
+    if isinstance(columns, str):
+        if columns not in output_profiles:
+            raise ValueError(f"Invalid output profile {columns!r} - choose from {list(output_profiles)}")
+        return output_profiles[columns]
+
+    invalid = set(columns) - set(output_columns)
+    if invalid:
+        raise ValueError(f"Invalid df_out columns {sorted(invalid)}")
+
+    return [column for column in output_columns if column in columns]
+
+
+def output_frame(calc_data, operation_mode, DateTimes, columns):
+    """Returns df_out with the given columns, set up from the calc_data arrays without copying them. Operation mode
+    codes are only decoded if requested, the arrays of all other columns are released with calc_data."""
+    calc_data['DateTimes'] = DateTimes
+    if 'operation_mode' in columns:
+        calc_data['operation_mode'] = decode_operation_mode(operation_mode)
+
+    return pd.DataFrame({column: calc_data[column] for column in columns}, columns=columns, copy=False)
+
+
+####################################################################################################################
+# Monthly aggregates
+# With aggregates=True plant_calc() returns a PlantAggregates instead of df_out. It holds the monthly count, sum, max
+# and min of the numeric df_out columns and the shutdown statistics, aggregated from the hourly calc_data arrays after
+# the calculation (a post-pass: the hourly arrays of all columns are allocated either way, the PlantAggregates only
+# saves setting up df_out and keeps the returned or cached result small). Annual and total values are derived from the
+# monthly ones
+####################################################################################################################
+
+# Shutdown columns of df_out and the output (non-negative) they are tracked on
+shutdown_outputs = {
+    'syn_shutdown': 'syn_NH3_out_tNH3',
+    'el_shutdown': 'el_H2_out_tH2'
+}
+
+
+class PlantAggregates:
+    def __init__(
+            self,
+            calendar,
+            columns
+    ):
+        self.calendar = calendar
+
+        # Aggregated df_out columns (the shutdown columns are given by the shutdown statistics instead)
+        self.columns = [column for column in columns if column not in ['DateTimes', 'operation_mode'] + list(shutdown_outputs)]
+
+        # Time step of the first hour of each month and the time step following its last hour
+        self.month_t0 = calendar.month_start + 1
+        self.month_t1 = np.r_[calendar.month_start[1:], len(calendar)] + 1
+        self.months = 0  # Number of months aggregated so far
+
+        months = len(calendar.month_start)
+        self.count = np.zeros(months, dtype=np.int64)
+        self.sum = {column: np.zeros(months) for column in self.columns}
+        self.max = {column: np.zeros(months) for column in self.columns}
+        self.min = {column: np.zeros(months) for column in self.columns}
+
+        # Shutdowns per month: number of shutdowns started and shutdown hours
+        self.SD_count = {column: np.zeros(months, dtype=np.int64) for column in shutdown_outputs}
+        self.SD_hours = {column: np.zeros(months, dtype=np.int64) for column in shutdown_outputs}
+        self._produced = dict.fromkeys(shutdown_outputs, False)
+
+    def accumulate(self, calc_data, i):
+        """Aggregates the months of calc_data that are complete before time step i and not aggregated yet."""
+        while self.months < len(self.month_t1) and self.month_t1[self.months] <= i:
+            m = self.months
+            t0, t1 = self.month_t0[m], self.month_t1[m]
+            self.count[m] = t1 - t0
+
+            for column in self.columns:
+                values = calc_data[column][t0:t1]
+                self.sum[column][m] = values.sum()
+                self.max[column][m] = values.max()
+                self.min[column][m] = values.min()
+
+            # A shutdown starts with the first hour without output and lasts as long as the output is 0. Hours without
+            # output before the first hour with output are no shutdown (as in the hourly loop of plant_calc())
+            for column, output in shutdown_outputs.items():
+                running = calc_data[output][t0 - 1:t1] > 0
+                produced = np.logical_or.accumulate(running[:-1]) | self._produced[column]
+                self.SD_count[column][m] = np.count_nonzero(running[:-1] & ~running[1:])
+                self.SD_hours[column][m] = np.count_nonzero(produced & ~running[1:])
+                self._produced[column] = bool(produced[-1] or running[-1])
+
+            self.months += 1
+
+    def _frame(self, count, sums, maxs, mins, index):
+        # Aggregates in the layout of df_out.resample(...).agg(['count', 'sum', 'mean', 'max', 'min'])
+        data = {}
+        for column in self.columns:
+            data[(column, 'count')] = count
+            data[(column, 'sum')] = sums[column]
+            data[(column, 'mean')] = sums[column] / count
+            data[(column, 'max')] = maxs[column]
+            data[(column, 'min')] = mins[column]
+        return pd.DataFrame(data, index=index)
+
+    def month_frame(self):
+        """Returns the monthly aggregates, as df_out.resample('ME').agg(['count', 'sum', 'mean', 'max', 'min'])."""
+        month_first = self.calendar.DateTimes[self.calendar.month_start].astype('datetime64[M]')
+        index = pd.DatetimeIndex((month_first + 1).astype('datetime64[D]') - 1, name='DateTimes')
+        return self._frame(self.count, self.sum, self.max, self.min, index)
+
+    def year_frame(self):
+        """Returns the annual aggregates, as df_out.resample('YE').agg(['count', 'sum', 'mean', 'max', 'min'])."""
+        year_start = np.flatnonzero(np.r_[True, self.calendar.year[1:] != self.calendar.year[:-1]])
+        index = pd.DatetimeIndex([f"{year}-12-31" for year in self.calendar.year[year_start]], name='DateTimes')
+        return self._frame(
+            np.add.reduceat(self.count, year_start),
+            {column: np.add.reduceat(self.sum[column], year_start) for column in self.columns},
+            {column: np.maximum.reduceat(self.max[column], year_start) for column in self.columns},
+            {column: np.minimum.reduceat(self.min[column], year_start) for column in self.columns},
+            index
+        )
 
-def plant_calc(plant_config):
+    def total(self):
+        """Returns the aggregates of the entire calculation, as df_out.agg(['count', 'sum', 'mean', 'max', 'min'])."""
+        count = self.count.sum()
+        return pd.DataFrame({
+            column: [count, self.sum[column].sum(), self.sum[column].sum() / count, self.max[column].max(),
+                     self.min[column].min()]
+            for column in self.columns
+        }, index=['count', 'sum', 'mean', 'max', 'min'])
+
+    def shutdown_stats(self, column):
+        """Returns the number of shutdowns, the total shutdown hours and the average shutdown duration of a shutdown
+        column ('syn_shutdown', 'el_shutdown'), as df_out[column][df_out[column] > 0].agg(['count', 'sum', 'mean'])."""
+        count = self.SD_count[column].sum()
+        hours = self.SD_hours[column].sum()
+        return pd.Series({'count': count, 'sum': hours, 'mean': hours / count if count else np.nan})
+
+
+def output_aggregates(calc_data, calendar, columns):
+    """Returns the PlantAggregates of the given columns of a complete calculation (calc_data arrays)."""
+    aggregates = PlantAggregates(calendar=calendar, columns=columns)
+    aggregates.accumulate(calc_data, len(calendar) + 1)
+    return aggregates
+
+
+def plant_state(
+        i,
+        bess_SOC_MWh,
+        bess_el_loss_MWh,
+        ch2_SOC,
+        ch2_avg_ci_gCO2pMJ,
+        syn_NH3_out_tNH3,
+        el_H2_out_tH2,
+        bess_capacity_MWh,
+        bess_charge_eff,
+        bess_discharge_eff,
+        el_specific_el_MWhptH2,
+        ch2_ledger,
+        syn_block,
+        syn_delay_counter
+):
+    """Returns the plant state (checkpoint) at the start of time step i, a month boundary: the state and flow values of
+    time step i - 1 the calculation continues from, the degradation affected plant properties in effect, the cH2 batch
+    ledger (H2Storage_Ledger.snapshot()) and the restart delay tracker of the Synthesis."""
+    return {
+        'i': i,
+        'bess_SOC_MWh': bess_SOC_MWh,
+        'bess_el_loss_MWh': bess_el_loss_MWh,
+        'ch2_SOC': ch2_SOC,
+        'ch2_avg_ci_gCO2pMJ': ch2_avg_ci_gCO2pMJ,
+        'syn_NH3_out_tNH3': syn_NH3_out_tNH3,
+        'el_H2_out_tH2': el_H2_out_tH2,
+        'bess_capacity_MWh': bess_capacity_MWh,
+        'bess_charge_eff': bess_charge_eff,
+        'bess_discharge_eff': bess_discharge_eff,
+        'el_specific_el_MWhptH2': el_specific_el_MWhptH2,
+        'ch2_ledger': ch2_ledger,
+        'syn_block': syn_block,
+        'syn_delay_counter': syn_delay_counter
+    }
+
+
+def init_plant(plant_config):
+    """Sets up the modul objects of the plant from plant_config. Returns RES_Asset_Wind, RES_Asset_PV, Grid, BESS,
+    H2Storage, Compressor, Electrolysis and HaberBosch."""
 
     # Set up Modul Objects with plant parameters
     RES_Asset_Wind = modul.RES_Asset(
@@ -69,148 +436,70 @@ def plant_calc(plant_config):
         restart_delay_h=plant_config['HaberBosch']['restart_delay_h']['value']
     )
 
-    # Economic & System variables/constants
-    ci_max_gCO2pMJ = plant_config['Economic_System']['ci_max_gCO2pMJ']['value']
-    ci_others_gCO2pMJ = plant_config['Economic_System']['ci_others_gCO2pMJ']['value']
-    ci_budget_gCO2pMJ = ci_max_gCO2pMJ - ci_others_gCO2pMJ
-    energy_density_NH3_MJpkgNH3 = plant_config['Economic_System']['energy_density_NH3_MJpkgNH3']['value']
-    energy_density_H2_MJpkgH2 = plant_config['Economic_System']['energy_density_H2_MJpkgH2']['value']
-
-    # Read .csv RES Data to pd dataframe
-    file_path_Wind = r'RES_Data/20241126_Run_5_Wind_DE-SH_10_years_2010-01-01_2020-12-31/TS_Multiyear_Wind_DE-SH_2010-01-01_2020-12-31.csv'
-    df_Wind = pd.read_csv(file_path_Wind, names=['DateTimes', 'Wind_CF'], header=None, index_col='DateTimes',
-                          skiprows=4)
-
-    file_path_PV = r'RES_Data/20241126_Run_6_PV_DE-BY_10_years_2010-01-01_2020-12-31/TS_Multiyear_PV_DE-BY_2010-01-01_2020-12-31.csv'
-    df_PV = pd.read_csv(file_path_PV, names=['DateTimes', 'PV_CF'], header=None, index_col='DateTimes', skiprows=4)
-
-    # Create process state (SOC) and flow (el_in, el_out, etc) variables used for later iterative time series calculation
-    timesteps = len(df_PV) + 1
-
-    DateTimes = [datetime.fromtimestamp(0).strftime('%Y-%m-%d %H:%M')] + df_Wind.index.tolist()
-    p_Wind_CF = [0] + df_Wind['Wind_CF'].tolist()
-    p_Wind_MW = [value * RES_Asset_Wind.Pnom_MW for value in p_Wind_CF]
-    p_PV_CF = [0] + df_PV['PV_CF'].tolist()
-    p_PV_MW = [value * RES_Asset_PV.Pnom_MW for value in p_PV_CF]
-    p_Total_RES_MW = [p_wind + p_pv for p_wind, p_pv in zip(p_Wind_MW, p_PV_MW)]
-    p_Grid_MW = [0] * timesteps
-    p_Surplus_RES_MW = [0] * timesteps
-    p_Total_consump_MW = [0] * timesteps
-    el_el_in_MW = [0] * timesteps
-    el_H2_out_tH2 = [0] * timesteps
-    bess_el_in_MWh = [0] * timesteps
-    bess_el_charge_MWh = [0] * timesteps
-    bess_SOC_MWh = [BESS.SOC_t0 * BESS.capacity_MWh] + [0] * (timesteps - 1)
-    bess_el_discharge_MWh = [0] * timesteps
-    bess_el_out_MWh = [0] * timesteps
-    bess_el_loss_MWh = [0] * timesteps
-    ch2_comp_el_in_MWh = [0] * timesteps
-    ch2_comp_el_in_grid_MWh = [0] * timesteps
-    ch2_in_tH2 = [0] * timesteps
-    ch2_in_ci_gCO2pMJ = [0] * timesteps
-    ch2_SOC = [H2Storage.SOC_t0 * H2Storage.capacity_tH2] + [0] * (timesteps - 1)
-    ch2_avg_ci_gCO2pMJ = [H2Storage.ci_max_gCO2pMJ if ch2_SOC[0] > 0 else 0] + [0.] * (timesteps - 1)
-    ch2_batches_TS_tH2_ci = [[0, ch2_SOC[0], ch2_avg_ci_gCO2pMJ[0]]]
-    ch2_out_tH2 = [0] * timesteps
-    ch2_vent_tH2 = [0] * timesteps
-    ch2_out_ci_gCO2pMJ = [0] * timesteps
-    syn_el_in_MWh = [0] * timesteps
-    syn_el_in_grid_MWh = [0] * timesteps
-    syn_H2_in_tH2 = [0] * timesteps
-    syn_NH3_out_tNH3 = [0] * timesteps
-    syn_NH3_out_ci_gCO2pMJ = [0] * timesteps
-    operation_mode = [''] * timesteps
-    syn_shutdown = [0] * timesteps
-    el_shutdown = [0] * timesteps
-    bess_discharge_eff = [BESS.discharge_eff] + [0] * (timesteps - 1)
-    bess_charge_eff = [BESS.charge_eff] + [0] * (timesteps - 1)
-    bess_capacity_MWh = [BESS.capacity_MWh] + [0] * (timesteps - 1)
-    el_specific_el_MWhptH2 = [Electrolysis.specific_el_MWhptH2] + [0] * (timesteps - 1)
-
-
-    # Shut down analysis variable initiation
-    syn_SD_t0 = 0
-    syn_SD_duration = 0
-    el_SD_t0 = 0
-    el_SD_duration = 0
-
-    # Degradation tracker variable initiation
-    prev_month = (
-        datetime.strptime(DateTimes[0], '%Y-%m-%d %H:%M').month,
-        datetime.strptime(DateTimes[0], '%Y-%m-%d %H:%M').year
-    )
-
-    bess_capacity_t0 = BESS.capacity_MWh
-    bess_dischar_eff_t0 = BESS.discharge_eff
-    bess_char_eff_t0 = BESS.charge_eff
-    el_specific_el_t0 = Electrolysis.specific_el_MWhptH2
-
-    # Syn restart delay tracker variable initiation
-    syn_block = False
-    syn_delay_counter = 0
-
-
-
-    ####################################################################################################################
-    # Iterative plant calculation
-    ####################################################################################################################
-
-    for i in range(1, timesteps):
+    return RES_Asset_Wind, RES_Asset_PV, Grid, BESS, H2Storage, Compressor, Electrolysis, HaberBosch
 
-        ####################################################################################################################
-        # Adjust plant performance according to degradation (BESS capacity, Ely specific el consumption, etc)
-        ####################################################################################################################
 
-        current_time = datetime.strptime(DateTimes[i], '%Y-%m-%d %H:%M')
-        current_month = current_time.month
-        current_year = current_time.year
+def init_calc_data(timesteps, Wind_profile, PV_profile, RES_Asset_Wind, RES_Asset_PV, BESS, H2Storage, Electrolysis):
+    """Returns calc_data, the preallocated NumPy arrays of the numeric df_out columns, with RES feed-in and the t0
+    storage levels and plant parameters set."""
 
-        # Check whether the first of a new month has been reached to adjust the degradation for the following month
-        if prev_month != (current_month, current_year):
+    calc_data = {
+        column: np.zeros(timesteps, dtype=np.int64 if column in ('syn_shutdown', 'el_shutdown') else np.float64)
+        for column in output_columns if column not in ('DateTimes', 'operation_mode')
+    }
 
-            # Determine monthly share of degradation
-            days_annual = 366 if isleap(current_year) else 365
-            days_month = monthrange(current_year, current_month)[1]
-            annual_share = days_month / days_annual
+    # Set RES feed-in and t0 storage levels and plant parameters
+    calc_data['p_Wind_CF'][1:] = Wind_profile.CF
+    calc_data['p_Wind_MW'][1:] = Wind_profile.CF * RES_Asset_Wind.Pnom_MW
+    calc_data['p_PV_CF'][1:] = PV_profile.CF
+    calc_data['p_PV_MW'][1:] = PV_profile.CF * RES_Asset_PV.Pnom_MW
+    calc_data['p_Total_RES_MW'][:] = calc_data['p_Wind_MW'] + calc_data['p_PV_MW']
+    calc_data['bess_SOC_MW'][0] = BESS.SOC_t0 * BESS.capacity_MWh
+    calc_data['ch2_SOC'][0] = H2Storage.SOC_t0 * H2Storage.capacity_tH2
+    calc_data['ch2_avg_ci_gCO2pMJ'][0] = H2Storage.ci_max_gCO2pMJ if calc_data['ch2_SOC'][0] > 0 else 0
+    calc_data['bess_discharge_eff'][0] = BESS.discharge_eff
+    calc_data['bess_charge_eff'][0] = BESS.charge_eff
+    calc_data['bess_capacity_MWh'][0] = BESS.capacity_MWh
+    calc_data['el_specific_el_MWhptH2'][0] = Electrolysis.specific_el_MWhptH2
 
-            # Adjust plant properties according to monthly degradation impact
-            BESS.capacity_MWh = BESS.capacity_MWh - bess_capacity_t0 * BESS.degradation_capacity * annual_share
-            BESS.charge_eff = BESS.charge_eff - BESS.degradation_eff * annual_share
-            BESS.discharge_eff = BESS.discharge_eff - BESS.degradation_eff * annual_share
-            # BESS.charge_eff = BESS.charge_eff - bess_char_eff_t0 * BESS.degradation_eff * annual_share
-            # BESS.discharge_eff = BESS.discharge_eff - bess_dischar_eff_t0 * BESS.degradation_eff * annual_share
-            Electrolysis.specific_el_MWhptH2 = Electrolysis.specific_el_MWhptH2 + el_specific_el_t0 * Electrolysis.degradation_specific_el * annual_share
+    return calc_data
 
-            # Adjust BESS SOC to new max capacity if necessary
-            bess_el_loss_MWh[i - 1] += max(0, bess_SOC_MWh[i - 1] - BESS.capacity_MWh)
-            bess_SOC_MWh[i - 1] = min(bess_SOC_MWh[i - 1], BESS.capacity_MWh)
 
+def operating_envelope(plant_config, calendar=None):
+    """Returns the operating envelope of the plant as a DataFrame with one row per month of the RES profile calendar
+    (calendar defaults to the calendar of the Wind profile): the degradation affected plant properties of the month and
+    the limits of the dispatch conditions derived from them (c01_..., c05_..., c08_...), which are constant within a
+    month. plant_calc() indexes this table at every month boundary instead of recomputing the limits every hour."""
 
-        prev_month = (current_month, current_year)
+    # Set up Modul Objects with plant parameters
+    RES_Asset_Wind, RES_Asset_PV, Grid, BESS, H2Storage, Compressor, Electrolysis, HaberBosch = init_plant(plant_config)
 
-        # Track degradation affected plant properties
-        bess_capacity_MWh[i] = BESS.capacity_MWh
-        bess_charge_eff[i] = BESS.charge_eff
-        bess_discharge_eff[i] = BESS.discharge_eff
-        el_specific_el_MWhptH2[i] = Electrolysis.specific_el_MWhptH2
+    # Economic & System variables/constants
+    ci_max_gCO2pMJ = plant_config['Economic_System']['ci_max_gCO2pMJ']['value']
+    ci_others_gCO2pMJ = plant_config['Economic_System']['ci_others_gCO2pMJ']['value']
+    ci_budget_gCO2pMJ = ci_max_gCO2pMJ - ci_others_gCO2pMJ
+    energy_density_NH3_MJpkgNH3 = plant_config['Economic_System']['energy_density_NH3_MJpkgNH3']['value']
+    energy_density_H2_MJpkgH2 = plant_config['Economic_System']['energy_density_H2_MJpkgH2']['value']
 
-        ####################################################################################################################
-        # Synthesis restart delay
-        ####################################################################################################################
+    if calendar is None:
+        calendar = res_data.load_res_profiles()[0].calendar()
 
-        # decrement restart delay tracker
-        syn_delay_counter = max(0, syn_delay_counter - 1)
+    bess_capacity_t0 = BESS.capacity_MWh
+    el_specific_el_t0 = Electrolysis.specific_el_MWhptH2
 
-        # Check if the Synthesis is currently under restart delay (syn_block = True). If so check whether Delay counter
-        # ran out. If so unblock Synthesis (syn_block = False)
-        if syn_block:
-            syn_block = True if syn_delay_counter > 0 else False
+    envelope = []
 
+    for annual_share in calendar.annual_share.tolist():
 
-        ####################################################################################################################
-        # Calc fix system variables
-        ####################################################################################################################
+        # Adjust plant properties according to monthly degradation impact
+        BESS.capacity_MWh = BESS.capacity_MWh - bess_capacity_t0 * BESS.degradation_capacity * annual_share
+        BESS.charge_eff = BESS.charge_eff - BESS.degradation_eff * annual_share
+        BESS.discharge_eff = BESS.discharge_eff - BESS.degradation_eff * annual_share
+        # BESS.charge_eff = BESS.charge_eff - bess_char_eff_t0 * BESS.degradation_eff * annual_share
+        # BESS.discharge_eff = BESS.discharge_eff - bess_dischar_eff_t0 * BESS.degradation_eff * annual_share
+        Electrolysis.specific_el_MWhptH2 = Electrolysis.specific_el_MWhptH2 + el_specific_el_t0 * Electrolysis.degradation_specific_el * annual_share
 
+        # Fix system variables
         bess_SOC_min_MWh = BESS.capacity_MWh * BESS.min_SOC
         ch2_SOC_min_tH2 = H2Storage.capacity_tH2 * H2Storage.min_SOC
 
@@ -265,6 +554,405 @@ def plant_calc(plant_config):
         # c08_max_grid_share: Gives either max grid share based on ci limits or max processing consumption ensuring 100 % RFNBO
         c08_max_grid_share = min(c08_max_grid_share_syn_limit, c08_max_grid_share_ci_limit)
 
+        envelope.append({
+            'bess_capacity_MWh': BESS.capacity_MWh,
+            'bess_charge_eff': BESS.charge_eff,
+            'bess_discharge_eff': BESS.discharge_eff,
+            'el_specific_el_MWhptH2': Electrolysis.specific_el_MWhptH2,
+            'bess_SOC_min_MWh': bess_SOC_min_MWh,
+            'ch2_SOC_min_tH2': ch2_SOC_min_tH2,
+            'c01_demand_system_nom': c01_demand_system_nom,
+            'c05_system_spec_el_MWhptH2': c05_system_spec_el_MWhptH2,
+            'c05_max_grid_share_ci_limit': c05_max_grid_share_ci_limit,
+            'c05_max_grid_share_comp_limit': c05_max_grid_share_comp_limit,
+            'c05_max_grid_share': c05_max_grid_share,
+            'c08_demand_system_min': c08_demand_system_min,
+            'c08_system_spec_el_MWhptNH3': c08_system_spec_el_MWhptNH3,
+            'c08_syn_p_total_share': c08_syn_p_total_share,
+            'c08_el_p_total_share': c08_el_p_total_share,
+            'c08_max_grid_share_ci_limit': c08_max_grid_share_ci_limit,
+            'c08_max_grid_share_syn_limit': c08_max_grid_share_syn_limit,
+            'c08_max_grid_share': c08_max_grid_share
+        })
+
+    return pd.DataFrame(envelope, index=pd.Index(calendar.DateTimes[calendar.month_start], name='month_start'))
+
+
+
+def track_shutdown(output, shutdown):
+    """Writes the shutdown durations of a plant component to shutdown (e.g. syn_shutdown), given its non-negative output
+    per time step (e.g. syn_NH3_out_tNH3): each shutdown is stored at the time step it started (see
+    functions.shutdown_events())."""
+    events = functions.shutdown_events(output)
+    shutdown[events['t0'].to_numpy()] = events['duration'].to_numpy()
+
+
+def dispatch_storage_free(calc_data, operation_mode, envelope, calendar, BESS, Electrolysis, HaberBosch, Grid,
+                          energy_density_NH3_MJpkgNH3):
+    """Calculates the dispatch of a plant without BESS and cH2-Storage (capacity 0) in closed form and writes it to
+    calc_data and operation_mode (codes). Without storage, the Conditions only depend on the RES of the hour, the
+    operating envelope of the month and the Synthesis restart delay, so the flows of each branch are evaluated as array
+    expressions (in the same order of operations as the hourly loop, giving identical results) and only the restart
+    delay is resolved hour by hour. Returns False, leaving calc_data untouched, if the plant does not meet the
+    assumptions of the closed form, in which case the hourly loop has to be used."""
+
+    # Operating envelope of each time step i >= 1 (hour i - 1 of the calendar)
+    month = calendar.month_id
+    env = {column: envelope[column].to_numpy()[month] for column in envelope.columns}
+
+    # Empty storages throughout (SOC = SOC_min = 0) and valid operating limits
+    if not (
+            BESS.Pnom_MW >= 0 and
+            Electrolysis.min_Load >= 0 and
+            calc_data['bess_SOC_MW'][0] == 0 and
+            calc_data['ch2_SOC'][0] == 0 and
+            (env['bess_capacity_MWh'] == 0).all() and
+            (env['bess_SOC_min_MWh'] == 0).all() and
+            (env['ch2_SOC_min_tH2'] == 0).all() and
+            (env['bess_charge_eff'] > 0).all() and
+            (env['bess_discharge_eff'] > 0).all() and
+            (env['c08_max_grid_share'] < 1).all()
+    ):
+        return False
+
+    p_Total_RES_MW = calc_data['p_Total_RES_MW'][1:]
+    c01_demand_system_nom = env['c01_demand_system_nom']
+    c08_demand_system_min = env['c08_demand_system_min']
+    Electrolysis_specific_el_MWhptH2 = env['el_specific_el_MWhptH2']
+
+    # Condition 1 and Condition 8 without restart delay
+    p_pot_Total_RES_grid_MW = p_Total_RES_MW / (1 - env['c08_max_grid_share'])
+    con_1 = p_Total_RES_MW > c01_demand_system_nom
+    con_8 = p_pot_Total_RES_grid_MW > c08_demand_system_min
+
+    # Synthesis restart delay: every hour without Condition 1 or 8 that is not blocked (Condition 11 = FALSE without
+    # storage) blocks the Synthesis for the following ceil(restart_delay_h) - 1 hours
+    syn_block = np.zeros(len(p_Total_RES_MW), dtype=bool)
+    block_h = max(math.ceil(HaberBosch.restart_delay_h) - 1, 0)
+    unblocked_i = 0
+
+    for i in np.flatnonzero(~con_1 & ~con_8).tolist():
+        if i >= unblocked_i:
+            syn_block[i + 1:i + 1 + block_h] = True
+            unblocked_i = i + 1 + block_h
+
+    con_1 &= ~syn_block
+    con_8 &= ~con_1 & ~syn_block
+    con_13 = ~con_1 & ~con_8 & (p_Total_RES_MW > c08_demand_system_min * env['c08_syn_p_total_share'])
+    con_16 = ~con_1 & ~con_8 & ~con_13
+
+    # Condition 1 = TRUE: Syn at nominal load with direct H2-Feed from Ely, remaining RES is surplus (Conditions 2, 4, 7
+    # FALSE)
+    syn_el_nom_MWh = HaberBosch.capacity_tNH3ph * HaberBosch.specific_el_MWhptNH3
+    syn_H2_nom_tH2 = HaberBosch.capacity_tNH3ph * HaberBosch.specific_H2_tH2ptNH3
+    el_el_nom_MW = syn_H2_nom_tH2 * Electrolysis_specific_el_MWhptH2
+    RES_remain_nom = p_Total_RES_MW - syn_el_nom_MWh - el_el_nom_MW
+
+    # Condition 8 = TRUE: RES + max Grid potential sets the operating point of ELY and HB-Syn (Conditions 9, 10 FALSE)
+    p_Total_RES_grid_MW = np.minimum(c01_demand_system_nom, p_pot_Total_RES_grid_MW)
+    el_el_op_MW = p_Total_RES_grid_MW * env['c08_el_p_total_share']
+    syn_el_op_MWh = p_Total_RES_grid_MW * env['c08_syn_p_total_share']
+    syn_NH3_op_tNH3 = syn_el_op_MWh / HaberBosch.specific_el_MWhptNH3
+    p_Grid_op_MW = el_el_op_MW + syn_el_op_MWh - p_Total_RES_MW
+    ch2_comp_el_in_grid_op_MWh = np.minimum(p_Grid_op_MW, 0.0)
+    syn_el_in_grid_op_MWh = p_Grid_op_MW - ch2_comp_el_in_grid_op_MWh
+
+    # Negative remaining RES at nominal load would be charged to the BESS, Synthesis output has to be positive
+    if (RES_remain_nom[con_1] < 0).any() or not (syn_NH3_op_tNH3[con_8] > 0).all() or (el_el_op_MW[con_8] < 0).any():
+        return False
+
+    # Condition 11 = FALSE / Syn_block: Syn-Standby demand supplied by RES (Condition 13) or RES and grid (Condition 16)
+    syn_el_standby_MWh = c08_demand_system_min * env['c08_syn_p_total_share']
+
+    # Write flows
+    el_el_in_MW = np.select([con_1, con_8], [el_el_nom_MW, el_el_op_MW], 0.0)
+    syn_el_in_MWh = np.select([con_1, con_8], [syn_el_nom_MWh, syn_el_op_MWh], syn_el_standby_MWh)
+    el_H2_out_tH2 = np.select([con_1, con_8], [syn_H2_nom_tH2, el_el_op_MW / Electrolysis_specific_el_MWhptH2], 0.0)
+    p_Grid_MW = np.select([con_8, con_16], [p_Grid_op_MW, syn_el_standby_MWh - p_Total_RES_MW], 0.0)
+
+    calc_data['el_el_in_MW'][1:] = el_el_in_MW
+    calc_data['el_H2_out_tH2'][1:] = el_H2_out_tH2
+    calc_data['syn_el_in_MWh'][1:] = syn_el_in_MWh
+    calc_data['syn_H2_in_tH2'][1:] = el_H2_out_tH2
+    calc_data['syn_NH3_out_tNH3'][1:] = np.select([con_1, con_8], [HaberBosch.capacity_tNH3ph, syn_NH3_op_tNH3], 0.0)
+    calc_data['p_Grid_MW'][1:] = p_Grid_MW
+    calc_data['p_Surplus_RES_MW'][1:] = np.select([con_1, con_13], [RES_remain_nom, p_Total_RES_MW - syn_el_standby_MWh],
+                                                  0.0)
+    calc_data['p_Total_consump_MW'][1:] = el_el_in_MW + syn_el_in_MWh
+    calc_data['ch2_comp_el_in_grid_MWh'][1:] = np.where(con_8, ch2_comp_el_in_grid_op_MWh, 0.0)
+    calc_data['syn_el_in_grid_MWh'][1:] = np.select([con_8, con_16], [syn_el_in_grid_op_MWh, p_Grid_MW], 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        calc_data['syn_NH3_out_ci_gCO2pMJ'][1:] = np.where(
+            con_8,
+            (syn_el_in_grid_op_MWh * 1000 * Grid.ci_gCO2pkWh) / (syn_NH3_op_tNH3 * 1000 * energy_density_NH3_MJpkgNH3),
+            0.0
+        )
+
+    # Track degradation affected plant properties
+    calc_data['bess_capacity_MWh'][1:] = env['bess_capacity_MWh']
+    calc_data['bess_charge_eff'][1:] = env['bess_charge_eff']
+    calc_data['bess_discharge_eff'][1:] = env['bess_discharge_eff']
+    calc_data['el_specific_el_MWhptH2'][1:] = Electrolysis_specific_el_MWhptH2
+
+    # Operation mode codes
+    con_11_F = op_mode_bits(1, False) | op_mode_bits(8, False) | op_mode_bits(11, False)
+    operation_mode[1:] = np.select(
+        [con_1, con_8],
+        [
+            op_mode_bits(1, True) | op_mode_bits(2, False) | op_mode_bits(4, False) | op_mode_bits(7, False),
+            op_mode_bits(1, False) | op_mode_bits(8, True) | op_mode_bits(9, False) | op_mode_bits(10, False)
+        ],
+        np.where(syn_block, op_mode_syn_block, con_11_F) | np.where(
+            con_13,
+            op_mode_bits(13, True) | op_mode_bits(14, False) | op_mode_bits(15, False),
+            op_mode_bits(13, False) | op_mode_bits(16, False)
+        )
+    )
+
+    # ELY & Syn Shutdown behavior
+    track_shutdown(calc_data['syn_NH3_out_tNH3'], calc_data['syn_shutdown'])
+    track_shutdown(calc_data['el_H2_out_tH2'], calc_data['el_shutdown'])
+
+    return True
+
+def plant_calc(plant_config, engine='python', checkpoints=None, resume=None, df_resume=None, columns='full',
+               aggregates=False, cache=None, ledger='exact'):
+    """Returns df_out of the plant defined by plant_config. engine selects the dispatch engine: 'python' (reference),
+    'jit' (Numba-compiled kernel, see plant_calc_jit) or 'auto' ('jit' if numba is installed and neither checkpoints
+    nor resume are given and ledger is 'exact', 'python' otherwise). ledger selects the ledger of the cH2-Storage
+    batches (see ch2_ledgers): 'exact' (reference, cost per hour grows with the number of stored batches) or
+    'running' (constant cost per hour, python engine, not bit-identical: KPIs may differ slightly, see
+    H2Storage_Ledger_Running). columns selects the df_out columns, either an output profile
+    ('full', 'kpi', 'minimal', see output_profiles) or a list of column names. With aggregates=True the PlantAggregates
+    of these columns (monthly aggregates of the complete calculation) are returned instead of df_out.
+    Checkpoints (python engine): if checkpoints is a list, the plant state at each month boundary is appended to it
+    (see plant_state()). Passing one of these states as resume continues the calculation from its time step on. The
+    rows before it are taken from df_resume (e.g. the df_out of the run the state was taken from, columns it lacks are
+    left empty), or left empty.
+    With cache=True (default: result_cache.enabled, see result_cache.enable()) the result is taken from / stored to
+    the result cache, unless checkpoints or resume are given. With the ledger 'exact' the KPIs of all engines agree
+    within plant_calc_jit.tolerance_KPI, a cached result may stem from any of them."""
+    if cache is None:
+        cache = result_cache.enabled
+
+    if cache and checkpoints is None and resume is None:
+        key = result_cache.plant_calc_key(plant_config, select_columns(columns), aggregates, ledger)
+        result = result_cache.get(key)
+        if result is None:
+            result = plant_calc(plant_config, engine=engine, columns=columns, aggregates=aggregates, cache=False,
+                                ledger=ledger)
+            result_cache.put(key, result)
+        return result
+
+    if ledger not in ch2_ledgers:
+        raise ValueError(f"Invalid ledger {ledger!r} - choose from {list(ch2_ledgers)}")
+
+    if engine == 'auto':
+        engine = 'jit' if (importlib.util.find_spec('numba') and checkpoints is None and resume is None
+                           and ledger == 'exact') else 'python'
+
+    if (checkpoints is not None or resume is not None) and engine != 'python':
+        raise ValueError(f"Checkpoints and resume are only supported by the engine 'python', not {engine!r}")
+
+    if ledger != 'exact' and engine != 'python':
+        raise ValueError(f"The ledger {ledger!r} is only supported by the engine 'python', not {engine!r}")
+
+    columns = select_columns(columns)
+
+    if engine == 'jit':
+        import plant_calc_jit
+        return plant_calc_jit.plant_calc_jit(plant_config, columns=columns, aggregates=aggregates)
+    elif engine != 'python':
+        raise ValueError(f"Invalid engine {engine!r} - plant_calc() supports the engines 'python' and 'jit'")
+
+    # Set up Modul Objects with plant parameters
+    RES_Asset_Wind, RES_Asset_PV, Grid, BESS, H2Storage, Compressor, Electrolysis, HaberBosch = init_plant(plant_config)
+
+    # Economic & System variables/constants (ci limits are part of the operating envelope)
+    energy_density_NH3_MJpkgNH3 = plant_config['Economic_System']['energy_density_NH3_MJpkgNH3']['value']
+    energy_density_H2_MJpkgH2 = plant_config['Economic_System']['energy_density_H2_MJpkgH2']['value']
+
+    # Load RES capacity factor profiles (parsed from .csv once, served from the binary cache in RES_Data thereafter).
+    # The profile arrays are shared (optionally memory-mapped, see res_data.init_worker) and are not copied here
+    Wind_profile, PV_profile = res_data.load_res_profiles()
+
+    # Create process state (SOC) and flow (el_in, el_out, etc) variables used for later iterative time series calculation.
+    # Each variable is a column of calc_data, a preallocated NumPy array. The iterative calculation writes to the columns
+    # through memoryviews (fast element access to plain floats) and df_out is set up from the same arrays without copying
+    timesteps = len(PV_profile.CF) + 1
+    calc_data = init_calc_data(timesteps, Wind_profile, PV_profile, RES_Asset_Wind, RES_Asset_PV, BESS, H2Storage,
+                               Electrolysis)
+
+    DateTimes = [datetime.fromtimestamp(0).strftime('%Y-%m-%d %H:%M')] + Wind_profile.DateTimes_str()
+
+    # Operating envelope: degradation affected plant properties and operating limits per month.
+    # Time step i corresponds to hour i - 1 of the RES profile calendar
+    calendar = Wind_profile.calendar()
+    envelope = operating_envelope(plant_config, calendar=calendar)
+
+    # Plants without BESS and cH2-Storage are calculated in closed form (see dispatch_storage_free())
+    if BESS.capacity_MWh == 0 and H2Storage.capacity_tH2 == 0 and checkpoints is None and resume is None:
+        operation_mode = np.zeros(timesteps, dtype=np.int64)
+        if dispatch_storage_free(calc_data, operation_mode, envelope, calendar, BESS, Electrolysis, HaberBosch, Grid,
+                                 energy_density_NH3_MJpkgNH3):
+            if aggregates:
+                return output_aggregates(calc_data, calendar, columns)
+            return output_frame(calc_data, operation_mode, DateTimes, columns)
+
+    p_Total_RES_MW = memoryview(calc_data['p_Total_RES_MW'])
+    p_Grid_MW = memoryview(calc_data['p_Grid_MW'])
+    p_Surplus_RES_MW = memoryview(calc_data['p_Surplus_RES_MW'])
+    p_Total_consump_MW = memoryview(calc_data['p_Total_consump_MW'])
+    el_el_in_MW = memoryview(calc_data['el_el_in_MW'])
+    el_H2_out_tH2 = memoryview(calc_data['el_H2_out_tH2'])
+    bess_el_in_MWh = memoryview(calc_data['bess_el_in_MWh'])
+    bess_el_charge_MWh = memoryview(calc_data['bess_el_charge_MWh'])
+    bess_SOC_MWh = memoryview(calc_data['bess_SOC_MW'])
+    bess_el_discharge_MWh = memoryview(calc_data['bess_el_discharge_MWh'])
+    bess_el_out_MWh = memoryview(calc_data['bess_el_out_MWh'])
+    bess_el_loss_MWh = memoryview(calc_data['bess_el_loss_MWh'])
+    ch2_comp_el_in_MWh = memoryview(calc_data['ch2_comp_el_in_MWh'])
+    ch2_comp_el_in_grid_MWh = memoryview(calc_data['ch2_comp_el_in_grid_MWh'])
+    ch2_in_tH2 = memoryview(calc_data['ch2_in_tH2'])
+    ch2_in_ci_gCO2pMJ = memoryview(calc_data['ch2_in_ci_gCO2pMJ'])
+    ch2_SOC = memoryview(calc_data['ch2_SOC'])
+    ch2_avg_ci_gCO2pMJ = memoryview(calc_data['ch2_avg_ci_gCO2pMJ'])
+    ch2_ledger = ch2_ledgers[ledger](SOC_t0_tH2=ch2_SOC[0], ci_t0_gCO2pMJ=ch2_avg_ci_gCO2pMJ[0])
+    ch2_out_tH2 = memoryview(calc_data['ch2_out_tH2'])
+    ch2_vent_tH2 = memoryview(calc_data['ch2_vent_tH2'])
+    ch2_out_ci_gCO2pMJ = memoryview(calc_data['ch2_out_ci_gCO2pMJ'])
+    syn_el_in_MWh = memoryview(calc_data['syn_el_in_MWh'])
+    syn_el_in_grid_MWh = memoryview(calc_data['syn_el_in_grid_MWh'])
+    syn_H2_in_tH2 = memoryview(calc_data['syn_H2_in_tH2'])
+    syn_NH3_out_tNH3 = memoryview(calc_data['syn_NH3_out_tNH3'])
+    syn_NH3_out_ci_gCO2pMJ = memoryview(calc_data['syn_NH3_out_ci_gCO2pMJ'])
+    operation_mode = memoryview(np.zeros(timesteps, dtype=np.int64))
+    bess_discharge_eff = memoryview(calc_data['bess_discharge_eff'])
+    bess_charge_eff = memoryview(calc_data['bess_charge_eff'])
+    bess_capacity_MWh = memoryview(calc_data['bess_capacity_MWh'])
+    el_specific_el_MWhptH2 = memoryview(calc_data['el_specific_el_MWhptH2'])
+
+    # Operating envelope: month_envelope[i] gives the envelope of the month starting at time step i (None if no month
+    # starts at i)
+    month_envelope = [None] * timesteps
+    for start, month in zip(calendar.month_start.tolist(), envelope.to_dict('records')):
+        month_envelope[start + 1] = month
+
+    # Syn restart delay tracker variable initiation
+    syn_block = False
+    syn_delay_counter = 0
+
+    # Resume from a checkpoint: take over the rows before its time step and restore the plant state
+    i_start = 1
+
+    if resume is not None:
+        i_start = resume['i']
+        if not 0 < i_start < timesteps or month_envelope[i_start] is None:
+            raise ValueError(f"Invalid checkpoint - time step {i_start} is not a month boundary of the RES profiles")
+
+        if df_resume is not None:
+            if len(df_resume) < i_start:
+                raise ValueError(f"df_resume has {len(df_resume)} rows - the rows before the checkpoint time step "
+                                 f"{i_start} are required")
+
+            # Only the columns of df_resume are taken over (e.g. of a 'kpi' or 'minimal' df_out), others stay empty
+            for column in calc_data:
+                if column in df_resume.columns:
+                    calc_data[column][:i_start] = df_resume[column].to_numpy()[:i_start]
+            if 'operation_mode' in df_resume.columns:
+                modes = df_resume['operation_mode'][:i_start]
+                operation_mode.obj[:i_start] = modes.to_numpy(dtype=np.int64) if \
+                    pd.api.types.is_integer_dtype(modes) else [operation_mode_code(mode) for mode in modes]
+
+        bess_SOC_MWh[i_start - 1] = resume['bess_SOC_MWh']
+        bess_el_loss_MWh[i_start - 1] = resume['bess_el_loss_MWh']
+        ch2_SOC[i_start - 1] = resume['ch2_SOC']
+        ch2_avg_ci_gCO2pMJ[i_start - 1] = resume['ch2_avg_ci_gCO2pMJ']
+        syn_NH3_out_tNH3[i_start - 1] = resume['syn_NH3_out_tNH3']
+        el_H2_out_tH2[i_start - 1] = resume['el_H2_out_tH2']
+        bess_capacity_MWh[i_start - 1] = resume['bess_capacity_MWh']
+        bess_charge_eff[i_start - 1] = resume['bess_charge_eff']
+        bess_discharge_eff[i_start - 1] = resume['bess_discharge_eff']
+        el_specific_el_MWhptH2[i_start - 1] = resume['el_specific_el_MWhptH2']
+        ch2_ledger.restore(resume['ch2_ledger'])
+        syn_block = resume['syn_block']
+        syn_delay_counter = resume['syn_delay_counter']
+
+
+    ####################################################################################################################
+    # Iterative plant calculation
+    ####################################################################################################################
+
+    for i in range(i_start, timesteps):
+
+        ####################################################################################################################
+        # Adjust plant performance according to degradation (BESS capacity, Ely specific el consumption, etc)
+        ####################################################################################################################
+
+        # Check whether the first of a new month has been reached to adjust the plant properties and the operating
+        # limits to the degradation of the following month (see operating_envelope())
+        month = month_envelope[i]
+
+        if month is not None:
+
+            if checkpoints is not None:
+                checkpoints.append(plant_state(
+                    i=i,
+                    bess_SOC_MWh=bess_SOC_MWh[i - 1],
+                    bess_el_loss_MWh=bess_el_loss_MWh[i - 1],
+                    ch2_SOC=ch2_SOC[i - 1],
+                    ch2_avg_ci_gCO2pMJ=ch2_avg_ci_gCO2pMJ[i - 1],
+                    syn_NH3_out_tNH3=syn_NH3_out_tNH3[i - 1],
+                    el_H2_out_tH2=el_H2_out_tH2[i - 1],
+                    bess_capacity_MWh=bess_capacity_MWh[i - 1],
+                    bess_charge_eff=bess_charge_eff[i - 1],
+                    bess_discharge_eff=bess_discharge_eff[i - 1],
+                    el_specific_el_MWhptH2=el_specific_el_MWhptH2[i - 1],
+                    ch2_ledger=ch2_ledger.snapshot(),
+                    syn_block=syn_block,
+                    syn_delay_counter=syn_delay_counter
+                ))
+
+            # Adjust plant properties according to monthly degradation impact
+            BESS.capacity_MWh = month['bess_capacity_MWh']
+            BESS.charge_eff = month['bess_charge_eff']
+            BESS.discharge_eff = month['bess_discharge_eff']
+            Electrolysis.specific_el_MWhptH2 = month['el_specific_el_MWhptH2']
+
+            # Adjust BESS SOC to new max capacity if necessary
+            bess_el_loss_MWh[i - 1] += max(0, bess_SOC_MWh[i - 1] - BESS.capacity_MWh)
+            bess_SOC_MWh[i - 1] = min(bess_SOC_MWh[i - 1], BESS.capacity_MWh)
+
+            # Fix system variables of the month
+            bess_SOC_min_MWh = month['bess_SOC_min_MWh']
+            ch2_SOC_min_tH2 = month['ch2_SOC_min_tH2']
+            c01_demand_system_nom = month['c01_demand_system_nom']
+            c05_system_spec_el_MWhptH2 = month['c05_system_spec_el_MWhptH2']
+            c05_max_grid_share = month['c05_max_grid_share']
+            c08_demand_system_min = month['c08_demand_system_min']
+            c08_system_spec_el_MWhptNH3 = month['c08_system_spec_el_MWhptNH3']
+            c08_syn_p_total_share = month['c08_syn_p_total_share']
+            c08_el_p_total_share = month['c08_el_p_total_share']
+            c08_max_grid_share = month['c08_max_grid_share']
+
+        # Track degradation affected plant properties
+        bess_capacity_MWh[i] = BESS.capacity_MWh
+        bess_charge_eff[i] = BESS.charge_eff
+        bess_discharge_eff[i] = BESS.discharge_eff
+        el_specific_el_MWhptH2[i] = Electrolysis.specific_el_MWhptH2
+
+        ####################################################################################################################
+        # Synthesis restart delay
+        ####################################################################################################################
+
+        # decrement restart delay tracker
+        syn_delay_counter = max(0, syn_delay_counter - 1)
+
+        # Check if the Synthesis is currently under restart delay (syn_block = True). If so check whether Delay counter
+        # ran out. If so unblock Synthesis (syn_block = False)
+        if syn_block:
+            syn_block = True if syn_delay_counter > 0 else False
+
 
         ####################################################################################################################
         # Condition 1:
@@ -272,7 +960,7 @@ def plant_calc(plant_config):
         ####################################################################################################################
         if p_Total_RES_MW[i] > c01_demand_system_nom and not syn_block:
 
-            operation_mode[i] = "con_1_T"
+            operation_mode[i] = op_mode_bits(1, True)
 
             ####################################################################################################################
             # Condition 2:
@@ -280,7 +968,7 @@ def plant_calc(plant_config):
             ####################################################################################################################
             if ch2_SOC[i - 1] < ch2_SOC_min_tH2 or bess_SOC_MWh[i - 1] < bess_SOC_min_MWh:
 
-                operation_mode[i] = operation_mode[i] + '_con_2_T'
+                operation_mode[i] |= op_mode_bits(2, True)
 
                 # p_Total_RES_surplus_MW gives the surplus RES potential that is available when running the plant at min load
                 p_Total_RES_surplus_MW = p_Total_RES_MW[i] - c08_demand_system_min
@@ -333,10 +1021,9 @@ def plant_calc(plant_config):
                     bess_SOC_MWh[i] = bess_SOC_MWh[i - 1] + bess_el_charge_MWh[i]
 
                 if ch2_in_tH2[i] != 0:
-                    ch2_batches_TS_tH2_ci.append([i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i]])
-                    ch2_SOC[i] = sum(batch[1] for batch in ch2_batches_TS_tH2_ci)
-                    ch2_avg_ci_gCO2pMJ[i] = sum(batch[1] * batch[2] for batch in ch2_batches_TS_tH2_ci) / ch2_SOC[i] if \
-                    ch2_SOC[i] > 0 else 0
+                    ch2_ledger.add(i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i])
+                    ch2_SOC[i] = ch2_ledger.SOC_tH2
+                    ch2_avg_ci_gCO2pMJ[i] = ch2_ledger.avg_ci_gCO2pMJ()
 
                 p_Total_consump_MW[i] = el_el_in_MW[i] + bess_el_in_MWh[i] + ch2_comp_el_in_MWh[i] + syn_el_in_MWh[i]
 
@@ -364,13 +1051,12 @@ def plant_calc(plant_config):
                     )
 
                     if ch2_in_tH2[i] != 0:
-                        ch2_batches_TS_tH2_ci[-1][1] += ch2_in_extra_tH2
+                        ch2_ledger.extend(ch2_in_extra_tH2)
                     else:
-                        ch2_batches_TS_tH2_ci.append([i, ch2_in_extra_tH2, ch2_in_ci_gCO2pMJ[i]])
+                        ch2_ledger.add(i, ch2_in_extra_tH2, ch2_in_ci_gCO2pMJ[i])
 
-                    ch2_SOC[i] = sum(batch[1] for batch in ch2_batches_TS_tH2_ci)
-                    ch2_avg_ci_gCO2pMJ[i] = sum(batch[1] * batch[2] for batch in ch2_batches_TS_tH2_ci) / ch2_SOC[i] if \
-                    ch2_SOC[i] > 0 else 0
+                    ch2_SOC[i] = ch2_ledger.SOC_tH2
+                    ch2_avg_ci_gCO2pMJ[i] = ch2_ledger.avg_ci_gCO2pMJ()
 
                     ch2_in_tH2[i] += ch2_in_extra_tH2
                     ch2_comp_el_in_MWh[i] = ch2_in_tH2[i] * Compressor.specific_el_MWhptH2
@@ -404,7 +1090,7 @@ def plant_calc(plant_config):
 
             else:
 
-                operation_mode[i] = operation_mode[i] + '_con_2_F'
+                operation_mode[i] |= op_mode_bits(2, False)
 
                 # Operate Syn at nominal load with direct H2-Feed from Ely and determine remaining RES
                 syn_el_in_MWh[i] = HaberBosch.capacity_tNH3ph * HaberBosch.specific_el_MWhptNH3
@@ -422,7 +1108,7 @@ def plant_calc(plant_config):
                 ####################################################################################################################
                 if ch2_SOC[i - 1] < H2Storage.capacity_tH2:
 
-                    operation_mode[i] = operation_mode[i] + '_con_4_T'
+                    operation_mode[i] |= op_mode_bits(4, True)
 
                     ####################################################################################################################
                     # Condition 5:
@@ -444,7 +1130,7 @@ def plant_calc(plant_config):
                         # and max charge BESS?
                         ####################################################################################################################
 
-                        operation_mode[i] = operation_mode[i] + '_con_5_T'
+                        operation_mode[i] |= op_mode_bits(5, True)
 
                         # Determine increased ELY consumption corresponding to H2 produced to storage
                         el_el_in_stored_H2_MW = min(
@@ -501,10 +1187,9 @@ def plant_calc(plant_config):
                                     ch2_in_tH2[i] * 1000 * energy_density_H2_MJpkgH2), 10)
 
                         # Update cH2-Storage Batch-Overview and adjust cH2-SOC accordingly
-                        ch2_batches_TS_tH2_ci.append([i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i]])
-                        ch2_SOC[i] = sum(batch[1] for batch in ch2_batches_TS_tH2_ci)
-                        ch2_avg_ci_gCO2pMJ[i] = sum(batch[1] * batch[2] for batch in ch2_batches_TS_tH2_ci) / ch2_SOC[
-                            i] if ch2_SOC[i] > 0 else 0
+                        ch2_ledger.add(i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i])
+                        ch2_SOC[i] = ch2_ledger.SOC_tH2
+                        ch2_avg_ci_gCO2pMJ[i] = ch2_ledger.avg_ci_gCO2pMJ()
 
                         # Set storage levels
                         bess_SOC_MWh[i] = round(
@@ -518,7 +1203,7 @@ def plant_calc(plant_config):
 
                     else:
 
-                        operation_mode[i] = operation_mode[i] + '_con_5_F'
+                        operation_mode[i] |= op_mode_bits(5, False)
 
                         # Determine increased ELY consumption corresponding to H2 produced to storage
                         el_el_in_stored_H2_MW = RES_remain * (
@@ -550,10 +1235,9 @@ def plant_calc(plant_config):
                         ch2_comp_el_in_grid_MWh[i] = p_Grid_MW[i]
 
                         # Update cH2-Storage Batch-Overview and adjust cH2-SOC accordingly
-                        ch2_batches_TS_tH2_ci.append([i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i]])
-                        ch2_SOC[i] = sum(batch[1] for batch in ch2_batches_TS_tH2_ci)
-                        ch2_avg_ci_gCO2pMJ[i] = sum(batch[1] * batch[2] for batch in ch2_batches_TS_tH2_ci) / ch2_SOC[
-                            i] if ch2_SOC[i] > 0 else 0
+                        ch2_ledger.add(i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i])
+                        ch2_SOC[i] = ch2_ledger.SOC_tH2
+                        ch2_avg_ci_gCO2pMJ[i] = ch2_ledger.avg_ci_gCO2pMJ()
 
                         # Set storage levels
                         bess_SOC_MWh[i] = round(
@@ -567,7 +1251,7 @@ def plant_calc(plant_config):
 
                 else:
 
-                    operation_mode[i] = operation_mode[i] + '_con_4_F'
+                    operation_mode[i] |= op_mode_bits(4, False)
 
                     # Determine max charge to BESS from remaining RES considering potential charging-power
                     # limitations due to initial charging to required minimum SOC
@@ -603,18 +1287,11 @@ def plant_calc(plant_config):
                     # and refilled with lower Ci-H2
                     # trigger keeps track whether a batch with higher Ci-H2 has been identified. If not there is no
                     # H2 to be vented and replaced
-                    batch_tH2_total = 0
-                    batch_TS = 0
-                    trigger = False
-
-                    for batch in ch2_batches_TS_tH2_ci:
-                        if batch[2] > 0 and batch_tH2_total < cH2_in_potential_tH2:
-                            batch_TS = batch[0]
-                            trigger = True
-                        batch_tH2_total += batch[1]
-
-                    # Determine the total sum of H2 in the batches that will be fully or partially vented and replaced
-                    batch_tH2_total = sum(batch[1] for batch in ch2_batches_TS_tH2_ci if batch[0] <= batch_TS)
+                    # batch_tH2_total gives the total sum of H2 in the batches that would be fully or partially vented and replaced
+                    # The ledger is only searched if there is unused RES power and unused ELY capacity (Condition 7)
+                    batch_TS, batch_tH2_total, trigger = 0, 0, False
+                    if RES_remain > 0 and Electrolysis.capacity_MW - el_el_in_MW[i] > 0:
+                        batch_TS, batch_tH2_total, trigger = ch2_ledger.vent_search(cH2_in_potential_tH2)
 
                     ####################################################################################################################
                     # Condition 7:
@@ -624,7 +1301,7 @@ def plant_calc(plant_config):
 
                     if RES_remain > 0 and Electrolysis.capacity_MW - el_el_in_MW[i] > 0 and trigger:
 
-                        operation_mode[i] = operation_mode[i] + '_con_7_T'
+                        operation_mode[i] |= op_mode_bits(7, True)
 
                         # Check whether the last affected batch (batch_TS) will be fully or partially vented
                         if batch_tH2_total > cH2_in_potential_tH2:
@@ -636,10 +1313,7 @@ def plant_calc(plant_config):
                             ch2_vent_tH2[i] = cH2_in_potential_tH2
 
                             # Vent of H2 to the same amount as will be stored (pop batches and adjust last batch's volume)
-                            ch2_batches_TS_tH2_ci = [batch for batch in ch2_batches_TS_tH2_ci if batch[0] >= batch_TS]
-
-                            ch2_batches_TS_tH2_ci[0][1] -= ch2_batches_TS_tH2_ci[0][1] - (
-                                        batch_tH2_total - cH2_in_potential_tH2)
+                            ch2_ledger.vent(batch_TS, remain_tH2=batch_tH2_total - cH2_in_potential_tH2)
 
                         else:
 
@@ -649,7 +1323,7 @@ def plant_calc(plant_config):
                             ch2_vent_tH2[i] = batch_tH2_total
 
                             # Vent of H2 to the same amount as will be stored (pop batches and adjust last batch's volume)
-                            ch2_batches_TS_tH2_ci = [batch for batch in ch2_batches_TS_tH2_ci if batch[0] > batch_TS]
+                            ch2_ledger.vent(batch_TS)
 
                         # Determine additional energy input to the ELY necessary to produce stored H2
                         el_el_in_stored_H2_MW = ch2_in_tH2[i] * Electrolysis.specific_el_MWhptH2
@@ -659,16 +1333,15 @@ def plant_calc(plant_config):
                         el_H2_out_tH2[i] = el_el_in_MW[i] / Electrolysis.specific_el_MWhptH2
                         ch2_comp_el_in_MWh[i] = ch2_in_tH2[i] * Compressor.specific_el_MWhptH2
 
-                        ch2_batches_TS_tH2_ci.append([i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i]])
-                        ch2_SOC[i] = sum(batch[1] for batch in ch2_batches_TS_tH2_ci)
-                        ch2_avg_ci_gCO2pMJ[i] = sum(batch[1] * batch[2] for batch in ch2_batches_TS_tH2_ci) / ch2_SOC[
-                            i] if ch2_SOC[i] > 0 else 0
+                        ch2_ledger.add(i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i])
+                        ch2_SOC[i] = ch2_ledger.SOC_tH2
+                        ch2_avg_ci_gCO2pMJ[i] = ch2_ledger.avg_ci_gCO2pMJ()
 
                         p_Surplus_RES_MW[i] = RES_remain - el_el_in_stored_H2_MW - ch2_comp_el_in_MWh[i]
 
                     else:
 
-                        operation_mode[i] = operation_mode[i] + '_con_7_F'
+                        operation_mode[i] |= op_mode_bits(7, False)
 
                         # Set Surplus to unused remaining RES
                         p_Surplus_RES_MW[i] = RES_remain
@@ -687,7 +1360,7 @@ def plant_calc(plant_config):
 
         else:
 
-            operation_mode[i] = "con_1_F"
+            operation_mode[i] = op_mode_bits(1, False)
 
             ####################################################################################################################
             # Condition 8:
@@ -701,7 +1374,7 @@ def plant_calc(plant_config):
 
             if p_pot_Total_RES_grid_MW > c08_demand_system_min and not syn_block:
 
-                operation_mode[i] = operation_mode[i] + '_con_8_T'
+                operation_mode[i] |= op_mode_bits(8, True)
 
                 ####################################################################################################################
                 # Condition 9:
@@ -711,7 +1384,7 @@ def plant_calc(plant_config):
                 # operating load, until both storages are filled accordingly to SOC_min.
                 if ch2_SOC[i - 1] < ch2_SOC_min_tH2 or bess_SOC_MWh[i - 1] < bess_SOC_min_MWh:
 
-                    operation_mode[i] = operation_mode[i] + '_con_9_T'
+                    operation_mode[i] |= op_mode_bits(9, True)
 
                     # p_Total_RES_min_MW gives the minimum required RES that is necessary to operate the plant at minimum load from RES and max_Grid alone.
                     p_Total_RES_min_MW = c08_demand_system_min * (1 - c08_max_grid_share)
@@ -753,7 +1426,7 @@ def plant_calc(plant_config):
                     p_pot_Total_RES_grid_MW = (p_Total_RES_surplus_MW + p_Total_RES_min_MW) / (1 - c08_max_grid_share)
 
                 else:
-                    operation_mode[i] = operation_mode[i] + '_con_9_F'
+                    operation_mode[i] |= op_mode_bits(9, False)
 
                 ####################################################################################################################
                 # Condition 10:
@@ -775,11 +1448,11 @@ def plant_calc(plant_config):
                 # then use flex-use capacity to increase product output
                 if (
                         (ch2_flex_tH2 > 0 or bess_flex_MWh > 0) and
-                        operation_mode[i].endswith('F') and
+                        not op_mode_is_true(operation_mode[i], 9) and
                         p_pot_Total_RES_grid_MW < c01_demand_system_nom
                 ):
 
-                    operation_mode[i] = operation_mode[i] + '_con_10_T'
+                    operation_mode[i] |= op_mode_bits(10, True)
 
                     # p_Total_RES_flex_MW = p_Total_RES_MW[i] + ch2_flex_tH2 * Electrolysis.specific_el_MWhptH2 + min(BESS.Pnom_MW, bess_flex_MWh * BESS.discharge_eff)
 
@@ -810,10 +1483,9 @@ def plant_calc(plant_config):
                     if ch2_in_tH2[i] != 0:
                         ch2_in_ci_gCO2pMJ[i] = round(ch2_comp_el_in_grid_MWh[i] * 1000 * Grid.ci_gCO2pkWh / (
                                     ch2_in_tH2[i] * 1000 * energy_density_H2_MJpkgH2), 10)
-                        ch2_batches_TS_tH2_ci.append([i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i]])
-                        ch2_SOC[i] = sum(batch[1] for batch in ch2_batches_TS_tH2_ci)
-                        ch2_avg_ci_gCO2pMJ[i] = sum(batch[1] * batch[2] for batch in ch2_batches_TS_tH2_ci) / ch2_SOC[
-                            i] if ch2_SOC[i] > 0 else 0
+                        ch2_ledger.add(i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i])
+                        ch2_SOC[i] = ch2_ledger.SOC_tH2
+                        ch2_avg_ci_gCO2pMJ[i] = ch2_ledger.avg_ci_gCO2pMJ()
 
                     syn_NH3_out_ci_gCO2pMJ[i] = (syn_el_in_grid_MWh[i] * 1000 * Grid.ci_gCO2pkWh) / (
                                 syn_NH3_out_tNH3[i] * 1000 * energy_density_NH3_MJpkgNH3)
@@ -830,7 +1502,7 @@ def plant_calc(plant_config):
 
                 else:
 
-                    operation_mode[i] = operation_mode[i] + '_con_10_F'
+                    operation_mode[i] |= op_mode_bits(10, False)
 
                     # There are no flex use potential to be used. The available RES + max_Grid potential is used to set
                     # the operating point of ELY and HB-Syn
@@ -855,10 +1527,9 @@ def plant_calc(plant_config):
                     if ch2_in_tH2[i] != 0:
                         ch2_in_ci_gCO2pMJ[i] = round(ch2_comp_el_in_grid_MWh[i] * 1000 * Grid.ci_gCO2pkWh / (
                                     ch2_in_tH2[i] * 1000 * energy_density_H2_MJpkgH2), 10)
-                        ch2_batches_TS_tH2_ci.append([i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i]])
-                        ch2_SOC[i] = sum(batch[1] for batch in ch2_batches_TS_tH2_ci)
-                        ch2_avg_ci_gCO2pMJ[i] = sum(batch[1] * batch[2] for batch in ch2_batches_TS_tH2_ci) / ch2_SOC[
-                            i] if ch2_SOC[i] > 0 else 0
+                        ch2_ledger.add(i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i])
+                        ch2_SOC[i] = ch2_ledger.SOC_tH2
+                        ch2_avg_ci_gCO2pMJ[i] = ch2_ledger.avg_ci_gCO2pMJ()
 
                     syn_NH3_out_ci_gCO2pMJ[i] = (syn_el_in_grid_MWh[i] * 1000 * Grid.ci_gCO2pkWh) / (
                                 syn_NH3_out_tNH3[i] * 1000 * energy_density_NH3_MJpkgNH3)
@@ -875,7 +1546,7 @@ def plant_calc(plant_config):
 
             else:
 
-                operation_mode[i] = operation_mode[i] + '_con_8_F'
+                operation_mode[i] |= op_mode_bits(8, False)
 
                 ####################################################################################################################
                 # Condition 11:
@@ -1023,7 +1694,7 @@ def plant_calc(plant_config):
                 ####################################################################################################################
                 if con_11 and not syn_block:
 
-                    operation_mode[i] = operation_mode[i] + '_' + mode
+                    operation_mode[i] |= op_mode_bits(11, True) | (con_11_mode_ids[mode] << op_mode_con_11_shift)
 
                     syn_el_in_MWh[i] = syn_el_demand_MWh
                     syn_NH3_out_tNH3[i] = syn_el_in_MWh[i] / HaberBosch.specific_el_MWhptNH3
@@ -1110,49 +1781,26 @@ def plant_calc(plant_config):
                     # cH2-discharge
                     if ch2_out_tH2[i] != 0:
                         ch2_discharge = ch2_out_tH2[i]
-                        current_sum = 0
-                        batch_TS = 0
-                        discharge_batches = []
 
                         if ch2_discharge < 0:
                             raise ValueError(f"Error in Iteration {i} - Condition 11 - cH2-discharge is less 0")
 
                         elif 0 < ch2_discharge < ch2_SOC[i - 1]:
-                            for batch in ch2_batches_TS_tH2_ci:
-                                if current_sum + batch[1] > ch2_discharge:
-                                    # Calculate the portion to remove
-                                    removed_amount = ch2_discharge - current_sum
-                                    discharge_batches.append([batch[0], removed_amount, batch[2]])
-
-                                    # Adjust the remaining portion of the current batch
-                                    batch[1] -= removed_amount
-                                    batch_TS = batch[0]
-                                    break
-                                else:
-                                    # Fully remove the batch
-                                    current_sum += batch[1]
-                                    discharge_batches.append(batch)
-
-                            ch2_batches_TS_tH2_ci = [batch for batch in ch2_batches_TS_tH2_ci if batch[0] >= batch_TS]
-
-                            ch2_out_batches = discharge_batches
-                            ch2_out_ci_gCO2pMJ[i] = sum(
-                                batch[1] * batch[2] for batch in ch2_out_batches) / ch2_discharge
+                            # Withdraw batches first-in-first-out and determine the Ci of the discharged H2
+                            ch2_out_ci_gCO2pMJ[i] = ch2_ledger.withdraw(ch2_discharge)
 
                         elif ch2_discharge == ch2_SOC[i - 1]:
-                            ch2_batches_TS_tH2_ci = []
-                            ch2_out_batches = ch2_batches_TS_tH2_ci
-                            ch2_out_ci_gCO2pMJ[i] = sum(
-                                batch[1] * batch[2] for batch in ch2_out_batches) / ch2_discharge
+                            # Full discharge: the emptied batches are not attributed to the discharged H2 (Ci = 0)
+                            ch2_ledger.clear()
+                            ch2_out_ci_gCO2pMJ[i] = 0
 
                         else:
                             print(f"ch2_SOC[i - 1] - ch2_discharge = {ch2_SOC[i - 1] - ch2_discharge}")
                             raise ValueError(
                                 f"Error in Iteration {i} - Condition 11 - cH2-discharge is larger than cH2_SOC")
 
-                        ch2_SOC[i] = sum(batch[1] for batch in ch2_batches_TS_tH2_ci)
-                        ch2_avg_ci_gCO2pMJ[i] = sum(batch[1] * batch[2] for batch in ch2_batches_TS_tH2_ci) / ch2_SOC[
-                            i] if ch2_SOC[i] > 0 else 0
+                        ch2_SOC[i] = ch2_ledger.SOC_tH2
+                        ch2_avg_ci_gCO2pMJ[i] = ch2_ledger.avg_ci_gCO2pMJ()
 
                     # BESS-charge/discharge
                     if bess_el_out_MWh[i] != 0 or bess_el_in_MWh[i] != 0:
@@ -1196,9 +1844,9 @@ def plant_calc(plant_config):
                         syn_delay_counter = HaberBosch.restart_delay_h
                         syn_block = True
 
-                        operation_mode[i] = operation_mode[i] + '_con_11_F'
+                        operation_mode[i] |= op_mode_bits(11, False)
                     else:
-                        operation_mode[i] = 'Syn_block'
+                        operation_mode[i] = op_mode_syn_block
 
                     ####################################################################################################################
                     # Condition 13:
@@ -1206,7 +1854,7 @@ def plant_calc(plant_config):
                     ####################################################################################################################
                     if p_Total_RES_MW[i] > c08_demand_system_min * c08_syn_p_total_share:
 
-                        operation_mode[i] = operation_mode[i] + '_con_13_T'
+                        operation_mode[i] |= op_mode_bits(13, True)
 
                         syn_el_in_MWh[i] = c08_demand_system_min * c08_syn_p_total_share
 
@@ -1218,7 +1866,7 @@ def plant_calc(plant_config):
                         ####################################################################################################################
                         if bess_SOC_MWh[i - 1] < bess_SOC_min_MWh:
 
-                            operation_mode[i] = operation_mode[i] + '_con_14_T'
+                            operation_mode[i] |= op_mode_bits(14, True)
 
                             # bess_el_in_store_SOC_min_MWh gives the RES that can be stored to BESS in order to reach SOC_min
                             bess_el_in_MWh[i] = min(
@@ -1231,7 +1879,7 @@ def plant_calc(plant_config):
 
                         else:
 
-                            operation_mode[i] = operation_mode[i] + '_con_14_F'
+                            operation_mode[i] |= op_mode_bits(14, False)
 
                         ####################################################################################################################
                         # Condition 15:
@@ -1246,7 +1894,7 @@ def plant_calc(plant_config):
                         if (RES_remain > cH2_in_min_tH2 * Electrolysis.specific_el_MWhptH2 and
                                 H2Storage.capacity_tH2 - ch2_SOC[i - 1] > cH2_in_min_tH2):
 
-                            operation_mode[i] = operation_mode[i] + '_con_15_T'
+                            operation_mode[i] |= op_mode_bits(15, True)
 
                             ch2_in_tH2[i] = min(
                                 RES_remain / c05_system_spec_el_MWhptH2,
@@ -1258,16 +1906,15 @@ def plant_calc(plant_config):
                             el_H2_out_tH2[i] = el_el_in_MW[i] / Electrolysis.specific_el_MWhptH2
 
                             ch2_comp_el_in_MWh[i] = ch2_in_tH2[i] * Compressor.specific_el_MWhptH2
-                            ch2_batches_TS_tH2_ci.append([i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i]])
-                            ch2_SOC[i] = sum(batch[1] for batch in ch2_batches_TS_tH2_ci)
-                            ch2_avg_ci_gCO2pMJ[i] = sum(batch[1] * batch[2] for batch in ch2_batches_TS_tH2_ci) / \
-                                                    ch2_SOC[i] if ch2_SOC[i] > 0 else 0
+                            ch2_ledger.add(i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i])
+                            ch2_SOC[i] = ch2_ledger.SOC_tH2
+                            ch2_avg_ci_gCO2pMJ[i] = ch2_ledger.avg_ci_gCO2pMJ()
 
                             RES_remain -= ch2_comp_el_in_MWh[i] + el_el_in_MW[i]
 
                         else:
 
-                            operation_mode[i] = operation_mode[i] + '_con_15_F'
+                            operation_mode[i] |= op_mode_bits(15, False)
 
                         # Store any leftover RES to BESS
                         bess_el_in_extra_MWh = min(
@@ -1298,7 +1945,7 @@ def plant_calc(plant_config):
 
                     else:
 
-                        operation_mode[i] = operation_mode[i] + '_con_13_F'
+                        operation_mode[i] |= op_mode_bits(13, False)
 
                         ####################################################################################################################
                         # Condition 16:
@@ -1308,7 +1955,7 @@ def plant_calc(plant_config):
                                                    BESS.Pnom_MW) > c08_demand_system_min * c08_syn_p_total_share:
 
                             # Supply Syn Standby-demand through RES and BESS
-                            operation_mode[i] = operation_mode[i] + '_con_16_T'
+                            operation_mode[i] |= op_mode_bits(16, True)
 
                             syn_el_in_MWh[i] = c08_demand_system_min * c08_syn_p_total_share
 
@@ -1330,7 +1977,7 @@ def plant_calc(plant_config):
                         else:
 
                             # Supply Syn Standby-demand through RES, BESS and grid
-                            operation_mode[i] = operation_mode[i] + '_con_16_F'
+                            operation_mode[i] |= op_mode_bits(16, False)
 
                             syn_el_in_MWh[i] = c08_demand_system_min * c08_syn_p_total_share
 
@@ -1355,137 +2002,63 @@ def plant_calc(plant_config):
         # Set total consumption
         p_Total_consump_MW[i] = el_el_in_MW[i] + syn_el_in_MWh[i] + bess_el_in_MWh[i] + ch2_comp_el_in_MWh[i]
 
-        ####################################################################################################################
-        # ELY & Syn Shutdown behavior:
-        # Track Electrolysis and Syn-plant Shut down occurrences and durations
-        ####################################################################################################################
+    ####################################################################################################################
+    # ELY & Syn Shutdown behavior:
+    # Electrolysis and Syn-plant Shut down occurrences and durations, derived from the outputs of all time steps
+    ####################################################################################################################
+
+    track_shutdown(calc_data['syn_NH3_out_tNH3'], calc_data['syn_shutdown'])
+    track_shutdown(calc_data['el_H2_out_tH2'], calc_data['el_shutdown'])
+
+    ####################################################################################################################
+    # SET UP OUTPUT DATAFRAME
+    ####################################################################################################################
 
-        # Syn shutdown
-        if syn_NH3_out_tNH3[i] > 0 and syn_NH3_out_tNH3[i - 1] > 0:
-            pass
+    if aggregates:
+        return output_aggregates(calc_data, calendar, columns)
 
-        elif syn_NH3_out_tNH3[i] == 0 and syn_NH3_out_tNH3[i - 1] > 0:
-            syn_SD_t0 = i
-            syn_SD_duration = 1
-            syn_shutdown[syn_SD_t0] = syn_SD_duration
+    # Set up df_out column-wise from the calc_data arrays (numeric columns are not copied)
+    df_out = output_frame(calc_data, operation_mode.obj, DateTimes, columns)
 
-        elif syn_NH3_out_tNH3[i] == syn_NH3_out_tNH3[i - 1] == 0:
-            syn_SD_duration += 1
-            syn_shutdown[syn_SD_t0] = syn_SD_duration
+    # Return output value dataframe df_out
+    return df_out
 
-        elif syn_NH3_out_tNH3[i] > 0 and syn_NH3_out_tNH3[i - 1] == 0:
-            syn_SD_t0 = 0
-            syn_SD_duration = 0
 
-        # Ely shutdown
-        if el_H2_out_tH2[i] > 0 and el_H2_out_tH2[i - 1] > 0:
-            pass
+def _warm_up_jit():
+    # Loads (or compiles and caches) the kernel of the engine 'jit' in this process, if numba is installed
+    if importlib.util.find_spec('numba'):
+        import plant_calc_jit
+        plant_calc_jit.warm_up()
 
-        elif el_H2_out_tH2[i] == 0 and el_H2_out_tH2[i - 1] > 0:
-            el_SD_t0 = i
-            el_SD_duration = 1
-            el_shutdown[el_SD_t0] = el_SD_duration
 
-        elif el_H2_out_tH2[i] == el_H2_out_tH2[i - 1] == 0:
-            el_SD_duration += 1
-            el_shutdown[el_SD_t0] = el_SD_duration
+def init_worker():
+    """Initializer of the worker processes of parallel_imap(): attaches the worker to the memory-mapped RES profiles
+    (res_data.init_worker()) and loads the kernel of the engine 'jit' from its cache (plant_calc_jit.warm_up()), so
+    that neither delays the first task of the worker."""
+    res_data.init_worker()
+    _warm_up_jit()
 
-        elif el_H2_out_tH2[i] > 0 and el_H2_out_tH2[i - 1] == 0:
-            el_SD_t0 = 0
-            el_SD_duration = 0
 
-    ####################################################################################################################
-    # SET UP OUTPUT DATAFRAME
-    ####################################################################################################################
+def parallel_imap(function, tasks, workers=1, chunksize=None):
+    """Yields function(task) of each task in input order. With workers > 1 (None = number of CPUs) the tasks are
+    calculated by a pool of worker processes and submitted in chunks of chunksize tasks (default: about 4 chunks per
+    worker). Each worker is set up once by init_worker(). function and the tasks have to be picklable, e.g. module level
+    functions (or functools.partial of them) and plant configurations."""
+    if workers is None:
+        workers = os.cpu_count()
 
-    # Collect Column Names
-    columns = [
-        'DateTimes',
-        'p_Wind_CF',
-        'p_Wind_MW',
-        'p_PV_CF',
-        'p_PV_MW',
-        'p_Total_RES_MW',
-        'p_Grid_MW',
-        'p_Surplus_RES_MW',
-        'p_Total_consump_MW',
-        'el_el_in_MW',
-        'el_H2_out_tH2',
-        'bess_el_in_MWh',
-        'bess_el_charge_MWh',
-        'bess_SOC_MW',
-        'bess_el_discharge_MWh',
-        'bess_el_out_MWh',
-        'bess_el_loss_MWh',
-        'ch2_comp_el_in_MWh',
-        'ch2_comp_el_in_grid_MWh',
-        'ch2_in_tH2',
-        'ch2_SOC',
-        'ch2_out_tH2',
-        'ch2_vent_tH2',
-        'ch2_in_ci_gCO2pMJ',
-        'ch2_out_ci_gCO2pMJ',
-        'ch2_avg_ci_gCO2pMJ',
-        'syn_el_in_MWh',
-        'syn_el_in_grid_MWh',
-        'syn_H2_in_tH2',
-        'syn_NH3_out_tNH3',
-        'syn_NH3_out_ci_gCO2pMJ',
-        'operation_mode',
-        'syn_shutdown',
-        'el_shutdown',
-        'bess_capacity_MWh',
-        'bess_charge_eff',
-        'bess_discharge_eff',
-        'el_specific_el_MWhptH2'
-    ]
+    if workers <= 1:
+        yield from map(function, tasks)
+        return
 
-    # Combine the lists into rows (zip them together)
-    calc_data_rows = list(
-        zip(
-            DateTimes,
-            p_Wind_CF,
-            p_Wind_MW,
-            p_PV_CF,
-            p_PV_MW,
-            p_Total_RES_MW,
-            p_Grid_MW,
-            p_Surplus_RES_MW,
-            p_Total_consump_MW,
-            el_el_in_MW,
-            el_H2_out_tH2,
-            bess_el_in_MWh,
-            bess_el_charge_MWh,
-            bess_SOC_MWh,
-            bess_el_discharge_MWh,
-            bess_el_out_MWh,
-            bess_el_loss_MWh,
-            ch2_comp_el_in_MWh,
-            ch2_comp_el_in_grid_MWh,
-            ch2_in_tH2,
-            ch2_SOC,
-            ch2_out_tH2,
-            ch2_vent_tH2,
-            ch2_in_ci_gCO2pMJ,
-            ch2_out_ci_gCO2pMJ,
-            ch2_avg_ci_gCO2pMJ,
-            syn_el_in_MWh,
-            syn_el_in_grid_MWh,
-            syn_H2_in_tH2,
-            syn_NH3_out_tNH3,
-            syn_NH3_out_ci_gCO2pMJ,
-            operation_mode,
-            syn_shutdown,
-            el_shutdown,
-            bess_capacity_MWh,
-            bess_charge_eff,
-            bess_discharge_eff,
-            el_specific_el_MWhptH2
-        )
-    )
+    if chunksize is None:
+        chunksize = max(1, len(tasks) // (4 * workers)) if hasattr(tasks, '__len__') else 1
 
-    # Create the DataFrame
-    df_out = pd.DataFrame(calc_data_rows, columns=columns)
+    # Parse the RES profiles and compile the kernel of the engine 'jit' (and write their caches) once, before the
+    # workers load them from the caches
+    res_data.load_res_profiles()
+    _warm_up_jit()
+
+    with multiprocessing.Pool(processes=workers, initializer=init_worker) as pool:
+        yield from pool.imap(function, tasks, chunksize=chunksize)
 
-    # Return output value dataframe df_out
-    return df_out
\ No newline at end of file
@@ -0,0 +1,1544 @@
+#################################################################################################################
+# plant_calc_jit provides the JIT-compiled engine of plant_calc() (plant_calc(plant_config, engine='jit')).
+# dispatch_kernel() runs the same rule-based dispatch as the hourly loop of plant_calc() - degradation, Conditions 1
+# to 16 and the cH2 batch ledger - compiled with Numba over NumPy arrays. The Python loop of plant_calc() remains the
+# reference, the kernel is a line-by-line translation of it and has to be kept in sync. Shutdowns are derived from the
+# outputs afterwards (plant_calc.track_shutdown()), as in plant_calc().
+#
+# Operation modes are recorded as the operation mode codes of plant_calc(). round(x, 10) of the reference is
+# reproduced exactly (py_round()).
+#
+# Tolerance: the kernel takes the operations of the reference in the same order on IEEE float64, but the compiled code
+# is not guaranteed to round every operation like the interpreter (e.g. the ci of the cH2-Storage differs from the
+# reference by 1 ulp in some plants and on some machines). df_out is therefore not guaranteed to match the reference
+# to the last bit. The dispatch compares storage levels for equality (e.g. a full cH2-Storage), so such a difference
+# can flip single hourly decisions. The KPIs of kpi_calc() match the reference within a relative tolerance of 1e-4
+# (tolerance_KPI).
+#
+# Numba is an optional dependency. The kernel is compiled at its first call (some seconds) and the machine code is
+# cached in __pycache__ for later processes, e.g. the workers of parallel_imap(), which load it instead of compiling.
+#################################################################################################################
+
+import numpy as np
+from datetime import datetime
+import res_data
+import plant_calc as pc
+from plant_calc import (op_mode_con_11_shift, op_mode_syn_block, con_11_subcon_1_mode_1, con_11_subcon_1_mode_2,
+                        con_11_subcon_1_mode_3, con_11_subcon_1_mode_4, con_11_subcon_2_mode_1, con_11_subcon_2_mode_2,
+                        con_11_subcon_2_mode_3, con_11_subcon_2_mode_4, con_11_subcon_3_mode_1, con_11_subcon_3_mode_2,
+                        con_11_subcon_3_mode_3)
+
+try:
+    import numba
+except ImportError as e:
+    raise ImportError("plant_calc(plant_config, engine='jit') requires numba (pip install numba)") from e
+
+# Relative tolerance of the KPIs of the JIT-engine against the Python reference of plant_calc()
+tolerance_KPI = 1e-4
+
+# Columns of the operating envelope used by the kernel (in this order)
+envelope_columns = [
+    'bess_capacity_MWh',
+    'bess_charge_eff',
+    'bess_discharge_eff',
+    'el_specific_el_MWhptH2',
+    'bess_SOC_min_MWh',
+    'ch2_SOC_min_tH2',
+    'c01_demand_system_nom',
+    'c05_system_spec_el_MWhptH2',
+    'c05_max_grid_share',
+    'c08_demand_system_min',
+    'c08_system_spec_el_MWhptNH3',
+    'c08_syn_p_total_share',
+    'c08_el_p_total_share',
+    'c08_max_grid_share'
+]
+
+# df_out columns written by the kernel (in this order)
+kernel_columns = [
+    'p_Grid_MW',
+    'p_Surplus_RES_MW',
+    'p_Total_consump_MW',
+    'el_el_in_MW',
+    'el_H2_out_tH2',
+    'bess_el_in_MWh',
+    'bess_el_charge_MWh',
+    'bess_SOC_MW',
+    'bess_el_discharge_MWh',
+    'bess_el_out_MWh',
+    'bess_el_loss_MWh',
+    'ch2_comp_el_in_MWh',
+    'ch2_comp_el_in_grid_MWh',
+    'ch2_in_tH2',
+    'ch2_SOC',
+    'ch2_out_tH2',
+    'ch2_vent_tH2',
+    'ch2_in_ci_gCO2pMJ',
+    'ch2_out_ci_gCO2pMJ',
+    'ch2_avg_ci_gCO2pMJ',
+    'syn_el_in_MWh',
+    'syn_el_in_grid_MWh',
+    'syn_H2_in_tH2',
+    'syn_NH3_out_tNH3',
+    'syn_NH3_out_ci_gCO2pMJ',
+    'bess_capacity_MWh',
+    'bess_charge_eff',
+    'bess_discharge_eff',
+    'el_specific_el_MWhptH2'
+]
+
+####################################################################################################################
+# Operation mode codes (see plant_calc), compiled counterparts of op_mode_bits() and op_mode_is_true()
+####################################################################################################################
+
+@numba.njit(inline='always')
+def op_mode_bits(n, outcome):
+    return (1 << (n - 1)) | ((1 << (n + 15)) if outcome else 0)
+
+
+@numba.njit(inline='always')
+def op_mode_is_true(code, n):
+    return code & (1 << (n + 15)) != 0
+
+
+####################################################################################################################
+# Errors raised by the kernel (error code: message)
+####################################################################################################################
+
+error_ch2_discharge_negative = 1
+error_ch2_discharge_exceeds_SOC = 2
+error_bess_charge_discharge = 3
+
+errors = {
+    error_ch2_discharge_negative: "Condition 11 - cH2-discharge is less 0",
+    error_ch2_discharge_exceeds_SOC: "Condition 11 - cH2-discharge is larger than cH2_SOC",
+    error_bess_charge_discharge: "Condition 11 - invalid BESS charge/discharge demands"
+}
+
+
+@numba.njit
+def py_round(x, ndigits):
+    """round(x, ndigits) as in Python (correctly rounded), Numba's round() differs from it in the last bit for some x."""
+    scale = 10.0 ** ndigits
+
+    # Error-free product x * scale = p + e (Dekker)
+    p = x * scale
+    c = 134217729.0 * x
+    x_hi = c - (c - x)
+    x_lo = x - x_hi
+    c = 134217729.0 * scale
+    s_hi = c - (c - scale)
+    s_lo = scale - s_hi
+    e = ((x_hi * s_hi - p) + x_hi * s_lo + x_lo * s_hi) + x_lo * s_lo
+
+    # Round p + e to the nearest integer (ties to even), only exact ties of p depend on the sign of e
+    k = np.rint(p)
+    if p - k == 0.5 or p - k == -0.5:
+        if e > 0:
+            k = np.floor(p) + 1.0
+        elif e < 0:
+            k = np.floor(p)
+
+    return k / scale
+
+
+####################################################################################################################
+# cH2-Storage batch ledger (Numba counterpart of modul.H2Storage_Ledger)
+####################################################################################################################
+
+# FIFO ledger of the H2 batches stored in the cH2-Storage with the same accounting as modul.H2Storage_Ledger. The
+# ledger is a tuple of arrays (ts, tH2, ci, prefix, index, sums) handled by the ledger_ functions instead of a jitclass,
+# as Numba does not cache functions using jitclasses. Batches index[ledger_head] to index[ledger_end] - 1 of ts, tH2
+# and ci are stored, prefix holds the running sums of the stored tH2. The arrays start with size batches and are
+# doubled when full, ledger_add() returns the ledger to continue with.
+ledger_head = 0  # index: first stored batch
+ledger_end = 1  # index: end of the stored batches
+ledger_unsorted = 2  # index: batches of negative tH2 (round-off) are stored, prefix is not sorted
+ledger_SOC = 0  # sums: stored tH2
+ledger_CO2 = 1  # sums: CO2 (tH2 * ci) of the stored batches
+ledger_CO2_front = 2  # sums: CO2 of all but the last batch
+
+
+@numba.njit(cache=True)
+def ledger_new(size, SOC_t0_tH2, ci_t0_gCO2pMJ):
+    ledger = (np.zeros(size, dtype=np.int64), np.zeros(size), np.zeros(size), np.zeros(size),
+              np.zeros(3, dtype=np.int64), np.zeros(3))
+    return ledger_add(ledger, 0, SOC_t0_tH2, ci_t0_gCO2pMJ)
+
+
+@numba.njit(cache=True)
+def ledger_SOC_tH2(ledger):
+    return ledger[5][ledger_SOC]
+
+
+@numba.njit(cache=True)
+def ledger_avg_ci_gCO2pMJ(ledger):
+    sums = ledger[5]
+    return sums[ledger_CO2] / sums[ledger_SOC] if sums[ledger_SOC] > 0 else 0.0
+
+
+@numba.njit(cache=True)
+def ledger_add(ledger, ts, tH2, ci_gCO2pMJ):
+    if ledger[4][ledger_end] == len(ledger[0]):
+        ledger = _ledger_grow(ledger)
+    batch_ts, batch_tH2, batch_ci, prefix, index, sums = ledger
+
+    k = index[ledger_end]
+    batch_ts[k] = ts
+    batch_tH2[k] = tH2
+    batch_ci[k] = ci_gCO2pMJ
+    sums[ledger_SOC] += tH2
+    prefix[k] = sums[ledger_SOC]
+    index[ledger_end] += 1
+
+    sums[ledger_CO2_front] = sums[ledger_CO2]
+    sums[ledger_CO2] += tH2 * ci_gCO2pMJ
+    if tH2 < 0:
+        index[ledger_unsorted] = 1
+    return ledger
+
+
+@numba.njit(cache=True)
+def ledger_extend(ledger, tH2):
+    batch_ts, batch_tH2, batch_ci, prefix, index, sums = ledger
+    k = index[ledger_end] - 1
+    batch_tH2[k] += tH2
+    sums[ledger_SOC] = (prefix[k - 1] if k > index[ledger_head] else 0.0) + batch_tH2[k]
+    prefix[k] = sums[ledger_SOC]
+    sums[ledger_CO2] = sums[ledger_CO2_front] + batch_tH2[k] * batch_ci[k]
+    if batch_tH2[k] < 0:
+        index[ledger_unsorted] = 1
+
+
+@numba.njit(cache=True)
+def ledger_vent_search(ledger, tH2):
+    # Latest batch with ci > 0 within the first tH2 of the storage
+    batch_ts, batch_tH2, batch_ci, prefix, index, sums = ledger
+    head = index[ledger_head]
+    end = index[ledger_end]
+    if head == end or not tH2 > 0:
+        return 0, 0.0, False
+
+    if index[ledger_unsorted]:
+        k_max = end - 1
+    else:
+        k_max = head + np.searchsorted(prefix[head:end - 1], tH2, side='left')
+
+    k_vent = -1
+    for k in range(k_max, head - 1, -1):
+        if batch_ci[k] > 0 and (prefix[k - 1] if k > head else 0.0) < tH2:
+            k_vent = k
+            break
+
+    if k_vent < 0:
+        return 0, 0.0, False
+
+    # Total of the batches stored up to and including time step batch_TS
+    batch_TS = batch_ts[k_vent]
+    m = k_vent + np.searchsorted(batch_ts[k_vent:end], batch_TS, side='right') - 1
+    return batch_TS, prefix[m], True
+
+
+@numba.njit(cache=True)
+def ledger_vent(ledger, batch_TS):
+    index = ledger[4]
+    _ledger_advance(ledger, index[ledger_head] + np.searchsorted(
+        ledger[0][index[ledger_head]:index[ledger_end]], batch_TS, side='right'))
+
+
+@numba.njit(cache=True)
+def ledger_vent_partial(ledger, batch_TS, remain_tH2):
+    batch_ts, batch_tH2, batch_ci, prefix, index, sums = ledger
+    k = index[ledger_head] + np.searchsorted(batch_ts[index[ledger_head]:index[ledger_end]], batch_TS, side='left')
+    if k < index[ledger_end]:
+        batch_tH2[k] -= batch_tH2[k] - remain_tH2
+    _ledger_advance(ledger, k)
+
+
+@numba.njit(cache=True)
+def ledger_withdraw(ledger, tH2):
+    batch_ts, batch_tH2, batch_ci, prefix, index, sums = ledger
+    current_sum = 0.0
+    CO2_out = 0.0
+
+    head = index[ledger_head]
+    for k in range(head, index[ledger_end]):
+        if current_sum + batch_tH2[k] > tH2:
+            removed_amount = tH2 - current_sum
+            CO2_out += removed_amount * batch_ci[k]
+            batch_tH2[k] -= removed_amount
+            _ledger_advance(ledger, head + np.searchsorted(batch_ts[head:k], batch_ts[k], side='left'))
+            break
+        else:
+            current_sum += batch_tH2[k]
+            CO2_out += batch_tH2[k] * batch_ci[k]
+
+    return CO2_out / tH2
+
+
+@numba.njit(cache=True)
+def ledger_clear(ledger):
+    ledger[4][:] = 0
+    ledger[5][:] = 0.0
+
+
+@numba.njit(cache=True)
+def _ledger_advance(ledger, k):
+    # Batch k becomes the first stored batch, the running sums are recomputed over the stored batches
+    batch_ts, batch_tH2, batch_ci, prefix, index, sums = ledger
+    if k == index[ledger_end]:
+        ledger_clear(ledger)
+        return
+
+    index[ledger_head] = k
+    index[ledger_unsorted] = 0
+    SOC_tH2 = 0.0
+    CO2_tH2_gCO2pMJ = 0.0
+    for j in range(k, index[ledger_end]):
+        SOC_tH2 += batch_tH2[j]
+        prefix[j] = SOC_tH2
+        sums[ledger_CO2_front] = CO2_tH2_gCO2pMJ
+        CO2_tH2_gCO2pMJ += batch_tH2[j] * batch_ci[j]
+        if batch_tH2[j] < 0:
+            index[ledger_unsorted] = 1
+    sums[ledger_SOC] = SOC_tH2
+    sums[ledger_CO2] = CO2_tH2_gCO2pMJ
+
+
+@numba.njit(cache=True)
+def _ledger_grow(ledger):
+    batch_ts, batch_tH2, batch_ci, prefix, index, sums = ledger
+    size = 2 * len(batch_ts)
+    end = index[ledger_end]
+    grown_ts = np.zeros(size, dtype=np.int64)
+    grown_tH2 = np.zeros(size)
+    grown_ci = np.zeros(size)
+    grown_prefix = np.zeros(size)
+    grown_ts[:end] = batch_ts[:end]
+    grown_tH2[:end] = batch_tH2[:end]
+    grown_ci[:end] = batch_ci[:end]
+    grown_prefix[:end] = prefix[:end]
+    return grown_ts, grown_tH2, grown_ci, grown_prefix, index, sums
+
+
+####################################################################################################################
+# Dispatch kernel
+####################################################################################################################
+
+@numba.njit(cache=True)
+def dispatch_kernel(
+        p_Total_RES_MW,
+        month_envelope,
+        envelope,
+        flows,
+        operation_mode,
+        BESS_Pnom_MW,
+        BESS_flex_use,
+        H2Storage_capacity_tH2,
+        H2Storage_flex_use,
+        Compressor_specific_el_MWhptH2,
+        Electrolysis_capacity_MW,
+        Electrolysis_min_Load,
+        HaberBosch_capacity_tNH3ph,
+        HaberBosch_specific_el_MWhptNH3,
+        HaberBosch_specific_H2_tH2ptNH3,
+        HaberBosch_restart_delay_h,
+        Grid_ci_gCO2pkWh,
+        energy_density_NH3_MJpkgNH3,
+        energy_density_H2_MJpkgH2
+):
+    """Runs the hourly dispatch of plant_calc() on the calc_data arrays flows (kernel_columns). month_envelope[i] gives
+    the row of envelope (envelope_columns) of the month starting at time step i (-1 if no month starts at i).
+    Returns (0, 0), or an error code and the iteration it occurred in."""
+
+    (p_Grid_MW, p_Surplus_RES_MW, p_Total_consump_MW, el_el_in_MW, el_H2_out_tH2, bess_el_in_MWh, bess_el_charge_MWh,
+     bess_SOC_MWh, bess_el_discharge_MWh, bess_el_out_MWh, bess_el_loss_MWh, ch2_comp_el_in_MWh, ch2_comp_el_in_grid_MWh,
+     ch2_in_tH2, ch2_SOC, ch2_out_tH2, ch2_vent_tH2, ch2_in_ci_gCO2pMJ, ch2_out_ci_gCO2pMJ, ch2_avg_ci_gCO2pMJ,
+     syn_el_in_MWh, syn_el_in_grid_MWh, syn_H2_in_tH2, syn_NH3_out_tNH3, syn_NH3_out_ci_gCO2pMJ, bess_capacity_MWh,
+     bess_charge_eff, bess_discharge_eff, el_specific_el_MWhptH2) = flows
+
+    timesteps = len(p_Total_RES_MW)
+
+    ch2_ledger = ledger_new(2 * timesteps, ch2_SOC[0], ch2_avg_ci_gCO2pMJ[0])
+
+    # Degradation affected plant properties and fix system variables (set from the envelope at every month boundary)
+    BESS_capacity_MWh = bess_capacity_MWh[0]
+    BESS_charge_eff = bess_charge_eff[0]
+    BESS_discharge_eff = bess_discharge_eff[0]
+    Electrolysis_specific_el_MWhptH2 = el_specific_el_MWhptH2[0]
+    bess_SOC_min_MWh = 0.0
+    ch2_SOC_min_tH2 = 0.0
+    c01_demand_system_nom = 0.0
+    c05_system_spec_el_MWhptH2 = 0.0
+    c05_max_grid_share = 0.0
+    c08_demand_system_min = 0.0
+    c08_system_spec_el_MWhptNH3 = 0.0
+    c08_syn_p_total_share = 0.0
+    c08_el_p_total_share = 0.0
+    c08_max_grid_share = 0.0
+
+    # Syn restart delay tracker variable initiation
+    syn_block = False
+    syn_delay_counter = 0
+
+    ####################################################################################################################
+    # Iterative plant calculation
+    ####################################################################################################################
+
+    for i in range(1, timesteps):
+
+        ####################################################################################################################
+        # Adjust plant performance according to degradation (BESS capacity, Ely specific el consumption, etc)
+        ####################################################################################################################
+
+        # Check whether the first of a new month has been reached to adjust the plant properties and the operating
+        # limits to the degradation of the following month (see operating_envelope())
+        m = month_envelope[i]
+
+        if m >= 0:
+
+            # Adjust plant properties according to monthly degradation impact
+            BESS_capacity_MWh = envelope[m, 0]
+            BESS_charge_eff = envelope[m, 1]
+            BESS_discharge_eff = envelope[m, 2]
+            Electrolysis_specific_el_MWhptH2 = envelope[m, 3]
+
+            # Adjust BESS SOC to new max capacity if necessary
+            bess_el_loss_MWh[i - 1] += max(0, bess_SOC_MWh[i - 1] - BESS_capacity_MWh)
+            bess_SOC_MWh[i - 1] = min(bess_SOC_MWh[i - 1], BESS_capacity_MWh)
+
+            # Fix system variables of the month
+            bess_SOC_min_MWh = envelope[m, 4]
+            ch2_SOC_min_tH2 = envelope[m, 5]
+            c01_demand_system_nom = envelope[m, 6]
+            c05_system_spec_el_MWhptH2 = envelope[m, 7]
+            c05_max_grid_share = envelope[m, 8]
+            c08_demand_system_min = envelope[m, 9]
+            c08_system_spec_el_MWhptNH3 = envelope[m, 10]
+            c08_syn_p_total_share = envelope[m, 11]
+            c08_el_p_total_share = envelope[m, 12]
+            c08_max_grid_share = envelope[m, 13]
+
+        # Track degradation affected plant properties
+        bess_capacity_MWh[i] = BESS_capacity_MWh
+        bess_charge_eff[i] = BESS_charge_eff
+        bess_discharge_eff[i] = BESS_discharge_eff
+        el_specific_el_MWhptH2[i] = Electrolysis_specific_el_MWhptH2
+
+        ####################################################################################################################
+        # Synthesis restart delay
+        ####################################################################################################################
+
+        # decrement restart delay tracker
+        syn_delay_counter = max(0, syn_delay_counter - 1)
+
+        # Check if the Synthesis is currently under restart delay (syn_block = True). If so check whether Delay counter
+        # ran out. If so unblock Synthesis (syn_block = False)
+        if syn_block:
+            syn_block = True if syn_delay_counter > 0 else False
+
+
+        ####################################################################################################################
+        # Condition 1:
+        # Is there more power from RES, than necessary to supply and operate the Synthesis at nominal load?
+        ####################################################################################################################
+        if p_Total_RES_MW[i] > c01_demand_system_nom and not syn_block:
+
+            operation_mode[i] = op_mode_bits(1, True)
+
+            ####################################################################################################################
+            # Condition 2:
+            # Is the BESS and cH2 below minimum required SOC?
+            ####################################################################################################################
+            if ch2_SOC[i - 1] < ch2_SOC_min_tH2 or bess_SOC_MWh[i - 1] < bess_SOC_min_MWh:
+
+                operation_mode[i] |= op_mode_bits(2, True)
+
+                # p_Total_RES_surplus_MW gives the surplus RES potential that is available when running the plant at min load
+                p_Total_RES_surplus_MW = p_Total_RES_MW[i] - c08_demand_system_min
+
+                if bess_SOC_MWh[i - 1] < bess_SOC_min_MWh:
+                    # bess_el_in_store_SOC_min_MWh gives the RES that can be stored to BESS in order to reach SOC_min
+                    bess_el_in_MWh[i] = min(
+                        p_Total_RES_surplus_MW,
+                        BESS_Pnom_MW,
+                        (bess_SOC_min_MWh - bess_SOC_MWh[i - 1]) / BESS_charge_eff
+                    )
+
+                    # Adjust p_Total_RES_surplus_MW to the remaining RES after max charging BESS to SOC_min
+                    p_Total_RES_surplus_MW -= bess_el_in_MWh[i]
+
+                if ch2_SOC[i - 1] < ch2_SOC_min_tH2 and p_Total_RES_surplus_MW > 0:
+                    # el_el_in_H2_stored_max_MWh gives the maximum ELY capacity range that is available to produce H2
+                    # to storage when the plant is running at minimum load
+                    el_el_in_H2_stored_max_MWh = Electrolysis_capacity_MW - c08_demand_system_min * c08_el_p_total_share
+
+                    ch2_in_tH2[i] = min(
+                        p_Total_RES_surplus_MW / c05_system_spec_el_MWhptH2,
+                        ch2_SOC_min_tH2 - ch2_SOC[i - 1],
+                        el_el_in_H2_stored_max_MWh / Electrolysis_specific_el_MWhptH2
+                    )
+
+                    ch2_comp_el_in_MWh[i] = ch2_in_tH2[i] * Compressor_specific_el_MWhptH2
+
+                    # Adjust p_Total_RES_surplus_MW to the remaining RES after max charging cH2-Storage to SOC_min
+                    p_Total_RES_surplus_MW -= (ch2_in_tH2[i] * Electrolysis_specific_el_MWhptH2 + ch2_comp_el_in_MWh[i])
+
+                # If, after charging of BESS and cH2-Storage to minimum SOC, while running the plant at minimum load,
+                # there is RES available the plant operation will be maximized.
+
+                el_el_in_MW[i] = min(
+                    (c08_demand_system_min + p_Total_RES_surplus_MW) * c08_el_p_total_share,
+                    Electrolysis_capacity_MW - ch2_in_tH2[i] * Electrolysis_specific_el_MWhptH2,
+                    c01_demand_system_nom * c08_el_p_total_share
+                ) + ch2_in_tH2[i] * Electrolysis_specific_el_MWhptH2
+
+                el_H2_out_tH2[i] = el_el_in_MW[i] / Electrolysis_specific_el_MWhptH2
+
+                syn_H2_in_tH2[i] = el_H2_out_tH2[i] - ch2_in_tH2[i]
+                syn_NH3_out_tNH3[i] = syn_H2_in_tH2[i] / HaberBosch_specific_H2_tH2ptNH3
+                syn_el_in_MWh[i] = syn_NH3_out_tNH3[i] * HaberBosch_specific_el_MWhptNH3
+
+                if bess_el_in_MWh[i] != 0:
+                    bess_el_charge_MWh[i] = bess_el_in_MWh[i] * BESS_charge_eff
+                    bess_el_loss_MWh[i] = bess_el_in_MWh[i] - bess_el_charge_MWh[i]
+                    bess_SOC_MWh[i] = bess_SOC_MWh[i - 1] + bess_el_charge_MWh[i]
+
+                if ch2_in_tH2[i] != 0:
+                    ch2_ledger = ledger_add(ch2_ledger, i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i])
+                    ch2_SOC[i] = ledger_SOC_tH2(ch2_ledger)
+                    ch2_avg_ci_gCO2pMJ[i] = ledger_avg_ci_gCO2pMJ(ch2_ledger)
+
+                p_Total_consump_MW[i] = el_el_in_MW[i] + bess_el_in_MWh[i] + ch2_comp_el_in_MWh[i] + syn_el_in_MWh[i]
+
+                p_Surplus_RES_MW[i] = RES_remain = p_Total_RES_MW[i] - p_Total_consump_MW[i]
+
+                # Set storage levels
+                bess_SOC_MWh[i] = py_round(
+                    bess_SOC_MWh[i] if (bess_el_in_MWh[i] != 0 or bess_el_out_MWh[i] != 0) else bess_SOC_MWh[i - 1], 10)
+                ch2_SOC[i] = py_round(ch2_SOC[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else ch2_SOC[i - 1], 10)
+                ch2_avg_ci_gCO2pMJ[i] = py_round(
+                    ch2_avg_ci_gCO2pMJ[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else ch2_avg_ci_gCO2pMJ[i - 1],
+                    10)
+
+                # If, after charging the BESS and cH2-Storage to their minimum SOC and operating the plant at the
+                # maximum load possible based on the available component capacity (namely ELY), there is still power
+                # remaining, maximize the charge of the cH2-Storage.
+                if RES_remain > 0:
+
+                    el_el_in_pot_MW = Electrolysis_capacity_MW - el_el_in_MW[i]
+
+                    ch2_in_extra_tH2 = min(
+                        RES_remain / c05_system_spec_el_MWhptH2,
+                        el_el_in_pot_MW / Electrolysis_specific_el_MWhptH2,
+                        H2Storage_capacity_tH2 - (ch2_SOC[i - 1] + ch2_in_tH2[i])
+                    )
+
+                    if ch2_in_tH2[i] != 0:
+                        ledger_extend(ch2_ledger, ch2_in_extra_tH2)
+                    else:
+                        ch2_ledger = ledger_add(ch2_ledger, i, ch2_in_extra_tH2, ch2_in_ci_gCO2pMJ[i])
+
+                    ch2_SOC[i] = ledger_SOC_tH2(ch2_ledger)
+                    ch2_avg_ci_gCO2pMJ[i] = ledger_avg_ci_gCO2pMJ(ch2_ledger)
+
+                    ch2_in_tH2[i] += ch2_in_extra_tH2
+                    ch2_comp_el_in_MWh[i] = ch2_in_tH2[i] * Compressor_specific_el_MWhptH2
+
+                    el_el_in_MW[i] += ch2_in_extra_tH2 * Electrolysis_specific_el_MWhptH2
+                    el_H2_out_tH2[i] = el_el_in_MW[i] / Electrolysis_specific_el_MWhptH2
+
+                    p_Total_consump_MW[i] = el_el_in_MW[i] + bess_el_in_MWh[i] + ch2_comp_el_in_MWh[i] + syn_el_in_MWh[
+                        i]
+
+                    p_Surplus_RES_MW[i] = RES_remain = RES_remain - ch2_in_extra_tH2 * c05_system_spec_el_MWhptH2
+
+                    # If there's still power left after max charging cH2-Storage, then max charge BESS. Any power left
+                    # over after that will be put unused surplus
+                    if RES_remain > 0:
+                        bess_el_in_extra_MWh = min(
+                            RES_remain,
+                            BESS_Pnom_MW - bess_el_in_MWh[i],
+                            (BESS_capacity_MWh - (
+                                        bess_SOC_MWh[i - 1] + bess_el_in_MWh[i] / BESS_charge_eff)) / BESS_charge_eff
+                        )
+
+                        bess_el_in_MWh[i] += bess_el_in_extra_MWh
+                        bess_el_charge_MWh[i] = bess_el_in_MWh[i] * BESS_charge_eff
+                        bess_el_loss_MWh[i] = bess_el_in_MWh[i] - bess_el_charge_MWh[i]
+                        bess_SOC_MWh[i] = bess_SOC_MWh[i - 1] + bess_el_charge_MWh[i]
+
+                        p_Total_consump_MW[i] = el_el_in_MW[i] + bess_el_in_MWh[i] + ch2_comp_el_in_MWh[i] + \
+                                                syn_el_in_MWh[i]
+                        p_Surplus_RES_MW[i] -= bess_el_in_extra_MWh
+
+            else:
+
+                operation_mode[i] |= op_mode_bits(2, False)
+
+                # Operate Syn at nominal load with direct H2-Feed from Ely and determine remaining RES
+                syn_el_in_MWh[i] = HaberBosch_capacity_tNH3ph * HaberBosch_specific_el_MWhptNH3
+                syn_H2_in_tH2[i] = HaberBosch_capacity_tNH3ph * HaberBosch_specific_H2_tH2ptNH3
+                syn_NH3_out_tNH3[i] = HaberBosch_capacity_tNH3ph
+
+                el_H2_out_tH2[i] = syn_H2_in_tH2[i]
+                el_el_in_MW[i] = el_H2_out_tH2[i] * Electrolysis_specific_el_MWhptH2
+
+                RES_remain = p_Total_RES_MW[i] - syn_el_in_MWh[i] - el_el_in_MW[i]
+
+                ####################################################################################################################
+                # Condition 4:
+                # Is there empty cH2 storage capacity?
+                ####################################################################################################################
+                if ch2_SOC[i - 1] < H2Storage_capacity_tH2:
+
+                    operation_mode[i] |= op_mode_bits(4, True)
+
+                    ####################################################################################################################
+                    # Condition 5:
+                    # Would there be RES remaining after max charge cH2 (max Grid use for Comp -> cH2-Ci-Threshold)?
+                    ####################################################################################################################
+                    if (
+                            min(
+                                Electrolysis_capacity_MW - el_el_in_MW[i],
+                                (H2Storage_capacity_tH2 - ch2_SOC[i - 1]) * Electrolysis_specific_el_MWhptH2
+                            )
+                            / (Electrolysis_specific_el_MWhptH2 / c05_system_spec_el_MWhptH2)
+                            * (1 - c05_max_grid_share)
+                            < RES_remain
+                    ):
+
+                        ####################################################################################################################
+                        # Condition 6: --> Consolidated into one!
+                        # Would there be RES remaining after max charge cH2 (max Grid use for Comp -> cH2-Ci-Threshold)
+                        # and max charge BESS?
+                        ####################################################################################################################
+
+                        operation_mode[i] |= op_mode_bits(5, True)
+
+                        # Determine increased ELY consumption corresponding to H2 produced to storage
+                        el_el_in_stored_H2_MW = min(
+                            Electrolysis_capacity_MW - el_el_in_MW[i],
+                            (H2Storage_capacity_tH2 - ch2_SOC[i - 1]) * Electrolysis_specific_el_MWhptH2
+                        )
+
+                        # Increase ELY consumption by el energy necessary to produce H2 that will be stored and adjust total H2-Output
+                        el_el_in_MW[i] += el_el_in_stored_H2_MW
+                        el_H2_out_tH2[i] = el_el_in_MW[i] / Electrolysis_specific_el_MWhptH2
+
+                        # Determine H2 volume transferred to storage and set compressor consumption accordingly
+                        ch2_in_tH2[i] = el_el_in_stored_H2_MW / Electrolysis_specific_el_MWhptH2
+                        ch2_comp_el_in_MWh[i] = ch2_in_tH2[i] * Compressor_specific_el_MWhptH2
+
+                        # Reduce remaining RES by amount consumed in ELY & Compressor for stored H2 production
+                        # -> Total_RES(ELY_Consumption)
+                        RES_remain -= el_el_in_stored_H2_MW / (
+                                    Electrolysis_specific_el_MWhptH2 / c05_system_spec_el_MWhptH2) * (
+                                                  1 - c05_max_grid_share)
+
+                        # Determine max charge to BESS from remaining RES considering potential charging-power
+                        # limitations due to initial charging to required minimum SOC
+                        bess_el_in_extra_MWh = min(
+                            RES_remain,
+                            min(
+                                BESS_Pnom_MW,
+                                (BESS_capacity_MWh - bess_SOC_MWh[i - 1]) / BESS_charge_eff
+                            )
+                            - bess_el_in_MWh[i]
+                        )
+
+                        bess_el_in_MWh[i] += bess_el_in_extra_MWh
+                        bess_el_loss_MWh[i] = bess_el_in_MWh[i] * (1 - BESS_charge_eff)
+                        bess_el_charge_MWh[i] = bess_el_in_MWh[i] - bess_el_loss_MWh[i]
+                        bess_SOC_MWh[i] = bess_el_in_extra_MWh * BESS_charge_eff + (
+                            bess_SOC_MWh[i] if bess_SOC_MWh[i] != 0 else bess_SOC_MWh[i - 1])
+
+                        # Determine total onsite consumption and derive surplus and additional gird demand depending on
+                        # Total RES potential
+                        p_Total_consump_MW[i] = el_el_in_MW[i] + syn_el_in_MWh[i] + bess_el_in_MWh[i] + \
+                                                ch2_comp_el_in_MWh[i]
+
+                        p_Surplus_RES_MW[i] = max(0, p_Total_RES_MW[i] - p_Total_consump_MW[i])
+
+                        p_Grid_MW[i] = max(0, p_Total_consump_MW[i] - p_Total_RES_MW[i])
+
+                        # Any Grid consumption can only be associated to the compression
+                        ch2_comp_el_in_grid_MWh[i] = p_Grid_MW[i]
+
+                        # Determine Ci of H2 transferred to cH2-Storage based on grid consumption which is 100% associated
+                        # to Compressor consumption
+                        ch2_in_ci_gCO2pMJ[i] = py_round(ch2_comp_el_in_grid_MWh[i] * 1000 * Grid_ci_gCO2pkWh / (
+                                    ch2_in_tH2[i] * 1000 * energy_density_H2_MJpkgH2), 10)
+
+                        # Update cH2-Storage Batch-Overview and adjust cH2-SOC accordingly
+                        ch2_ledger = ledger_add(ch2_ledger, i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i])
+                        ch2_SOC[i] = ledger_SOC_tH2(ch2_ledger)
+                        ch2_avg_ci_gCO2pMJ[i] = ledger_avg_ci_gCO2pMJ(ch2_ledger)
+
+                        # Set storage levels
+                        bess_SOC_MWh[i] = py_round(
+                            bess_SOC_MWh[i] if (bess_el_in_MWh[i] != 0 or bess_el_out_MWh[i] != 0) else bess_SOC_MWh[
+                                i - 1], 10)
+                        ch2_SOC[i] = py_round(
+                            ch2_SOC[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else ch2_SOC[i - 1], 10)
+                        ch2_avg_ci_gCO2pMJ[i] = py_round(
+                            ch2_avg_ci_gCO2pMJ[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else
+                            ch2_avg_ci_gCO2pMJ[i - 1], 10)
+
+                    else:
+
+                        operation_mode[i] |= op_mode_bits(5, False)
+
+                        # Determine increased ELY consumption corresponding to H2 produced to storage
+                        el_el_in_stored_H2_MW = RES_remain * (
+                                    Electrolysis_specific_el_MWhptH2 / c05_system_spec_el_MWhptH2) / (
+                                                            1 - c05_max_grid_share)
+
+                        # Increase ELY consumption by el energy necessary to produce H2 that will be stored and adjust total H2-Output
+                        el_el_in_MW[i] += el_el_in_stored_H2_MW
+                        el_H2_out_tH2[i] = el_el_in_MW[i] / Electrolysis_specific_el_MWhptH2
+
+                        # Determine H2 volume transferred to storage and set compressor consumption accordingly
+                        ch2_in_tH2[i] = el_el_in_stored_H2_MW / Electrolysis_specific_el_MWhptH2
+                        ch2_comp_el_in_MWh[i] = ch2_in_tH2[i] * Compressor_specific_el_MWhptH2
+
+                        # Determine total onsite consumption and derive surplus and additional gird demand depending on
+                        # Total RES potential
+                        p_Total_consump_MW[i] = el_el_in_MW[i] + syn_el_in_MWh[i] + bess_el_in_MWh[i] + \
+                                                ch2_comp_el_in_MWh[i]
+
+                        p_Surplus_RES_MW[i] = max(0, p_Total_RES_MW[i] - p_Total_consump_MW[i])
+
+                        p_Grid_MW[i] = max(0, p_Total_consump_MW[i] - p_Total_RES_MW[i])
+
+                        # Determine Ci of H2 transferred to cH2-Storage based on grid consumption which is 100% associated
+                        # to Compressor consumption
+                        ch2_in_ci_gCO2pMJ[i] = py_round(
+                            p_Grid_MW[i] * 1000 * Grid_ci_gCO2pkWh / (ch2_in_tH2[i] * 1000 * energy_density_H2_MJpkgH2),
+                            10)
+                        ch2_comp_el_in_grid_MWh[i] = p_Grid_MW[i]
+
+                        # Update cH2-Storage Batch-Overview and adjust cH2-SOC accordingly
+                        ch2_ledger = ledger_add(ch2_ledger, i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i])
+                        ch2_SOC[i] = ledger_SOC_tH2(ch2_ledger)
+                        ch2_avg_ci_gCO2pMJ[i] = ledger_avg_ci_gCO2pMJ(ch2_ledger)
+
+                        # Set storage levels
+                        bess_SOC_MWh[i] = py_round(
+                            bess_SOC_MWh[i] if (bess_el_in_MWh[i] != 0 or bess_el_out_MWh[i] != 0) else bess_SOC_MWh[
+                                i - 1], 10)
+                        ch2_SOC[i] = py_round(
+                            ch2_SOC[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else ch2_SOC[i - 1], 10)
+                        ch2_avg_ci_gCO2pMJ[i] = py_round(
+                            ch2_avg_ci_gCO2pMJ[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else
+                            ch2_avg_ci_gCO2pMJ[i - 1], 10)
+
+                else:
+
+                    operation_mode[i] |= op_mode_bits(4, False)
+
+                    # Determine max charge to BESS from remaining RES considering potential charging-power
+                    # limitations due to initial charging to required minimum SOC
+                    bess_el_in_extra_MWh = min(
+                        RES_remain,
+                        min(
+                            BESS_Pnom_MW,
+                            (BESS_capacity_MWh - bess_SOC_MWh[i - 1]) / BESS_charge_eff
+                        )
+                        - bess_el_in_MWh[i]
+                    )
+
+                    bess_el_in_MWh[i] += bess_el_in_extra_MWh
+                    bess_el_loss_MWh[i] = bess_el_in_MWh[i] * (1 - BESS_charge_eff)
+                    bess_el_charge_MWh[i] = bess_el_in_MWh[i] - bess_el_loss_MWh[i]
+                    bess_SOC_MWh[i] = bess_el_in_extra_MWh * BESS_charge_eff + (
+                        bess_SOC_MWh[i] if bess_SOC_MWh[i] != 0 else bess_SOC_MWh[i - 1])
+
+                    # Determine remaining RES after max charging BESS
+                    RES_remain -= bess_el_in_extra_MWh
+
+                    # Determine the maximum potential H2 produced to storage
+                    # a is the potential available energy to the electrolysis from the remaining RES based on a 100% RES supplied ELY and Comp
+                    # b is the maximum available ELY-Capacity not yet used
+                    # cH2_in_potential_tH2 is the maximum potential H2 produced from RES and unused ELY capacity
+                    a = RES_remain * (1 - Compressor_specific_el_MWhptH2 / (
+                                Compressor_specific_el_MWhptH2 + Electrolysis_specific_el_MWhptH2))
+                    b = Electrolysis_capacity_MW - el_el_in_MW[i]
+                    cH2_in_potential_tH2 = min(a, b) / Electrolysis_specific_el_MWhptH2
+
+                    # Determine whether there is Hydrogen in the storage, that could be vented and replaced with lower Ci-H2
+                    # batch_TS tracks the batch time stamp that indicates the furthest the cH2 Storage can be depleted
+                    # and refilled with lower Ci-H2
+                    # trigger keeps track whether a batch with higher Ci-H2 has been identified. If not there is no
+                    # H2 to be vented and replaced
+                    # batch_tH2_total gives the total sum of H2 in the batches that would be fully or partially vented and replaced
+                    # The ledger is only searched if there is unused RES power and unused ELY capacity (Condition 7)
+                    batch_TS, batch_tH2_total, trigger = 0, 0.0, False
+                    if RES_remain > 0 and Electrolysis_capacity_MW - el_el_in_MW[i] > 0:
+                        batch_TS, batch_tH2_total, trigger = ledger_vent_search(ch2_ledger, cH2_in_potential_tH2)
+
+                    ####################################################################################################################
+                    # Condition 7:
+                    # Is there enough unused RES power and unused ELY capacity to produce enough H2 with lower Ci to vent
+                    # and replace higher Ci H2 stored in cH2?
+                    ####################################################################################################################
+
+                    if RES_remain > 0 and Electrolysis_capacity_MW - el_el_in_MW[i] > 0 and trigger:
+
+                        operation_mode[i] |= op_mode_bits(7, True)
+
+                        # Check whether the last affected batch (batch_TS) will be fully or partially vented
+                        if batch_tH2_total > cH2_in_potential_tH2:
+
+                            # Last affected batch will be vented partially -> Pop batches before and reduce partially vented batch volume
+                            # Whole H2-production potential will be used, giving the H2 volume stored to cH2-Storage
+                            ch2_in_tH2[i] = cH2_in_potential_tH2
+                            ch2_out_tH2[i] = cH2_in_potential_tH2
+                            ch2_vent_tH2[i] = cH2_in_potential_tH2
+
+                            # Vent of H2 to the same amount as will be stored (pop batches and adjust last batch's volume)
+                            ledger_vent_partial(ch2_ledger, batch_TS, batch_tH2_total - cH2_in_potential_tH2)
+
+                        else:
+
+                            # All affected batches will be vented fully and replaced in full
+                            ch2_in_tH2[i] = batch_tH2_total
+                            ch2_out_tH2[i] = batch_tH2_total
+                            ch2_vent_tH2[i] = batch_tH2_total
+
+                            # Vent of H2 to the same amount as will be stored (pop batches and adjust last batch's volume)
+                            ledger_vent(ch2_ledger, batch_TS)
+
+                        # Determine additional energy input to the ELY necessary to produce stored H2
+                        el_el_in_stored_H2_MW = ch2_in_tH2[i] * Electrolysis_specific_el_MWhptH2
+
+                        # Increase ELY consumption by el energy necessary to produce H2 that will be stored and adjust total H2-Output
+                        el_el_in_MW[i] += el_el_in_stored_H2_MW
+                        el_H2_out_tH2[i] = el_el_in_MW[i] / Electrolysis_specific_el_MWhptH2
+                        ch2_comp_el_in_MWh[i] = ch2_in_tH2[i] * Compressor_specific_el_MWhptH2
+
+                        ch2_ledger = ledger_add(ch2_ledger, i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i])
+                        ch2_SOC[i] = ledger_SOC_tH2(ch2_ledger)
+                        ch2_avg_ci_gCO2pMJ[i] = ledger_avg_ci_gCO2pMJ(ch2_ledger)
+
+                        p_Surplus_RES_MW[i] = RES_remain - el_el_in_stored_H2_MW - ch2_comp_el_in_MWh[i]
+
+                    else:
+
+                        operation_mode[i] |= op_mode_bits(7, False)
+
+                        # Set Surplus to unused remaining RES
+                        p_Surplus_RES_MW[i] = RES_remain
+
+                        # Set storage levels
+                        bess_SOC_MWh[i] = py_round(
+                            bess_SOC_MWh[i] if (bess_el_in_MWh[i] != 0 or bess_el_out_MWh[i] != 0) else bess_SOC_MWh[
+                                i - 1], 10)
+                        ch2_SOC[i] = py_round(
+                            ch2_SOC[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else ch2_SOC[i - 1], 10)
+                        ch2_avg_ci_gCO2pMJ[i] = py_round(
+                            ch2_avg_ci_gCO2pMJ[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else
+                            ch2_avg_ci_gCO2pMJ[i - 1], 10)
+
+
+
+        else:
+
+            operation_mode[i] = op_mode_bits(1, False)
+
+            ####################################################################################################################
+            # Condition 8:
+            # Is there enough power from RES+Grid_max ALONE to supply and operate the synthesis at or above
+            # minimum load AND maintain RFNBO-quality?
+            ####################################################################################################################
+
+            # Determine the maximum potential power supply from RES + Grid based on available RES and maximum
+            # grid share, that allows for the produced NH3 to be compliant
+            p_pot_Total_RES_grid_MW = p_Total_RES_MW[i] / (1 - c08_max_grid_share)
+
+            if p_pot_Total_RES_grid_MW > c08_demand_system_min and not syn_block:
+
+                operation_mode[i] |= op_mode_bits(8, True)
+
+                ####################################################################################################################
+                # Condition 9:
+                # Is the BESS & cH2 at or above minimum required SOC?
+                ####################################################################################################################
+                # If either BESS or cH2-Storage are below minimum required SOC, the plant will be held at minimum
+                # operating load, until both storages are filled accordingly to SOC_min.
+                if ch2_SOC[i - 1] < ch2_SOC_min_tH2 or bess_SOC_MWh[i - 1] < bess_SOC_min_MWh:
+
+                    operation_mode[i] |= op_mode_bits(9, True)
+
+                    # p_Total_RES_min_MW gives the minimum required RES that is necessary to operate the plant at minimum load from RES and max_Grid alone.
+                    p_Total_RES_min_MW = c08_demand_system_min * (1 - c08_max_grid_share)
+
+                    # p_Total_RES_surplus_MW gives the surplus RES potential that is available when running the plant at min load
+                    p_Total_RES_surplus_MW = p_Total_RES_MW[i] - p_Total_RES_min_MW
+
+                    # First BESS will be charged to SOC_min
+                    if bess_SOC_MWh[i - 1] < bess_SOC_min_MWh:
+                        # Charge BESS to required minimum SOC
+                        bess_el_in_MWh[i] = min(p_Total_RES_surplus_MW, BESS_Pnom_MW,
+                                                (bess_SOC_min_MWh - bess_SOC_MWh[i - 1]) / BESS_charge_eff)
+                        bess_el_charge_MWh[i] = bess_el_in_MWh[i] * BESS_charge_eff
+                        bess_el_loss_MWh[i] = bess_el_in_MWh[i] - bess_el_charge_MWh[i]
+                        bess_SOC_MWh[i] = bess_SOC_MWh[i - 1] + bess_el_charge_MWh[i]
+                        p_Total_RES_surplus_MW -= bess_el_in_MWh[i]
+
+                    # If there is left over surplus RES and cH2 is below SOC_min, then try to charge to SOC_min
+                    if ch2_SOC[i - 1] < ch2_SOC_min_tH2 and p_Total_RES_surplus_MW > 0:
+                        el_el_in_stored_H2_MW = p_Total_RES_surplus_MW / (1 - c05_max_grid_share) * (
+                                    Electrolysis_specific_el_MWhptH2 / c05_system_spec_el_MWhptH2)
+
+                        ch2_in_tH2[i] = min(
+                            el_el_in_stored_H2_MW / Electrolysis_specific_el_MWhptH2,
+                            ch2_SOC_min_tH2 - ch2_SOC[i - 1]
+                        )
+
+                        ch2_comp_el_in_MWh[i] = ch2_in_tH2[i] * Compressor_specific_el_MWhptH2
+                        ch2_comp_el_in_grid_MWh[i] = ch2_in_tH2[i] * c05_system_spec_el_MWhptH2 * c05_max_grid_share
+
+                        p_Total_RES_surplus_MW -= ch2_in_tH2[i] * c05_system_spec_el_MWhptH2 * (1 - c05_max_grid_share)
+
+                    # Adjust the available RES and max_grid potential used to set the new operating point of the plant
+                    # after charging BESS & cH2.
+                    # In Case the available RES-Surplus potential is transferred to storage in full (p_Total_RES_surplus_MW = 0)
+                    # the resulting p_pot_Total_RES_grid_MW will set plant operation to minimum load. If it is only partially
+                    # used (p_Total_RES_surplus_MW > 0) the plant load will be increased accordingly.
+
+                    p_pot_Total_RES_grid_MW = (p_Total_RES_surplus_MW + p_Total_RES_min_MW) / (1 - c08_max_grid_share)
+
+                else:
+                    operation_mode[i] |= op_mode_bits(9, False)
+
+                ####################################################################################################################
+                # Condition 10:
+                # Are there Flex-Use capacities left in BESS and/or cH2, that can be used,to increase product output?
+                ####################################################################################################################
+
+                # Determine flex-use potentials for BESS & cH2. The flex-use attribute of a storage describes the share
+                # of nominal capacity that can be used to maximize output even when there is enough available power
+                # to supply the Synthesis above minimum load. Storage_capacity * (1 - flex-use) is the range of storage
+                # that is reserved for minimum operation only
+
+                ch2_flex_tH2 = max(0, ch2_SOC[i - 1] - H2Storage_capacity_tH2 * (1 - H2Storage_flex_use))
+                bess_flex_MWh = max(0, bess_SOC_MWh[i - 1] - BESS_capacity_MWh * (1 - BESS_flex_use))
+
+                # If
+                # - there is flex-use capacity available in either BESS or cH2 and
+                # - No charging of either BESS or cH2 has occurred and
+                # - the available RES + grid_max are already enough to operate the plant at nominal load
+                # then use flex-use capacity to increase product output
+                if (
+                        (ch2_flex_tH2 > 0 or bess_flex_MWh > 0) and
+                        not op_mode_is_true(operation_mode[i], 9) and
+                        p_pot_Total_RES_grid_MW < c01_demand_system_nom
+                ):
+
+                    operation_mode[i] |= op_mode_bits(10, True)
+
+                    # p_Total_RES_flex_MW = p_Total_RES_MW[i] + ch2_flex_tH2 * Electrolysis_specific_el_MWhptH2 + min(BESS_Pnom_MW, bess_flex_MWh * BESS_discharge_eff)
+
+                    ####################################################################################################################
+                    # PLACEHOLDER
+                    ####################################################################################################################
+
+                    # There are no flex use potential to be used. The available RES + max_Grid potential is used to set
+                    # the operating point of ELY and HB-Syn
+                    p_Total_RES_grid_MW = min(c01_demand_system_nom, p_pot_Total_RES_grid_MW)
+
+                    el_el_in_MW[i] = p_Total_RES_grid_MW * c08_el_p_total_share + ch2_in_tH2[
+                        i] * Electrolysis_specific_el_MWhptH2
+                    el_H2_out_tH2[i] = el_el_in_MW[i] / Electrolysis_specific_el_MWhptH2
+
+                    syn_el_in_MWh[i] = p_Total_RES_grid_MW * c08_syn_p_total_share
+                    syn_H2_in_tH2[i] = el_H2_out_tH2[i] - ch2_in_tH2[i]
+                    syn_NH3_out_tNH3[i] = syn_el_in_MWh[i] / HaberBosch_specific_el_MWhptNH3
+
+                    p_Total_consump_MW[i] = el_el_in_MW[i] + syn_el_in_MWh[i] + bess_el_in_MWh[i] + ch2_comp_el_in_MWh[
+                        i]
+
+                    p_Grid_MW[i] = p_Total_consump_MW[i] - p_Total_RES_MW[i]
+
+                    ch2_comp_el_in_grid_MWh[i] = min(p_Grid_MW[i], ch2_comp_el_in_grid_MWh[i])
+                    syn_el_in_grid_MWh[i] = p_Grid_MW[i] - ch2_comp_el_in_grid_MWh[i]
+
+                    if ch2_in_tH2[i] != 0:
+                        ch2_in_ci_gCO2pMJ[i] = py_round(ch2_comp_el_in_grid_MWh[i] * 1000 * Grid_ci_gCO2pkWh / (
+                                    ch2_in_tH2[i] * 1000 * energy_density_H2_MJpkgH2), 10)
+                        ch2_ledger = ledger_add(ch2_ledger, i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i])
+                        ch2_SOC[i] = ledger_SOC_tH2(ch2_ledger)
+                        ch2_avg_ci_gCO2pMJ[i] = ledger_avg_ci_gCO2pMJ(ch2_ledger)
+
+                    syn_NH3_out_ci_gCO2pMJ[i] = (syn_el_in_grid_MWh[i] * 1000 * Grid_ci_gCO2pkWh) / (
+                                syn_NH3_out_tNH3[i] * 1000 * energy_density_NH3_MJpkgNH3)
+
+                    # Set storage levels
+                    bess_SOC_MWh[i] = py_round(
+                        bess_SOC_MWh[i] if (bess_el_in_MWh[i] != 0 or bess_el_out_MWh[i] != 0) else bess_SOC_MWh[i - 1],
+                        10)
+                    ch2_SOC[i] = py_round(ch2_SOC[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else ch2_SOC[i - 1],
+                                       10)
+                    ch2_avg_ci_gCO2pMJ[i] = py_round(
+                        ch2_avg_ci_gCO2pMJ[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else ch2_avg_ci_gCO2pMJ[
+                            i - 1], 10)
+
+                else:
+
+                    operation_mode[i] |= op_mode_bits(10, False)
+
+                    # There are no flex use potential to be used. The available RES + max_Grid potential is used to set
+                    # the operating point of ELY and HB-Syn
+                    p_Total_RES_grid_MW = min(c01_demand_system_nom, p_pot_Total_RES_grid_MW)
+
+                    el_el_in_MW[i] = p_Total_RES_grid_MW * c08_el_p_total_share + ch2_in_tH2[
+                        i] * Electrolysis_specific_el_MWhptH2
+                    el_H2_out_tH2[i] = el_el_in_MW[i] / Electrolysis_specific_el_MWhptH2
+
+                    syn_el_in_MWh[i] = p_Total_RES_grid_MW * c08_syn_p_total_share
+                    syn_H2_in_tH2[i] = el_H2_out_tH2[i] - ch2_in_tH2[i]
+                    syn_NH3_out_tNH3[i] = syn_el_in_MWh[i] / HaberBosch_specific_el_MWhptNH3
+
+                    p_Total_consump_MW[i] = el_el_in_MW[i] + syn_el_in_MWh[i] + bess_el_in_MWh[i] + ch2_comp_el_in_MWh[
+                        i]
+
+                    p_Grid_MW[i] = p_Total_consump_MW[i] - p_Total_RES_MW[i]
+
+                    ch2_comp_el_in_grid_MWh[i] = min(p_Grid_MW[i], ch2_comp_el_in_grid_MWh[i])
+                    syn_el_in_grid_MWh[i] = p_Grid_MW[i] - ch2_comp_el_in_grid_MWh[i]
+
+                    if ch2_in_tH2[i] != 0:
+                        ch2_in_ci_gCO2pMJ[i] = py_round(ch2_comp_el_in_grid_MWh[i] * 1000 * Grid_ci_gCO2pkWh / (
+                                    ch2_in_tH2[i] * 1000 * energy_density_H2_MJpkgH2), 10)
+                        ch2_ledger = ledger_add(ch2_ledger, i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i])
+                        ch2_SOC[i] = ledger_SOC_tH2(ch2_ledger)
+                        ch2_avg_ci_gCO2pMJ[i] = ledger_avg_ci_gCO2pMJ(ch2_ledger)
+
+                    syn_NH3_out_ci_gCO2pMJ[i] = (syn_el_in_grid_MWh[i] * 1000 * Grid_ci_gCO2pkWh) / (
+                                syn_NH3_out_tNH3[i] * 1000 * energy_density_NH3_MJpkgNH3)
+
+                    # Set storage levels
+                    bess_SOC_MWh[i] = py_round(
+                        bess_SOC_MWh[i] if (bess_el_in_MWh[i] != 0 or bess_el_out_MWh[i] != 0) else bess_SOC_MWh[i - 1],
+                        10)
+                    ch2_SOC[i] = py_round(ch2_SOC[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else ch2_SOC[i - 1],
+                                       10)
+                    ch2_avg_ci_gCO2pMJ[i] = py_round(
+                        ch2_avg_ci_gCO2pMJ[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else ch2_avg_ci_gCO2pMJ[
+                            i - 1], 10)
+
+            else:
+
+                operation_mode[i] |= op_mode_bits(8, False)
+
+                ####################################################################################################################
+                # Condition 11:
+                # Is there enough power/H2 stored onsite and from RES to supply and operate
+                # the Synthesis at minium load AND maintain RFNBO-quality?
+                ####################################################################################################################
+
+                # Condition 11 is divided into 3 sub-conditions. Each sub-condition checks for a partial range of the
+                # RES-availability-range, that has been determined to be to low to operate the plant above minimum load
+                # without the use of storage capacities onsite. Each sub-condition in turn is further divided into 3-4
+                # chronological conditions (if else if). The first chronological condition that yields a potential
+                # operating point at minimum plant load will be chosen. If none yield a potential operating point
+                # condition 11 will be set to FALSE
+
+                # con_11 tracks if condition 11 can be met
+                # mode tracks the chosen operating mode
+                # Both are handed down to the Condition 11 Decision-Gate
+                con_11 = False
+                mode = 0
+
+                # el_el_demand_MWh / syn_el_demand_MWh gives the energy/electricity demand required by the ELY / HB-Syn
+                # to support min_load operation of the plant
+                el_el_demand_MWh = c08_demand_system_min * c08_el_p_total_share
+                syn_el_demand_MWh = c08_demand_system_min * c08_syn_p_total_share
+
+                # el_min_el_demand_MWh gives the energy demand of the ELY at minimum load operation
+                el_min_el_demand_MWh = el_el_demand_MWh - Electrolysis_capacity_MW * Electrolysis_min_Load
+
+                # bess_pot_el_out_MWh Gives the maximum potential electricity supply from the BESS
+                bess_pot_el_out_MWh = min(BESS_Pnom_MW, bess_SOC_MWh[i - 1] * BESS_discharge_eff)
+                ch2_pot_el_equivalent_out_MWh = ch2_SOC[i - 1] * Electrolysis_specific_el_MWhptH2
+
+                # Sub-Condition 1: RES < Syn
+                # checks for RES availability that is below even the minimum required electricity input to the HB-Syn
+                if p_Total_RES_MW[i] < syn_el_demand_MWh:
+
+                    res_plus_bess = p_Total_RES_MW[i] + bess_pot_el_out_MWh
+                    syn_deficit = syn_el_demand_MWh - p_Total_RES_MW[i]
+
+                    # If RES and BESS together cannot supply the minimum required el. energy of the HB-Syn, then there
+                    # is no potential operating point for the plant at minimum load -> Condition 11 = FALSE
+                    if res_plus_bess > syn_el_demand_MWh:
+
+                        # Is there enough H2 in the cH2-Storage to supply the entire HB-Syn-H2-demand at minload?
+                        if ch2_pot_el_equivalent_out_MWh > el_el_demand_MWh:
+                            con_11 = True
+                            mode = con_11_subcon_1_mode_1
+
+                        # Is there enough BESS to supply the HB-Syn deficit along with the minimum required el. energy
+                        # demand of the ELY? And is there enough H2 to supply the remaining HB-Syn-H2-demand not covered
+                        # by the H2-yield from ELY at min load?
+                        elif ch2_pot_el_equivalent_out_MWh > el_el_demand_MWh - el_min_el_demand_MWh and bess_pot_el_out_MWh - syn_deficit > el_min_el_demand_MWh:
+                            con_11 = True
+                            mode = con_11_subcon_1_mode_2
+
+                        # Is there enough BESS potential to supply what cannot be supplied by the cH2?
+                        elif min(ch2_pot_el_equivalent_out_MWh, el_el_demand_MWh - el_min_el_demand_MWh) + (
+                                bess_pot_el_out_MWh - syn_deficit) > el_el_demand_MWh:
+                            con_11 = True
+
+                            if min(ch2_pot_el_equivalent_out_MWh, el_el_demand_MWh - el_min_el_demand_MWh) > 0:
+                                mode = con_11_subcon_1_mode_3
+                            else:
+                                mode = con_11_subcon_1_mode_4
+
+                        # Is there enough BESS potential to supply the HB-Syn-deficit and the required ELY consumption
+                        # to produce the HB-Syn-H2-demand?
+                        elif bess_pot_el_out_MWh - syn_deficit > el_el_demand_MWh:
+                            con_11 = True
+                            mode = con_11_subcon_1_mode_4
+
+                        # Under Sub-condition 1 there is no possible plant minimum operating point -> Condition 11 = FALSE
+                        else:
+                            con_11 = False
+
+                    else:
+                        con_11 = False
+
+                # Sub-Condition 2: Syn < RES < Syn + ELY_min
+                # checks for RES availability that is above the minimum required electricity input to the HB-Syn
+                # BUT below the sum of the minimum required electricity input of the HB-Syn and the minimum
+                # required electricity input of the ELY
+                if p_Total_RES_MW[i] < syn_el_demand_MWh + el_min_el_demand_MWh and p_Total_RES_MW[
+                    i] > syn_el_demand_MWh:
+
+                    # is there enough BESS to supply the missing el. energy necessary to operate the ELY at min load.
+                    # And is there enough H2 to supply the then missing H2 to cover the HB-Syn-H2 demand
+                    if (bess_pot_el_out_MWh > el_min_el_demand_MWh - (p_Total_RES_MW[i] - syn_el_demand_MWh) and
+                            ch2_pot_el_equivalent_out_MWh > (el_el_demand_MWh - el_min_el_demand_MWh)):
+                        con_11 = True
+                        mode = con_11_subcon_2_mode_1
+
+                    # Is there enough H2 to supply the total HB-Syn-H2 demand? unused RES can be charged to BESS for later use
+                    elif ch2_pot_el_equivalent_out_MWh > c08_demand_system_min - syn_el_demand_MWh:
+                        con_11 = True
+                        mode = con_11_subcon_2_mode_2
+
+                    # Is there enough BESS potential to supply what cannot be supplied by the cH2?
+                    elif min(ch2_pot_el_equivalent_out_MWh,
+                             el_el_demand_MWh - el_min_el_demand_MWh) + bess_pot_el_out_MWh > c08_demand_system_min - \
+                            p_Total_RES_MW[i]:
+                        con_11 = True
+
+                        if min(ch2_pot_el_equivalent_out_MWh, el_el_demand_MWh - el_min_el_demand_MWh) > 0:
+                            mode = con_11_subcon_2_mode_3
+                        else:
+                            mode = con_11_subcon_2_mode_4
+
+                    # Is there enough BESS potential to the total deficit?
+                    elif bess_pot_el_out_MWh > c08_demand_system_min - p_Total_RES_MW[i]:
+                        con_11 = True
+                        mode = con_11_subcon_2_mode_4
+
+                    # Under Sub-condition 2 there is no possible plant minimum operating point -> Condition 11 = FALSE
+                    else:
+                        con_11 = False
+
+                # Sub-Condition 3: RES > Syn + ELY_min
+                # checks for RES availability that is above the sum of the minimum required electricity input to the
+                # HB-Syn and the minimum required electricity input of the HB-Syn and the minimum required electricity
+                # input of the ELY
+                if p_Total_RES_MW[i] > syn_el_demand_MWh + el_min_el_demand_MWh:
+
+                    deficit = c08_demand_system_min - p_Total_RES_MW[i]
+
+                    # Is there enough H2 in storage to cover the deficit of H2 required for the HB-Syn at min load?
+                    if ch2_pot_el_equivalent_out_MWh > deficit:
+                        con_11 = True
+                        mode = con_11_subcon_3_mode_1
+
+                    # Is there enough BESS potential to supplement the remaining H2 from storage?
+                    elif ch2_pot_el_equivalent_out_MWh + bess_pot_el_out_MWh > deficit:
+                        con_11 = True
+
+                        # Is there H2 left in storage or will the deficit be purly supplied by BESS?
+                        if ch2_SOC[i - 1] > 0:
+                            mode = con_11_subcon_3_mode_2
+                        else:
+                            mode = con_11_subcon_3_mode_3
+
+                    else:
+                        con_11 = False
+
+                # Run Condition 11
+                ####################################################################################################################
+                if con_11 and not syn_block:
+
+                    operation_mode[i] |= op_mode_bits(11, True) | (mode << op_mode_con_11_shift)
+
+                    syn_el_in_MWh[i] = syn_el_demand_MWh
+                    syn_NH3_out_tNH3[i] = syn_el_in_MWh[i] / HaberBosch_specific_el_MWhptNH3
+                    syn_H2_in_tH2[i] = syn_NH3_out_tNH3[i] * HaberBosch_specific_H2_tH2ptNH3
+
+                    # Select mode
+                    if mode == con_11_subcon_1_mode_1:
+                        ch2_out_tH2[i] = el_el_demand_MWh / Electrolysis_specific_el_MWhptH2
+                        bess_el_out_MWh[i] = syn_el_demand_MWh - p_Total_RES_MW[i]
+                    elif mode == con_11_subcon_1_mode_2:
+                        ch2_out_tH2[i] = (
+                                                     el_el_demand_MWh - el_min_el_demand_MWh) / Electrolysis_specific_el_MWhptH2
+                        bess_el_out_MWh[i] = el_min_el_demand_MWh + (syn_el_demand_MWh - p_Total_RES_MW[i])
+                        el_el_in_MW[i] = el_min_el_demand_MWh
+                        el_H2_out_tH2[i] = el_el_in_MW[i] / Electrolysis_specific_el_MWhptH2
+                    elif mode == con_11_subcon_1_mode_3:
+                        ch2_out_tH2[i] = min(ch2_SOC[i - 1], (
+                                    el_el_demand_MWh - el_min_el_demand_MWh) / Electrolysis_specific_el_MWhptH2)
+                        bess_el_out_MWh[i] = c08_demand_system_min - p_Total_RES_MW[i] - ch2_out_tH2[
+                            i] * Electrolysis_specific_el_MWhptH2
+                        el_el_in_MW[i] = c08_demand_system_min - syn_el_demand_MWh - ch2_out_tH2[
+                            i] * Electrolysis_specific_el_MWhptH2
+                        el_H2_out_tH2[i] = el_el_in_MW[i] / Electrolysis_specific_el_MWhptH2
+                    elif mode == con_11_subcon_1_mode_4:
+                        bess_el_out_MWh[i] = c08_demand_system_min - p_Total_RES_MW[i]
+                        el_el_in_MW[i] = el_el_demand_MWh
+                        el_H2_out_tH2[i] = el_el_in_MW[i] / Electrolysis_specific_el_MWhptH2
+                    elif mode == con_11_subcon_2_mode_1:
+                        ch2_out_tH2[i] = (
+                                                     el_el_demand_MWh - el_min_el_demand_MWh) / Electrolysis_specific_el_MWhptH2
+                        bess_el_out_MWh[i] = el_min_el_demand_MWh + (syn_el_demand_MWh - p_Total_RES_MW[i])
+                        el_el_in_MW[i] = el_min_el_demand_MWh
+                        el_H2_out_tH2[i] = el_el_in_MW[i] / Electrolysis_specific_el_MWhptH2
+                    elif mode == con_11_subcon_2_mode_2:
+                        ch2_out_tH2[i] = el_el_demand_MWh / Electrolysis_specific_el_MWhptH2
+                        bess_el_in_MWh[i] = min(p_Total_RES_MW[i] - syn_el_demand_MWh, BESS_Pnom_MW,
+                                                (BESS_capacity_MWh - bess_SOC_MWh[i - 1]) / BESS_charge_eff)
+                        p_Surplus_RES_MW[i] = p_Total_RES_MW[i] - syn_el_demand_MWh - bess_el_in_MWh[i]
+                    elif mode == con_11_subcon_2_mode_3:
+                        ch2_out_tH2[i] = min(ch2_SOC[i - 1], (
+                                    el_el_demand_MWh - el_min_el_demand_MWh) / Electrolysis_specific_el_MWhptH2)
+                        bess_el_out_MWh[i] = c08_demand_system_min - p_Total_RES_MW[i] - ch2_out_tH2[
+                            i] * Electrolysis_specific_el_MWhptH2
+                        el_el_in_MW[i] = c08_demand_system_min - syn_el_demand_MWh - ch2_out_tH2[
+                            i] * Electrolysis_specific_el_MWhptH2
+                        el_H2_out_tH2[i] = el_el_in_MW[i] / Electrolysis_specific_el_MWhptH2
+                    elif mode == con_11_subcon_2_mode_4:
+                        bess_el_out_MWh[i] = c08_demand_system_min - p_Total_RES_MW[i]
+                        el_el_in_MW[i] = el_el_demand_MWh
+                        el_H2_out_tH2[i] = el_el_in_MW[i] / Electrolysis_specific_el_MWhptH2
+                    elif mode == con_11_subcon_3_mode_1:
+                        ch2_out_tH2[i] = (c08_demand_system_min - p_Total_RES_MW[
+                            i]) / Electrolysis_specific_el_MWhptH2
+                        el_el_in_MW[i] = c08_demand_system_min - syn_el_demand_MWh - ch2_out_tH2[
+                            i] * Electrolysis_specific_el_MWhptH2
+                        el_H2_out_tH2[i] = el_el_in_MW[i] / Electrolysis_specific_el_MWhptH2
+                    elif mode == con_11_subcon_3_mode_2:
+                        ch2_out_tH2[i] = ch2_SOC[i - 1]
+                        bess_el_out_MWh[i] = c08_demand_system_min - p_Total_RES_MW[i] - ch2_out_tH2[
+                            i] * Electrolysis_specific_el_MWhptH2
+                        el_el_in_MW[i] = c08_demand_system_min - syn_el_demand_MWh - ch2_out_tH2[
+                            i] * Electrolysis_specific_el_MWhptH2
+                        el_H2_out_tH2[i] = el_el_in_MW[i] / Electrolysis_specific_el_MWhptH2
+                    elif mode == con_11_subcon_3_mode_3:
+                        bess_el_out_MWh[i] = c08_demand_system_min - p_Total_RES_MW[i]
+                        el_el_in_MW[i] = el_el_demand_MWh
+                        el_H2_out_tH2[i] = el_el_in_MW[i] / Electrolysis_specific_el_MWhptH2
+                    else:
+                        print("Error in Iteration", i, "- Condition 11")
+
+                    # cH2-discharge
+                    if ch2_out_tH2[i] != 0:
+                        ch2_discharge = ch2_out_tH2[i]
+
+                        if ch2_discharge < 0:
+                            return error_ch2_discharge_negative, i
+
+                        elif 0 < ch2_discharge < ch2_SOC[i - 1]:
+                            # Withdraw batches first-in-first-out and determine the Ci of the discharged H2
+                            ch2_out_ci_gCO2pMJ[i] = ledger_withdraw(ch2_ledger, ch2_discharge)
+
+                        elif ch2_discharge == ch2_SOC[i - 1]:
+                            # Full discharge: the emptied batches are not attributed to the discharged H2 (Ci = 0)
+                            ledger_clear(ch2_ledger)
+                            ch2_out_ci_gCO2pMJ[i] = 0
+
+                        else:
+                            print("ch2_SOC[i - 1] - ch2_discharge =", ch2_SOC[i - 1] - ch2_discharge)
+                            return error_ch2_discharge_exceeds_SOC, i
+
+                        ch2_SOC[i] = ledger_SOC_tH2(ch2_ledger)
+                        ch2_avg_ci_gCO2pMJ[i] = ledger_avg_ci_gCO2pMJ(ch2_ledger)
+
+                    # BESS-charge/discharge
+                    if bess_el_out_MWh[i] != 0 or bess_el_in_MWh[i] != 0:
+                        if bess_el_out_MWh[i] > 0 and bess_el_in_MWh[i] == 0:
+                            bess_el_discharge_MWh[i] = bess_el_out_MWh[i] / BESS_discharge_eff
+                            bess_SOC_MWh[i] = bess_SOC_MWh[i - 1] - bess_el_discharge_MWh[i]
+                            bess_el_loss_MWh[i] = bess_el_discharge_MWh[i] - bess_el_out_MWh[i]
+                        elif bess_el_out_MWh[i] == 0 and bess_el_in_MWh[i] > 0:
+                            bess_el_charge_MWh[i] = bess_el_in_MWh[i] * BESS_charge_eff
+                            bess_SOC_MWh[i] = bess_SOC_MWh[i - 1] + bess_el_charge_MWh[i]
+                            bess_el_loss_MWh[i] = bess_el_in_MWh[i] - bess_el_charge_MWh[i]
+                        elif bess_el_out_MWh[i] == 0 and bess_el_in_MWh[i] == 0:
+                            break
+                        else:
+                            return error_bess_charge_discharge, i
+
+                    # Determine NH3-Out Ci
+                    # Total CO2 from H2 discharged from storage (only source of CO2 under Condition 11 = TRUE)
+                    co2_total_gCO2 = ch2_out_ci_gCO2pMJ[i] * ch2_out_tH2[i] * 1000 * energy_density_H2_MJpkgH2
+                    syn_NH3_out_ci_gCO2pMJ[i] = co2_total_gCO2 / (
+                                syn_NH3_out_tNH3[i] * 1000 * energy_density_NH3_MJpkgNH3)
+
+                    # Set storage levels
+                    bess_SOC_MWh[i] = py_round(
+                        bess_SOC_MWh[i] if (bess_el_in_MWh[i] != 0 or bess_el_out_MWh[i] != 0) else bess_SOC_MWh[i - 1],
+                        10)
+                    ch2_SOC[i] = py_round(ch2_SOC[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else ch2_SOC[i - 1],
+                                       10)
+                    ch2_avg_ci_gCO2pMJ[i] = py_round(
+                        ch2_avg_ci_gCO2pMJ[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else ch2_avg_ci_gCO2pMJ[
+                            i - 1], 10)
+
+
+                else:
+                    ####################################################################################################################
+                    # Initialize Synthesis delay counter if Synthesis is not blocked
+                    ####################################################################################################################
+                    if not syn_block:
+
+                        syn_delay_counter = HaberBosch_restart_delay_h
+                        syn_block = True
+
+                        operation_mode[i] |= op_mode_bits(11, False)
+                    else:
+                        operation_mode[i] = op_mode_syn_block
+
+                    ####################################################################################################################
+                    # Condition 13:
+                    # Is there enough RES to supply Syn-Standby demand?
+                    ####################################################################################################################
+                    if p_Total_RES_MW[i] > c08_demand_system_min * c08_syn_p_total_share:
+
+                        operation_mode[i] |= op_mode_bits(13, True)
+
+                        syn_el_in_MWh[i] = c08_demand_system_min * c08_syn_p_total_share
+
+                        RES_remain = p_Total_RES_MW[i] - syn_el_in_MWh[i]
+
+                        ####################################################################################################################
+                        # Condition 14:
+                        # Is the BESS at or above minimum required SOC?
+                        ####################################################################################################################
+                        if bess_SOC_MWh[i - 1] < bess_SOC_min_MWh:
+
+                            operation_mode[i] |= op_mode_bits(14, True)
+
+                            # bess_el_in_store_SOC_min_MWh gives the RES that can be stored to BESS in order to reach SOC_min
+                            bess_el_in_MWh[i] = min(
+                                RES_remain,
+                                BESS_Pnom_MW,
+                                (bess_SOC_min_MWh - bess_SOC_MWh[i - 1]) / BESS_charge_eff
+                            )
+
+                            RES_remain -= bess_el_in_MWh[i]
+
+                        else:
+
+                            operation_mode[i] |= op_mode_bits(14, False)
+
+                        ####################################################################################################################
+                        # Condition 15:
+                        # Is there enough power from RES and empty storage in cH2 to operate the Electrolysis above
+                        # minimum load and provide Syn-Standby demand?
+                        ####################################################################################################################
+                        # cH2_in_min_tH2 gives the H2 production from ELY at min load
+                        cH2_in_min_tH2 = Electrolysis_capacity_MW * Electrolysis_min_Load / c05_system_spec_el_MWhptH2
+
+                        # If the remaining RES allows for ELY operation above min load and there is enough available
+                        # capacity in cH2-Storage procure max H2 to cH2-Storage
+                        if (RES_remain > cH2_in_min_tH2 * Electrolysis_specific_el_MWhptH2 and
+                                H2Storage_capacity_tH2 - ch2_SOC[i - 1] > cH2_in_min_tH2):
+
+                            operation_mode[i] |= op_mode_bits(15, True)
+
+                            ch2_in_tH2[i] = min(
+                                RES_remain / c05_system_spec_el_MWhptH2,
+                                H2Storage_capacity_tH2 - ch2_SOC[i - 1],
+                                Electrolysis_capacity_MW / Electrolysis_specific_el_MWhptH2
+                            )
+
+                            el_el_in_MW[i] = ch2_in_tH2[i] * Electrolysis_specific_el_MWhptH2
+                            el_H2_out_tH2[i] = el_el_in_MW[i] / Electrolysis_specific_el_MWhptH2
+
+                            ch2_comp_el_in_MWh[i] = ch2_in_tH2[i] * Compressor_specific_el_MWhptH2
+                            ch2_ledger = ledger_add(ch2_ledger, i, ch2_in_tH2[i], ch2_in_ci_gCO2pMJ[i])
+                            ch2_SOC[i] = ledger_SOC_tH2(ch2_ledger)
+                            ch2_avg_ci_gCO2pMJ[i] = ledger_avg_ci_gCO2pMJ(ch2_ledger)
+
+                            RES_remain -= ch2_comp_el_in_MWh[i] + el_el_in_MW[i]
+
+                        else:
+
+                            operation_mode[i] |= op_mode_bits(15, False)
+
+                        # Store any leftover RES to BESS
+                        bess_el_in_extra_MWh = min(
+                            RES_remain,
+                            BESS_Pnom_MW - bess_el_in_MWh[i],
+                            (BESS_capacity_MWh - (
+                                        bess_SOC_MWh[i - 1] + bess_el_in_MWh[i] / BESS_charge_eff)) / BESS_charge_eff
+                        )
+
+                        bess_el_in_MWh[i] += bess_el_in_extra_MWh
+                        bess_el_charge_MWh[i] = bess_el_in_MWh[i] * BESS_charge_eff
+                        bess_el_loss_MWh[i] = bess_el_in_MWh[i] - bess_el_charge_MWh[i]
+                        bess_SOC_MWh[i] = bess_SOC_MWh[i - 1] + bess_el_charge_MWh[i]
+
+                        RES_remain -= bess_el_in_extra_MWh
+                        p_Surplus_RES_MW[i] = RES_remain
+
+                        # Set storage levels
+                        bess_SOC_MWh[i] = py_round(
+                            bess_SOC_MWh[i] if (bess_el_in_MWh[i] != 0 or bess_el_out_MWh[i] != 0) else bess_SOC_MWh[
+                                i - 1], 10)
+                        ch2_SOC[i] = py_round(
+                            ch2_SOC[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else ch2_SOC[i - 1], 10)
+                        ch2_avg_ci_gCO2pMJ[i] = py_round(
+                            ch2_avg_ci_gCO2pMJ[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else
+                            ch2_avg_ci_gCO2pMJ[i - 1], 10)
+
+
+                    else:
+
+                        operation_mode[i] |= op_mode_bits(13, False)
+
+                        ####################################################################################################################
+                        # Condition 16:
+                        # Is there enough RES and BESS capacity to supply Syn-Standby demand?
+                        ####################################################################################################################
+                        if p_Total_RES_MW[i] + min(bess_SOC_MWh[i - 1] / BESS_discharge_eff,
+                                                   BESS_Pnom_MW) > c08_demand_system_min * c08_syn_p_total_share:
+
+                            # Supply Syn Standby-demand through RES and BESS
+                            operation_mode[i] |= op_mode_bits(16, True)
+
+                            syn_el_in_MWh[i] = c08_demand_system_min * c08_syn_p_total_share
+
+                            bess_el_out_MWh[i] = syn_el_in_MWh[i] - p_Total_RES_MW[i]
+                            bess_el_discharge_MWh[i] = bess_el_out_MWh[i] / BESS_discharge_eff
+                            bess_el_loss_MWh[i] = bess_el_discharge_MWh[i] - bess_el_out_MWh[i]
+                            bess_SOC_MWh[i] = bess_SOC_MWh[i - 1] - bess_el_discharge_MWh[i]
+
+                            # Set storage levels
+                            bess_SOC_MWh[i] = py_round(
+                                bess_SOC_MWh[i] if (bess_el_in_MWh[i] != 0 or bess_el_out_MWh[i] != 0) else
+                                bess_SOC_MWh[i - 1], 10)
+                            ch2_SOC[i] = py_round(
+                                ch2_SOC[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else ch2_SOC[i - 1], 10)
+                            ch2_avg_ci_gCO2pMJ[i] = py_round(
+                                ch2_avg_ci_gCO2pMJ[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else
+                                ch2_avg_ci_gCO2pMJ[i - 1], 10)
+
+                        else:
+
+                            # Supply Syn Standby-demand through RES, BESS and grid
+                            operation_mode[i] |= op_mode_bits(16, False)
+
+                            syn_el_in_MWh[i] = c08_demand_system_min * c08_syn_p_total_share
+
+                            bess_el_out_MWh[i] = min(bess_SOC_MWh[i - 1] / BESS_discharge_eff, BESS_Pnom_MW)
+                            bess_el_discharge_MWh[i] = bess_el_out_MWh[i] / BESS_discharge_eff
+                            bess_el_loss_MWh[i] = bess_el_discharge_MWh[i] - bess_el_out_MWh[i]
+                            bess_SOC_MWh[i] = bess_SOC_MWh[i - 1] - bess_el_discharge_MWh[i]
+
+                            p_Grid_MW[i] = syn_el_in_MWh[i] - bess_el_out_MWh[i] - p_Total_RES_MW[i]
+                            syn_el_in_grid_MWh[i] = p_Grid_MW[i]
+
+                            # Set storage levels
+                            bess_SOC_MWh[i] = py_round(
+                                bess_SOC_MWh[i] if (bess_el_in_MWh[i] != 0 or bess_el_out_MWh[i] != 0) else
+                                bess_SOC_MWh[i - 1], 10)
+                            ch2_SOC[i] = py_round(
+                                ch2_SOC[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else ch2_SOC[i - 1], 10)
+                            ch2_avg_ci_gCO2pMJ[i] = py_round(
+                                ch2_avg_ci_gCO2pMJ[i] if (ch2_in_tH2[i] != 0 or ch2_out_tH2[i] != 0) else
+                                ch2_avg_ci_gCO2pMJ[i - 1], 10)
+
+        # Set total consumption
+        p_Total_consump_MW[i] = el_el_in_MW[i] + syn_el_in_MWh[i] + bess_el_in_MWh[i] + ch2_comp_el_in_MWh[i]
+
+    return 0, 0
+
+
+def warm_up():
+    """Loads dispatch_kernel() from the cache (or compiles it) in this process by calculating the default plant, e.g.
+    in the initializer of worker processes, so that their first plant calculation does not wait for it."""
+    from plant_init import plant_init
+    plant_calc_jit(plant_init(), columns=['ch2_SOC'])
+
+
+def plant_calc_jit(plant_config, columns=pc.output_columns, aggregates=False):
+    """Returns df_out of plant_calc(plant_config) with the given columns (or their PlantAggregates if aggregates is
+    True), calculated by the JIT-compiled dispatch_kernel()."""
+
+    # Set up Modul Objects with plant parameters
+    RES_Asset_Wind, RES_Asset_PV, Grid, BESS, H2Storage, Compressor, Electrolysis, HaberBosch = pc.init_plant(plant_config)
+
+    # Economic & System variables/constants
+    energy_density_NH3_MJpkgNH3 = plant_config['Economic_System']['energy_density_NH3_MJpkgNH3']['value']
+    energy_density_H2_MJpkgH2 = plant_config['Economic_System']['energy_density_H2_MJpkgH2']['value']
+
+    # Load RES capacity factor profiles and set up the calc_data arrays
+    Wind_profile, PV_profile = res_data.load_res_profiles()
+    timesteps = len(PV_profile.CF) + 1
+    calc_data = pc.init_calc_data(timesteps, Wind_profile, PV_profile, RES_Asset_Wind, RES_Asset_PV, BESS, H2Storage,
+                                  Electrolysis)
+    operation_mode = np.zeros(timesteps, dtype=np.int64)
+
+    # Operating envelope and row index of the month starting at each time step
+    calendar = Wind_profile.calendar()
+    envelope = pc.operating_envelope(plant_config, calendar=calendar)
+    month_envelope = np.full(timesteps, -1, dtype=np.int64)
+    month_envelope[calendar.month_start + 1] = np.arange(len(calendar.month_start))
+
+    status, i = dispatch_kernel(
+        calc_data['p_Total_RES_MW'],
+        month_envelope,
+        envelope[envelope_columns].to_numpy(dtype=np.float64),
+        tuple(calc_data[column] for column in kernel_columns),
+        operation_mode,
+        float(BESS.Pnom_MW),
+        float(BESS.flex_use),
+        float(H2Storage.capacity_tH2),
+        float(H2Storage.flex_use),
+        float(Compressor.specific_el_MWhptH2),
+        float(Electrolysis.capacity_MW),
+        float(Electrolysis.min_Load),
+        float(HaberBosch.capacity_tNH3ph),
+        float(HaberBosch.specific_el_MWhptNH3),
+        float(HaberBosch.specific_H2_tH2ptNH3),
+        int(HaberBosch.restart_delay_h),
+        float(Grid.ci_gCO2pkWh),
+        float(energy_density_NH3_MJpkgNH3),
+        float(energy_density_H2_MJpkgH2)
+    )
+
+    if status:
+        raise ValueError(f"Error in Iteration {i} - {errors[status]}")
+
+    # ELY & Syn Shutdown behavior
+    pc.track_shutdown(calc_data['syn_NH3_out_tNH3'], calc_data['syn_shutdown'])
+    pc.track_shutdown(calc_data['el_H2_out_tH2'], calc_data['el_shutdown'])
+
+    if aggregates:
+        return pc.output_aggregates(calc_data, calendar, columns)
+
+    # Set up df_out column-wise from the calc_data arrays (numeric columns are not copied)
+    DateTimes = [datetime.fromtimestamp(0).strftime('%Y-%m-%d %H:%M')] + Wind_profile.DateTimes_str()
+    df_out = pc.output_frame(calc_data, operation_mode, DateTimes, columns)
+
+    return df_out
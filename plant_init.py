@@ -2,8 +2,14 @@
 # plant_init() takes in **kwargs for all technical, economic and regulatory plant variables that describe a plant
 # configuration and returns them in a dictionary.
 # plant_init() also stores default values for each variable in case no **kwargs are called/defined.
+# Each parameter is either technical (it enters plant_calc()) or economic (it only enters the cash-flow model of
+# kpi_calc()). Plant configurations that differ in economic parameters only share the same plant calculation, see
+# parameter_class() and technical_groups().
 #################################################################################################################
 
+import inspect
+
+
 def plant_init(
         # RES Assets
         RES_Asset_Wind_Pnom_MW=150,
@@ -278,4 +284,42 @@ def plant_init(
         }
     }
 
-    return plant_config
\ No newline at end of file
+    return plant_config
+
+# Names of the plant_init() parameters
+plant_init_parameters = list(inspect.signature(plant_init).parameters)
+
+# plant_init() parameters that only enter kpi_calc() (cash-flow model), never plant_calc(), and their plant_config keys
+economic_parameters = {
+    'RES_Asset_Wind_PPA_price_EURpMWh': ('RES_Asset_Wind', 'PPA_price_EURpMWh'),
+    'RES_Asset_PV_PPA_price_EURpMWh': ('RES_Asset_PV', 'PPA_price_EURpMWh'),
+    'BESS_specific_cost_EURpMWh': ('BESS', 'specific_cost_EURpMWh'),
+    'BESS_specific_replacement_cost_EURpMWh': ('BESS', 'specific_replacement_cost_EURpMWh'),
+    'H2Storage_specific_cost_EURptH2': ('H2Storage', 'specific_cost_EURptH2'),
+    'Electrolysis_specific_cost_EURpMW': ('Electrolysis', 'specific_cost_EURpMW'),
+    'Electrolysis_specific_replacement_cost_EURpMW': ('Electrolysis', 'specific_replacement_cost_EURpMW'),
+    'HaberBosch_specific_cost_EURptNH3ph': ('HaberBosch', 'specific_cost_EURptNH3ph'),
+    'WACC': ('Economic_System', 'WACC'),
+    'CPI': ('Economic_System', 'CPI'),
+    'construction_phase_a': ('Economic_System', 'construction_phase_a'),
+    'grid_el_price_EURpMWh': ('Economic_System', 'grid_el_price_EURpMWh'),
+    'RES_Surplus_sales_price_EURpMWh': ('Economic_System', 'RES_surplus_sales_price'),
+    'O_M_CapEx_share': ('Economic_System', 'O_M_CapEx_share')
+}
+
+
+def parameter_class(name):
+    """Returns 'economic' for plant_init() parameters that only enter kpi_calc() and 'technical' for all others."""
+    if name not in plant_init_parameters:
+        raise ValueError(f"Invalid plant_init() parameter {name!r}")
+    return 'economic' if name in economic_parameters else 'technical'
+
+
+def technical_groups(kwargs_list):
+    """Returns the indices of a list of plant_init() **kwargs, grouped by their technical parameters (in order of first
+    occurrence). All plant configurations of a group share the same plant_calc() output."""
+    groups = {}
+    for n, kwargs in enumerate(kwargs_list):
+        key = tuple(sorted((name, value) for name, value in kwargs.items() if parameter_class(name) == 'technical'))
+        groups.setdefault(key, []).append(n)
+    return list(groups.values())
@@ -0,0 +1,247 @@
+#################################################################################################################
+# res_data provides the renewable energy source (RES) capacity factor profiles used by plant_calc().
+# Each TS_Multiyear_*.csv is parsed once and stored beside the source file in binary NumPy format (.npy). From then
+# on the profile is served from that cache for as long as the source file path, size and modification time match
+# the fingerprint stored alongside the cached arrays. Replacing or editing a .csv invalidates its cache.
+# Optionally the cached arrays are memory-mapped read-only, so that parallel worker processes share one copy of the
+# profiles through the OS page cache instead of each holding its own.
+# Each profile also provides a calendar index (RES_Calendar) with integer month/year ids, month/year boundary indices,
+# days per month and the annual (leap-year aware) share of each month, which is built once and reused by plant_calc(),
+# kpi_calc() and visualize() instead of parsing the time stamp strings.
+#################################################################################################################
+
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# RES profiles used by plant_calc()
+file_path_Wind = r'RES_Data/20241126_Run_5_Wind_DE-SH_10_years_2010-01-01_2020-12-31/TS_Multiyear_Wind_DE-SH_2010-01-01_2020-12-31.csv'
+file_path_PV = r'RES_Data/20241126_Run_6_PV_DE-BY_10_years_2010-01-01_2020-12-31/TS_Multiyear_PV_DE-BY_2010-01-01_2020-12-31.csv'
+
+# In-process store of loaded profiles, keyed on the source fingerprint and memory-map mode
+_profiles = {}
+
+# Memory-map mode used by load_res_profiles() (None = load arrays into process memory, 'r' = read-only memory-map)
+default_mmap_mode = None
+
+# Default of load_res_profiles(mmap_mode=...): no mode given, default_mmap_mode applies
+_default = object()
+
+
+class RES_Profile:
+    def __init__(
+            self,
+            file_path,
+            DateTimes,
+            CF
+    ):
+        self.file_path = file_path
+        self.DateTimes = DateTimes  # numpy datetime64[m] array (UTC)
+        self.CF = CF  # numpy float64 array of hourly capacity factors
+        self._DateTimes_str = None
+        self._calendar = None
+
+    def calendar(self):
+        """Returns the RES_Calendar of the profile time stamps."""
+        if self._calendar is None:
+            self._calendar = build_calendar(self.DateTimes)
+        return self._calendar
+
+    def DateTimes_str(self):
+        """Returns the time stamps as a list of '%Y-%m-%d %H:%M' strings, as found in the source .csv."""
+        if self._DateTimes_str is None:
+            self._DateTimes_str = np.char.replace(np.datetime_as_string(self.DateTimes, unit='m'), 'T', ' ').tolist()
+        return self._DateTimes_str
+
+
+class RES_Calendar:
+    def __init__(
+            self,
+            DateTimes
+    ):
+        # Hourly time stamps
+        self.DateTimes = DateTimes
+        months = DateTimes.astype('datetime64[M]')
+        years = DateTimes.astype('datetime64[Y]')
+
+        # Month/year boundary indices: position of the first hour of each month/year
+        self.month_start = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+        self.year_start = np.flatnonzero(np.r_[True, years[1:] != years[:-1]])
+
+        # Integer month/year ids of each hour (0 = first month/year of the profile)
+        self.month_id = np.repeat(np.arange(len(self.month_start)), np.diff(np.r_[self.month_start, len(DateTimes)]))
+        self.year_id = np.repeat(np.arange(len(self.year_start)), np.diff(np.r_[self.year_start, len(DateTimes)]))
+
+        # Calendar month and year of each month
+        month_first = months[self.month_start]
+        year_first = month_first.astype('datetime64[Y]')
+        self.month = month_first.astype(np.int64) % 12 + 1
+        self.year = year_first.astype(np.int64) + 1970
+
+        # Days of each month and of its year, leap years and the annual share of each month
+        self.days_month = ((month_first + 1).astype('datetime64[D]') - month_first.astype('datetime64[D]')).astype(np.int64)
+        self.days_year = ((year_first + 1).astype('datetime64[D]') - year_first.astype('datetime64[D]')).astype(np.int64)
+        self.leap_year = self.days_year == 366
+        self.annual_share = self.days_month / self.days_year
+
+    def __len__(self):
+        return len(self.DateTimes)
+
+
+def build_calendar(DateTimes):
+    """Returns the RES_Calendar of hourly time stamps (datetime64 array or '%Y-%m-%d %H:%M' strings)."""
+    return RES_Calendar(DateTimes=np.asarray(DateTimes).astype('datetime64[m]'))
+
+
+def res_fingerprint(file_path):
+    """Returns the identity of a source .csv the binary cache is keyed on (path, size and mtime)."""
+    stat = os.stat(file_path)
+    return {
+        'path': os.path.abspath(file_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns
+    }
+
+
+def cache_paths(file_path):
+    """Returns the file paths of the binary cache stored beside a source .csv."""
+    return {
+        'DateTimes': file_path + '.DateTimes.npy',
+        'CF': file_path + '.CF.npy',
+        'meta': file_path + '.meta.json'
+    }
+
+
+def _write_atomic(file_path, write):
+    # Write to a temporary file first and move it in place, so that concurrent readers never see partial files
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, file_path)
+
+
+def _parse_csv(file_path):
+    df = pd.read_csv(file_path, names=['DateTimes', 'CF'], header=None, index_col='DateTimes', skiprows=4)
+    DateTimes = df.index.to_numpy().astype('datetime64[m]')
+    CF = df['CF'].to_numpy(dtype=np.float64)
+    return DateTimes, CF
+
+
+def _read_cache(file_path, fingerprint, mmap_mode=None):
+    paths = cache_paths(file_path)
+    try:
+        with open(paths['meta'], 'r') as f:
+            meta = json.load(f)
+        if meta != fingerprint:
+            return None
+        DateTimes = np.load(paths['DateTimes'], mmap_mode=mmap_mode)
+        CF = np.load(paths['CF'], mmap_mode=mmap_mode)
+    except (OSError, ValueError):
+        return None
+
+    if len(DateTimes) != len(CF):
+        return None
+
+    return DateTimes, CF
+
+
+def _write_cache(file_path, fingerprint, DateTimes, CF):
+    paths = cache_paths(file_path)
+    _write_atomic(paths['DateTimes'], lambda f: np.save(f, DateTimes))
+    _write_atomic(paths['CF'], lambda f: np.save(f, CF))
+
+    # The fingerprint is written last and marks the cache as complete
+    _write_atomic(paths['meta'], lambda f: f.write(json.dumps(fingerprint).encode()))
+
+
+def load_res_profile(file_path, mmap_mode=None):
+    """Returns the RES_Profile of a TS_Multiyear_*.csv, parsing the .csv only if no valid binary cache exists.
+    With mmap_mode='r' the profile arrays are read-only memory-maps of the cache files instead of in-memory copies."""
+    if mmap_mode not in (None, 'r'):
+        raise ValueError(f"Invalid mmap_mode {mmap_mode!r} - RES profiles can only be memory-mapped read-only ('r')")
+
+    fingerprint = res_fingerprint(file_path)
+    key = tuple(fingerprint.values()) + (mmap_mode,)
+
+    if key in _profiles:
+        return _profiles[key]
+
+    cached = _read_cache(file_path, fingerprint, mmap_mode=mmap_mode)
+
+    if cached is None:
+        DateTimes, CF = _parse_csv(file_path)
+        try:
+            _write_cache(file_path, fingerprint, DateTimes, CF)
+        except OSError as e:
+            print(f"RES profile cache for {file_path} could not be written: {e}")
+
+        # Memory-map the freshly written cache, falling back to the parsed arrays if it is unavailable
+        if mmap_mode:
+            cached = _read_cache(file_path, fingerprint, mmap_mode=mmap_mode)
+
+    if cached is not None:
+        DateTimes, CF = cached
+
+    # Profiles are shared between plant calculations and must not be altered
+    DateTimes.flags.writeable = False
+    CF.flags.writeable = False
+
+    profile = RES_Profile(file_path=file_path, DateTimes=DateTimes, CF=CF)
+    _profiles[key] = profile
+
+    return profile
+
+
+def load_res_profiles(mmap_mode=_default):
+    """Returns the Wind and PV RES_Profile used by plant_calc(). mmap_mode defaults to default_mmap_mode, an explicit
+    mmap_mode=None loads in-memory copies regardless of it (as np.load())."""
+    mmap_mode = default_mmap_mode if mmap_mode is _default else mmap_mode
+    return load_res_profile(file_path_Wind, mmap_mode=mmap_mode), load_res_profile(file_path_PV, mmap_mode=mmap_mode)
+
+
+def init_worker(mmap_mode='r'):
+    """Initializer for worker processes of parallel plant calculations (e.g. multiprocessing.Pool(initializer=...)).
+    Attaches the worker to the memory-mapped profile cache once, so that all plant_calc() calls of the worker share
+    the same read-only pages as every other worker. Call load_res_profiles() in the parent process beforehand, so
+    that the cache exists and the workers never parse the .csv themselves."""
+    global default_mmap_mode
+    default_mmap_mode = mmap_mode
+    load_res_profiles()
+
+
+def clear_cache(file_path=None):
+    """Removes the in-process profiles and the binary cache files of one (or both default) source .csv."""
+    _profiles.clear()
+    for path in [file_path] if file_path else [file_path_Wind, file_path_PV]:
+        for cache_path in cache_paths(path).values():
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+
+
+if __name__ == '__main__':
+    # Report cold (parse .csv + write cache), warm (read binary cache) and in-process load times
+
+    clear_cache()
+    start_time = time.perf_counter()
+    load_res_profiles()
+    end_time = time.perf_counter()
+    print(f"Cold load runtime (.csv): {end_time - start_time:.6f} seconds")
+
+    _profiles.clear()
+    start_time = time.perf_counter()
+    load_res_profiles()
+    end_time = time.perf_counter()
+    print(f"Warm load runtime (.npy cache): {end_time - start_time:.6f} seconds")
+
+    start_time = time.perf_counter()
+    load_res_profiles()
+    end_time = time.perf_counter()
+    print(f"Warm load runtime (in-process): {end_time - start_time:.6f} seconds")
+
+    _profiles.clear()
+    start_time = time.perf_counter()
+    load_res_profiles(mmap_mode='r')
+    end_time = time.perf_counter()
+    print(f"Warm load runtime (memory-mapped .npy cache): {end_time - start_time:.6f} seconds")
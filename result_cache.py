@@ -0,0 +1,175 @@
+#################################################################################################################
+# result_cache stores the results of plant_calc() in a local cache directory, so that plant configurations that were
+# calculated before (e.g. by an earlier scenario calculation or sweep) are not calculated again.
+# The cache is opt-in: it is used once enabled with enable() (or per call with plant_calc(cache=True)). Enable it before
+# worker processes are started, so that they inherit the setting. The cache directory defaults to Result_Cache next to
+# this module, a directory given to enable() is made absolute, so the cache never depends on the working directory.
+# Entries are content-addressed: the key of a plant_calc() result is a hash of the simulation relevant part of
+# plant_config (all but the economic parameters, see plant_init.economic_parameters), the selected output, the RES
+# profile fingerprints (see res_data) and the source code of the calculation modules. Changing a RES profile or the
+# calculation code therefore never returns stale results.
+# The cache is bounded to max_size_bytes: when exceeded, the least recently used entries are evicted. Hits, misses,
+# stores and evictions of the process are counted in stats (see cache_stats()).
+#################################################################################################################
+
+import hashlib
+import json
+import os
+import pickle
+import numpy as np
+import res_data
+from plant_init import economic_parameters
+
+# Cache directory, size limit of the cached entries and cache switch (default of plant_calc(cache=...), see enable())
+cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Result_Cache')
+max_size_bytes = 2 * 1024 ** 3
+enabled = False
+
+# Modules whose source code determines the cached results
+code_modules = ['plant_calc.py', 'plant_calc_jit.py', 'modul.py', 'functions.py', 'res_data.py']
+
+# Cache statistics of the process
+stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+_code_fingerprints = {}
+
+
+def enable(directory=None, max_size=None):
+    """Enables the cache for all plant_calc() calls of the process (and of worker processes started afterwards),
+    optionally in directory (made absolute) and bounded to max_size bytes."""
+    global cache_dir, max_size_bytes, enabled
+    if directory is not None:
+        cache_dir = os.path.abspath(directory)
+    if max_size is not None:
+        if not max_size > 0:
+            raise ValueError(f"Invalid cache size {max_size!r} - max_size has to be > 0")
+        max_size_bytes = max_size
+    enabled = True
+
+
+def disable():
+    """Disables the cache (the default). Cached entries are kept."""
+    global enabled
+    enabled = False
+
+
+def code_fingerprint(modules=None):
+    """Returns the hash of the source code of modules (default: code_modules), calculated once per process."""
+    modules = tuple(code_modules if modules is None else modules)
+    if modules not in _code_fingerprints:
+        digest = hashlib.sha256()
+        for module in modules:
+            with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), module), 'rb') as f:
+                digest.update(f.read())
+        _code_fingerprints[modules] = digest.hexdigest()
+    return _code_fingerprints[modules]
+
+
+def simulation_config(plant_config):
+    """Returns plant_config without the economic parameters, which do not enter plant_calc()."""
+    economic_keys = set(economic_parameters.values())
+    return {group: {key: value for key, value in group_config.items() if (group, key) not in economic_keys}
+            for group, group_config in plant_config.items()}
+
+
+def _key(kind, *parts):
+    # Stable hash of JSON serializable parts
+    text = json.dumps([kind, code_fingerprint(), *parts], sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def plant_calc_key(plant_config, columns, aggregates, ledger='exact'):
+    """Returns the cache key of plant_calc(plant_config, columns=columns, aggregates=aggregates, ledger=ledger)."""
+    fingerprints = [res_data.res_fingerprint(file_path) for file_path in (res_data.file_path_Wind, res_data.file_path_PV)]
+    return _key('plant_calc', simulation_config(plant_config), list(columns), bool(aggregates), ledger, fingerprints)
+
+
+def _entry_path(key):
+    return os.path.join(cache_dir, f"{key}.pkl")
+
+
+def get(key):
+    """Returns the cached result of key or None (miss). A hit marks the entry as most recently used."""
+    path = _entry_path(key)
+    try:
+        with open(path, 'rb') as f:
+            result = pickle.load(f)
+        os.utime(path)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        stats['misses'] += 1
+        return None
+
+    stats['hits'] += 1
+    return result
+
+
+def put(key, result):
+    """Stores result under key and evicts the least recently used entries if the cache exceeds max_size_bytes."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _entry_path(key)
+
+    # Write to a temporary file first and move it in place, so that concurrent readers never see partial entries
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Result cache entry {path} could not be written: {e}")
+        return
+
+    stats['stores'] += 1
+    evict()
+
+
+def _entries():
+    # (last use, size, path) of the cache entries
+    entries = []
+    try:
+        with os.scandir(cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.pkl'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:  # evicted by another process
+                        continue
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def evict(max_size=None):
+    """Removes the least recently used entries until the cache size is at most max_size (default max_size_bytes)."""
+    max_size = max_size_bytes if max_size is None else max_size
+    entries = sorted(_entries())
+    size = sum(entry[1] for entry in entries)
+
+    for _, entry_size, path in entries:
+        if size <= max_size:
+            break
+        try:
+            os.remove(path)
+            stats['evictions'] += 1
+        except FileNotFoundError:
+            pass
+        size -= entry_size
+
+
+def cache_stats():
+    """Returns the hit/miss/store/eviction counts of the process, the hit rate and the number and size of entries."""
+    entries = _entries()
+    lookups = stats['hits'] + stats['misses']
+    return {
+        **stats,
+        'hit_rate': stats['hits'] / lookups if lookups else np.nan,
+        'entries': len(entries),
+        'size_bytes': sum(entry[1] for entry in entries)
+    }
+
+
+def clear():
+    """Removes all cache entries and resets the statistics."""
+    evict(max_size=0)
+    for key in stats:
+        stats[key] = 0
@@ -0,0 +1,242 @@
+#################################################################################################################
+# surrogate fits a model of the KPIs of kpi_calc() as functions of plant_init() parameters from stored sweep results
+# (result stores of sweep.run_sweep() or the results of main_sensitivity_2D.calc_2D()), so that KPIs at other plant
+# configurations are answered without plant calculation.
+# Each KPI is interpolated by a radial basis function (cubic kernel r^3 plus linear polynomial) over the parameters
+# scaled to their sampled range. All KPIs share one kernel system, which is inverted once; the leave-one-out
+# cross-validation error of every sample and KPI follows from the inverse without refitting (Rippa's formula).
+# A query point is trusted if it lies within the sampled range of each parameter and within trust_radius of the nearest
+# sample, otherwise the surrogate refuses to answer (run plant_calc() instead, e.g. query(..., fallback=True)).
+# Surrogates are persisted to a single .npz file (save(), load_surrogate()).
+#################################################################################################################
+
+import time
+import numpy as np
+import pandas as pd
+from plant_init import plant_init_parameters
+from sweep import block_results, read_results
+
+# Trust radius of a surrogate, relative to the largest nearest-neighbour distance between its samples
+default_trust_factor = 1.0
+
+
+def _kernel(r):
+    # Cubic radial basis function
+    return r ** 3
+
+
+def _distances(x, centers):
+    # Euclidean distances between the rows of x and of centers
+    return np.sqrt(np.maximum(
+        (x ** 2).sum(axis=1)[:, None] + (centers ** 2).sum(axis=1)[None, :] - 2.0 * x @ centers.T, 0.0))
+
+
+class Surrogate:
+    def __init__(
+            self,
+            parameters,
+            kpis,
+            low,
+            high,
+            centers,
+            coef,
+            poly_coef,
+            trust_radius,
+            cv_errors
+    ):
+        self.parameters = parameters  # plant_init() parameter names (model inputs)
+        self.kpis = kpis  # KPI names (model outputs)
+        self.low = low  # sampled range of each parameter, scaled to 0..1
+        self.high = high
+        self.centers = centers  # scaled sample points (samples x parameters)
+        self.coef = coef  # kernel coefficients (samples x KPIs)
+        self.poly_coef = poly_coef  # linear polynomial coefficients (1 + parameters x KPIs)
+        self.trust_radius = trust_radius  # in scaled coordinates
+        self.cv_errors = cv_errors  # DataFrame of the leave-one-out errors of each KPI
+
+    def _scale(self, x):
+        x = np.atleast_2d(np.asarray(x, dtype=np.float64))
+        return (x - self.low) / np.where(self.high > self.low, self.high - self.low, 1.0)
+
+    def _points(self, points):
+        # Parameter array (points x parameters) of a DataFrame, a dictionary or a list of dictionaries of parameters
+        if isinstance(points, dict):
+            return np.array([[points[name] for name in self.parameters]], dtype=np.float64)
+        if isinstance(points, pd.DataFrame):
+            return points[self.parameters].to_numpy(dtype=np.float64)
+        return np.array([[point[name] for name in self.parameters] for point in points], dtype=np.float64)
+
+    def predict(self, points, kpis=None):
+        """Returns the KPIs (DataFrame, optionally only the given kpis) at points (parameter DataFrame, dictionary or
+        list of dictionaries), regardless of the trusted region (see trusted())."""
+        columns = [self.kpis.index(kpi) for kpi in kpis] if kpis is not None else slice(None)
+        x = self._scale(self._points(points))
+        values = _kernel(_distances(x, self.centers)) @ self.coef[:, columns]
+        values += np.c_[np.ones(len(x)), x] @ self.poly_coef[:, columns]
+        return pd.DataFrame(values, columns=kpis if kpis is not None else self.kpis)
+
+    def trusted(self, points):
+        """Returns for each of the points whether it lies in the trusted region: within the sampled range of every
+        parameter and within trust_radius of the nearest sample."""
+        x = self._scale(self._points(points))
+        in_range = ((x >= -1e-12) & (x <= 1 + 1e-12)).all(axis=1)
+        return in_range & (_distances(x, self.centers).min(axis=1) <= self.trust_radius)
+
+    def query(self, kwargs, fallback=False):
+        """Returns the KPI dictionary at one plant configuration (plant_init() **kwargs of the surrogate parameters).
+        Points outside the trusted region raise ValueError, or are calculated by plant_calc() and kpi_calc() if
+        fallback=True."""
+        x = self._scale(self._points(kwargs))
+        distances = _distances(x, self.centers)
+        if not (((x >= -1e-12) & (x <= 1 + 1e-12)).all() and distances.min() <= self.trust_radius):
+            if fallback:
+                row = block_results(([0], [kwargs]))[0]
+                return {kpi: row[kpi] for kpi in self.kpis}
+            raise ValueError(f"{kwargs} is outside the trusted region of the surrogate - run plant_calc()")
+
+        values = _kernel(distances) @ self.coef + np.c_[np.ones(1), x] @ self.poly_coef
+        return dict(zip(self.kpis, values[0].tolist()))
+
+    def save(self, file_path):
+        """Stores the surrogate to file_path (.npz)."""
+        np.savez(
+            file_path,
+            parameters=np.array(self.parameters),
+            kpis=np.array(self.kpis),
+            low=self.low,
+            high=self.high,
+            centers=self.centers,
+            coef=self.coef,
+            poly_coef=self.poly_coef,
+            trust_radius=self.trust_radius,
+            cv_errors=self.cv_errors.to_numpy(),
+            cv_columns=np.array(self.cv_errors.columns.tolist(), dtype=str)
+        )
+
+
+def load_surrogate(file_path):
+    """Returns the Surrogate stored to file_path by Surrogate.save()."""
+    with np.load(file_path, allow_pickle=False) as data:
+        kpis = data['kpis'].tolist()
+        return Surrogate(
+            parameters=data['parameters'].tolist(),
+            kpis=kpis,
+            low=data['low'],
+            high=data['high'],
+            centers=data['centers'],
+            coef=data['coef'],
+            poly_coef=data['poly_coef'],
+            trust_radius=float(data['trust_radius']),
+            cv_errors=pd.DataFrame(data['cv_errors'], index=pd.Index(kpis, name='KPI'),
+                                   columns=data['cv_columns'].tolist())
+        )
+
+
+def fit_surrogate(df_results, parameters=None, kpis=None, smoothing=0.0, trust_factor=default_trust_factor):
+    """Returns the Surrogate of kpis (default: all KPI columns that are finite at every sample) over parameters
+    (default: all plant_init() parameter columns) fitted to sweep results (DataFrame of parameter and KPI columns, e.g.
+    sweep.read_results()). Samples of equal parameters are averaged. smoothing > 0 gives a smoothing instead of an
+    interpolating fit."""
+    if parameters is None:
+        parameters = [column for column in df_results.columns if column in plant_init_parameters]
+    if kpis is None:
+        kpis = [column for column in df_results.columns if column not in parameters + ['point', 'level']]
+    kpis = [kpi for kpi in kpis if np.isfinite(df_results[kpi].to_numpy(dtype=np.float64)).all()]
+    if not parameters or not kpis:
+        raise ValueError("Sweep results without parameter or finite KPI columns cannot be fitted")
+
+    df_samples = df_results.groupby(parameters, as_index=False)[kpis].mean()
+    samples = df_samples[parameters].to_numpy(dtype=np.float64)
+    values = df_samples[kpis].to_numpy(dtype=np.float64)
+    n, d = samples.shape
+    if n < d + 2:
+        raise ValueError(f"{n} distinct samples are too few to fit a surrogate of {d} parameters")
+
+    # Parameters of constant value do not enter the kernel distances (scaled to 0)
+    low, high = samples.min(axis=0), samples.max(axis=0)
+    centers = (samples - low) / np.where(high > low, high - low, 1.0)
+
+    # Kernel system with linear polynomial: [[A + smoothing I, P], [P^T, 0]] [coef; poly_coef] = [values; 0]
+    P = np.c_[np.ones(n), centers]
+    system = np.zeros((n + d + 1, n + d + 1))
+    system[:n, :n] = _kernel(_distances(centers, centers)) + smoothing * np.eye(n)
+    system[:n, n:] = P
+    system[n:, :n] = P.T
+
+    # Constant parameters give zero polynomial columns, which are regularized to keep the system regular
+    constant = np.flatnonzero(high == low)
+    system[n + 1 + constant, n + 1 + constant] = 1.0
+
+    inverse = np.linalg.inv(system)
+    solution = inverse[:, :n] @ values
+    coef, poly_coef = solution[:n], solution[n:]
+
+    # Leave-one-out errors (Rippa): error_i = coef_i / inverse_ii
+    loo = coef / np.diag(inverse)[:n, None]
+    spread = values.std(axis=0)
+    cv_errors = pd.DataFrame({
+        'rmse': np.sqrt((loo ** 2).mean(axis=0)),
+        'max_abs': np.abs(loo).max(axis=0),
+        'relative_rmse': np.sqrt((loo ** 2).mean(axis=0)) / np.where(spread > 0, spread, 1.0)
+    }, index=pd.Index(kpis, name='KPI'))
+
+    # Trust radius: trust_factor times the largest distance of a sample to its nearest neighbour (sampling density)
+    distances = _distances(centers, centers)
+    np.fill_diagonal(distances, np.inf)
+    trust_radius = trust_factor * distances.min(axis=1).max()
+
+    return Surrogate(parameters=parameters, kpis=kpis, low=low, high=high, centers=centers, coef=coef,
+                     poly_coef=poly_coef, trust_radius=trust_radius, cv_errors=cv_errors)
+
+
+def results_from_2D(data):
+    """Returns the sweep results (DataFrame) of the data stored by main_sensitivity_2D (xy_input_data, KPI_total)."""
+    xy_input_data = data["xy_input_data"]
+    x, y = zip(*xy_input_data["xy_input"])
+    return pd.DataFrame({xy_input_data["x"]: x, xy_input_data["y"]: y, **data["KPI_total"]})
+
+
+def surrogate_from_store(path, **kwargs):
+    """Returns the Surrogate fitted to the results in the result store at path (see sweep.run_sweep())."""
+    return fit_surrogate(read_results(path), **kwargs)
+
+
+if __name__ == '__main__':
+    # Surrogate of a 9 x 9 Wind x PV capacity sweep: cross-validation errors, query runtime and trusted region
+
+    import os
+    import tempfile
+    from sweep import linear_axis, grid_points, run_sweep
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'sweep')
+        run_sweep(grid_points([
+            linear_axis('RES_Asset_Wind_Pnom_MW', 100, 300, 9),
+            linear_axis('RES_Asset_PV_Pnom_MW', 50, 250, 9)
+        ]), path)
+
+        start_time = time.perf_counter()
+        surrogate = surrogate_from_store(path)
+        end_time = time.perf_counter()
+        print(f"Surrogate fit runtime: {end_time - start_time:.6f} seconds")
+        print(surrogate.cv_errors)
+
+        surrogate.save(os.path.join(directory, 'surrogate.npz'))
+        surrogate = load_surrogate(os.path.join(directory, 'surrogate.npz'))
+
+        point = {'RES_Asset_Wind_Pnom_MW': 180.0, 'RES_Asset_PV_Pnom_MW': 95.0}
+        runs = 10000
+        start_time = time.perf_counter()
+        for _ in range(runs):
+            dict_KPI = surrogate.query(point)
+        end_time = time.perf_counter()
+        print(f"Surrogate query runtime: {(end_time - start_time) / runs * 1e6:.2f} microseconds")
+
+        row = block_results(([0], [point]))[0]
+        print(f"LCOA surrogate: {dict_KPI['LCOA - monthly (EUR/tNH3)']:.4f}, "
+              f"plant_calc(): {row['LCOA - monthly (EUR/tNH3)']:.4f}")
+
+        try:
+            surrogate.query({'RES_Asset_Wind_Pnom_MW': 400.0, 'RES_Asset_PV_Pnom_MW': 95.0})
+        except ValueError as e:
+            print(e)
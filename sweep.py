@@ -0,0 +1,606 @@
+#################################################################################################################
+# sweep evaluates the KPIs of plant configurations over any number of plant_init() parameters. Sweep points are
+# defined by axes (linear, logarithmic or listed values) and generated lazily, either as the full grid of all axes or as
+# Latin-hypercube / Sobol samples of the axis ranges. Each result is streamed to an append-only columnar result store
+# (one binary file per column) as soon as it is calculated, so that the memory use does not grow with the number of
+# points and partial results can be read with read_results() while the sweep is still running.
+# An interrupted sweep resumes from its result store: run_sweep() skips the points whose results are already stored.
+# The schema of a result store holds the fingerprint of the calculation (source code, plant_init() defaults and RES
+# profiles, see sweep_fingerprint()), a store of another calculation or of other points is never resumed.
+# adaptive_sweep() starts from the coarse grid of the axes and refines only the grid cells of lowest or steepest
+# changing LCOA (or another KPI), which finds the optimum of the dense grid with a fraction of its plant calculations.
+# With tol it stops refining the cells whose KPI values differ by less than tol.
+#################################################################################################################
+
+import hashlib
+import itertools
+import json
+import numbers
+import os
+import time
+import warnings
+import numpy as np
+import pandas as pd
+import res_data
+import result_cache
+from plant_calc import plant_calc, parallel_imap
+from plant_init import plant_init, parameter_class, technical_groups
+from kpi_calc import kpi_calc
+
+# Rows buffered by ResultSink before they are appended to the column files
+default_flush_rows = 256
+
+# Modules whose source code determines the stored KPIs (see sweep_fingerprint())
+fingerprint_modules = result_cache.code_modules + ['kpi_calc.py', 'plant_init.py']
+
+# Latin-hypercube jitter is drawn in blocks of this size, so that point values do not depend on the block size used
+# to generate the points
+_jitter_block = 4096
+
+# Rounds of the Feistel network that permutes the Latin-hypercube strata (see _permutation())
+_feistel_rounds = 4
+
+
+def _check_numeric(name, values):
+    # Result stores hold float64 columns, parameter values have to be numbers
+    for value in values:
+        if not isinstance(value, numbers.Real):
+            raise ValueError(f"Invalid value {value!r} of sweep parameter {name!r} - sweep parameters have to be "
+                             f"numbers (result stores hold float64 columns)")
+
+
+class Axis:
+    def __init__(
+            self,
+            name,
+            values,
+            scale=None
+    ):
+        parameter_class(name)  # raises ValueError for invalid plant_init() parameters
+        if len(values) == 0:
+            raise ValueError(f"Axis {name!r} has no values")
+        _check_numeric(name, values)
+        self.name = name
+        self.values = list(values)  # python scalars, as passed to plant_init()
+        self.scale = scale  # 'linear', 'log' or None (listed values, no continuous range)
+
+    def __len__(self):
+        return len(self.values)
+
+    def from_unit(self, u):
+        """Maps samples of the unit interval to the range of the axis (first to last value)."""
+        low, high = self.values[0], self.values[-1]
+        if self.scale == 'linear':
+            return low + u * (high - low)
+        if self.scale == 'log':
+            return low * (high / low) ** u
+        raise ValueError(f"Axis {self.name!r} of listed values cannot be sampled - use linear_axis() or log_axis()")
+
+
+def linear_axis(name, start, stop, num):
+    """Returns an axis of num linearly spaced values from start to stop."""
+    return Axis(name=name, values=np.linspace(start, stop, num).tolist(), scale='linear')
+
+
+def log_axis(name, start, stop, num):
+    """Returns an axis of num logarithmically spaced values from start to stop (both > 0)."""
+    if start <= 0 or stop <= 0:
+        raise ValueError(f"Invalid range of log axis {name!r} - start and stop have to be > 0")
+    return Axis(name=name, values=np.geomspace(start, stop, num).tolist(), scale='log')
+
+
+def list_axis(name, values):
+    """Returns an axis of the listed values (e.g. integer parameters or irregular steps)."""
+    return Axis(name=name, values=[v.item() if isinstance(v, np.generic) else v for v in values])
+
+
+class SweepPoints:
+    def __init__(
+            self,
+            names,
+            count,
+            values
+    ):
+        self.names = names  # plant_init() parameter names
+        self.count = count  # number of points
+        self._values = values  # function (start, stop) -> list of value tuples of the points start to stop - 1
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return self.points()
+
+    def points(self, start=0, block_size=1024):
+        """Yields the plant_init() **kwargs of the points from index start on, generated block_size points at a time."""
+        for block_start in range(start, self.count, block_size):
+            for values in self._values(block_start, min(block_start + block_size, self.count)):
+                yield dict(zip(self.names, values))
+
+
+def grid_points(axes):
+    """Returns the SweepPoints of the full grid of all axes. Economic axes (see plant_init.parameter_class()) vary
+    fastest, so that consecutive points share their plant calculation."""
+    axes = sorted(axes, key=lambda axis: parameter_class(axis.name) == 'economic')
+    shape = tuple(len(axis) for axis in axes)
+
+    def values(start, stop):
+        index = np.unravel_index(np.arange(start, stop), shape)
+        return zip(*([axis.values[i] for i in idx.tolist()] for axis, idx in zip(axes, index)))
+
+    return SweepPoints(names=[axis.name for axis in axes], count=int(np.prod(shape)), values=values)
+
+
+def list_points(kwargs_list):
+    """Returns the SweepPoints of a list of plant_init() **kwargs (all with the same parameters)."""
+    names = list(kwargs_list[0]) if kwargs_list else []
+    for name in names:
+        _check_numeric(name, [kwargs[name] for kwargs in kwargs_list])
+
+    def values(start, stop):
+        return [tuple(kwargs[name] for name in names) for kwargs in kwargs_list[start:stop]]
+
+    return SweepPoints(names=names, count=len(kwargs_list), values=values)
+
+
+def _sample_points(axes, count, unit_samples):
+    # SweepPoints of unit hypercube samples (function (start, stop) -> array) mapped to the axis ranges
+    for axis in axes:
+        axis.from_unit(0.0)  # raises ValueError for axes of listed values
+
+    def values(start, stop):
+        u = unit_samples(start, stop)
+        return zip(*(axis.from_unit(u[:, d]).tolist() for d, axis in enumerate(axes)))
+
+    return SweepPoints(names=[axis.name for axis in axes], count=count, values=values)
+
+
+def _mix(x):
+    # Bijective mixing function of uint64 (splitmix64 finalizer)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+    return x ^ (x >> np.uint64(31))
+
+
+def _permutation(index, count, keys):
+    # Seeded pseudo-random permutation of range(count), evaluated at index (array): a Feistel network with one round per
+    # key over the smallest domain of an even number of bits that holds count, values outside range(count) are mapped
+    # again until they fall into it (cycle walking)
+    half = max(1, ((count - 1).bit_length() + 1) // 2)
+    shift, mask = np.uint64(half), np.uint64((1 << half) - 1)
+    x = index.astype(np.uint64)
+    walk = np.ones(len(x), dtype=bool)
+    while walk.any():
+        left, right = x[walk] >> shift, x[walk] & mask
+        for key in keys:
+            left, right = right, left ^ (_mix(right ^ key) & mask)
+        x[walk] = (left << shift) | right
+        walk = x >= count
+    return x.astype(np.int64)
+
+
+def latin_hypercube_points(axes, count, seed=None):
+    """Returns the SweepPoints of a Latin-hypercube sample of count points of the axis ranges (start to stop of
+    linear_axis() / log_axis(), the number of axis values is ignored). Each axis range is divided into count strata of
+    equal probability and every stratum is sampled once. The stratum of a point is a seeded permutation of its index,
+    computed per block of points, so that the memory use does not depend on count."""
+    seed = np.random.SeedSequence(seed)
+    keys = np.random.default_rng(seed).integers(2 ** 64, size=(len(axes), _feistel_rounds), dtype=np.uint64)
+
+    def unit_samples(start, stop):
+        index = np.arange(start, stop)
+        strata = np.stack([_permutation(index, count, axis_keys) for axis_keys in keys], axis=1)
+
+        # Uniform jitter within the strata, drawn reproducibly per jitter block
+        first, last = start // _jitter_block, (stop - 1) // _jitter_block
+        jitter = np.concatenate([np.random.default_rng([seed.entropy, block]).random((_jitter_block, len(axes)))
+                                 for block in range(first, last + 1)])
+        offset = start - first * _jitter_block
+        return (strata + jitter[offset:offset + stop - start]) / count
+
+    return _sample_points(axes, count, unit_samples)
+
+
+def sobol_points(axes, count, seed=None):
+    """Returns the SweepPoints of a scrambled Sobol sequence of count points of the axis ranges (start to stop of
+    linear_axis() / log_axis()). count should be a power of 2 for the balance properties of the sequence.
+    Requires scipy."""
+    try:
+        from scipy.stats import qmc
+    except ImportError as e:
+        raise ImportError("sobol_points() requires scipy - install it or use latin_hypercube_points()") from e
+
+    # Every block of points is drawn from the same scrambled sequence
+    seed = np.random.SeedSequence(seed).entropy
+
+    def unit_samples(start, stop):
+        sampler = qmc.Sobol(d=len(axes), scramble=True, seed=seed)
+        if start:
+            sampler.fast_forward(start)
+        with warnings.catch_warnings():
+            # Blocks of other sizes than a power of 2 are parts of a longer sequence (see count)
+            warnings.filterwarnings('ignore', message='The balance properties of Sobol')
+            return sampler.random(stop - start)
+
+    return _sample_points(axes, count, unit_samples)
+
+
+def sweep_fingerprint():
+    """Returns the identity of the calculation behind stored sweep results: the hash of the source code of the
+    fingerprint_modules, the hash of the plant_init() defaults (the values of all parameters that are not swept) and
+    the fingerprints of the RES profiles (see res_data.res_fingerprint())."""
+    defaults = json.dumps(plant_init(), sort_keys=True, default=str)
+    return {
+        'code': result_cache.code_fingerprint(fingerprint_modules),
+        'defaults': hashlib.sha256(defaults.encode()).hexdigest(),
+        'res': [res_data.res_fingerprint(file_path) for file_path in (res_data.file_path_Wind, res_data.file_path_PV)]
+    }
+
+
+class ResultSink:
+    def __init__(
+            self,
+            path,
+            flush_rows=default_flush_rows,
+            fingerprint=None
+    ):
+        self.path = path  # directory of the result store
+        self.flush_rows = flush_rows
+        self.fingerprint = json.loads(json.dumps(fingerprint))  # stored to the schema, as read back from it
+        self.columns = None  # column names, fixed by the schema
+        self._buffer = []
+        os.makedirs(path, exist_ok=True)
+
+        schema = read_schema(path)
+        if schema is not None:
+            if fingerprint is not None and schema.get('fingerprint') != self.fingerprint:
+                raise ValueError(f"The result store {path} holds results of another calculation (source code, "
+                                 f"plant_init() defaults or RES profiles changed) - use a new path")
+            self.columns = [column['name'] for column in schema['columns']]
+
+            # Drop a partial row left by an interrupted flush, so that appended rows stay aligned in all columns
+            files = _column_files(path, schema)
+            rows = _complete_rows(files)
+            for file, dtype in files.values():
+                if os.path.getsize(file) != rows * dtype.itemsize:
+                    os.truncate(file, rows * dtype.itemsize)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append(self, row):
+        """Appends a result row (dictionary of column name: number). All rows have to have the same columns."""
+        if self.columns is None:
+            self._write_schema(list(row))
+        elif list(row) != self.columns:
+            raise ValueError(f"Result row columns {list(row)} do not match the result store columns {self.columns}")
+
+        self._buffer.append([row[name] for name in self.columns])
+        if len(self._buffer) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        """Appends the buffered rows to the column files. A row is stored once it is written to all column files (see
+        read_results()), an interrupted flush leaves no partial rows."""
+        if not self._buffer:
+            return
+        data = np.array(self._buffer, dtype=np.float64)
+        for n in range(len(self.columns)):
+            with open(os.path.join(self.path, _column_file(n)), 'ab') as f:
+                f.write(data[:, n].tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+
+    def _write_schema(self, columns):
+        self.columns = columns
+        schema = {'columns': [{'name': name, 'file': _column_file(n), 'dtype': 'float64'}
+                              for n, name in enumerate(columns)]}
+        if self.fingerprint is not None:
+            schema['fingerprint'] = self.fingerprint
+        tmp_path = os.path.join(self.path, f"schema.json.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(schema, f, indent=4)
+        os.replace(tmp_path, os.path.join(self.path, 'schema.json'))
+
+
+def _column_file(n):
+    return f"column_{n:04d}.bin"
+
+
+def read_schema(path):
+    """Returns the schema (column names, files and dtypes, fingerprint) of a result store or None if no result has been
+    stored."""
+    try:
+        with open(os.path.join(path, 'schema.json'), 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _column_files(path, schema):
+    # File path and dtype of each column of a result store
+    return {column['name']: (os.path.join(path, column['file']), np.dtype(column['dtype'])) for column in schema['columns']}
+
+
+def _complete_rows(files):
+    # Number of rows written to all column files
+    return min(os.path.getsize(file) // dtype.itemsize for file, dtype in files.values())
+
+
+def read_results(path, columns=None):
+    """Returns the results of a result store as DataFrame (optionally only the given columns), in the order they were
+    stored (the column 'point' gives the point index). Can be called while a sweep is appending to the store: only
+    rows that are complete in all columns are returned."""
+    schema = read_schema(path)
+    if schema is None:
+        return pd.DataFrame(columns=columns)
+
+    files = _column_files(path, schema)
+    rows = _complete_rows(files)
+
+    return pd.DataFrame({name: np.fromfile(file, dtype=dtype, count=rows)
+                         for name, (file, dtype) in files.items() if columns is None or name in columns})
+
+
+def technical_group_KPIs(plant_configs):
+    """Returns the KPI dictionaries of plant configurations that only differ in economic parameters (a technical group,
+    see plant_init.technical_groups()), based on one plant calculation."""
+    plant_aggregates = plant_calc(plant_configs[0], engine='auto', columns='kpi', aggregates=True)
+    return [kpi_calc(df_out=plant_aggregates, plant_config=plant_config)[1] for plant_config in plant_configs]
+
+
+def block_results(block):
+    """Returns the result rows (point index, parameters and KPIs) of a block (point indices, list of plant_init()
+    **kwargs) of sweep points. Points of the block that only differ in economic parameters share one plant
+    calculation."""
+    indices, kwargs_list = block
+    plant_configs = [plant_init(**kwargs) for kwargs in kwargs_list]
+
+    rows = [None] * len(kwargs_list)
+    for group in technical_groups(kwargs_list):
+        for n, dict_KPI in zip(group, technical_group_KPIs([plant_configs[n] for n in group])):
+            rows[n] = {'point': indices[n], **kwargs_list[n], **dict_KPI}
+    return rows
+
+
+def stored_points(points, path, block_size=4096):
+    """Returns a boolean array of the SweepPoints whose results are stored in the result store at path. Raises
+    ValueError if the stored results stem from other points (e.g. samples drawn without seed): the parameters of every
+    stored row have to match the point of the same index, which are generated block_size points at a time."""
+    stored = np.zeros(len(points), dtype=bool)
+    df_stored = read_results(path, columns=['point'] + points.names)
+    if df_stored.empty:
+        return stored
+
+    if list(df_stored.columns) != ['point'] + points.names:
+        raise ValueError(f"The result store {path} holds the results of another sweep")
+
+    indices = df_stored['point'].to_numpy(dtype=np.int64)
+    if indices.min() < 0 or indices.max() >= len(points) or len(np.unique(indices)) != len(indices):
+        raise ValueError(f"The result store {path} holds invalid or duplicate point indices")
+
+    # The parameters of each stored row have to match the point of the same index
+    stored_values = df_stored[points.names].to_numpy(dtype=np.float64)
+    for start in np.unique(indices // block_size) * block_size:
+        rows = np.flatnonzero((indices >= start) & (indices < start + block_size))
+        kwargs_list = list(itertools.islice(points.points(start=int(start), block_size=block_size), block_size))
+        expected = np.array([[kwargs_list[n - start][name] for name in points.names] for n in indices[rows]],
+                            dtype=np.float64)
+        if not np.array_equal(stored_values[rows], expected):
+            raise ValueError(f"The result store {path} holds the results of other points - sampled sweeps can only be "
+                             f"resumed with the same seed")
+
+    stored[indices] = True
+    return stored
+
+
+def run_sweep(points, path, workers=1, chunksize=None, block_size=64):
+    """Calculates the KPIs of all SweepPoints and streams the results to the result store at path (see read_results())
+    as they are calculated. Points are submitted in blocks of block_size points, in parallel by a pool of worker
+    processes if workers > 1 (see plant_calc.parallel_imap()). The results of each block are stored as soon as the
+    block is complete. If the store already holds results of the points (an interrupted run), these points are skipped
+    and the sweep resumes with the remaining points. A store of another calculation (see sweep_fingerprint()) or of
+    other points raises ValueError. Returns the number of newly calculated points."""
+    sink = ResultSink(path, fingerprint=sweep_fingerprint())
+    stored = stored_points(points, path)
+    resumed = int(np.count_nonzero(stored))
+    total_points = len(points)
+    if resumed:
+        print(f"Resumed {resumed} of {total_points} points from {path}")
+
+    def blocks():
+        for start in range(0, total_points, block_size):
+            stop = min(start + block_size, total_points)
+            if stored[start:stop].all():
+                continue
+            kwargs_list = list(itertools.islice(points.points(start=start, block_size=block_size), stop - start))
+            indices = [n for n in range(start, stop) if not stored[n]]
+            yield indices, [kwargs_list[n - start] for n in indices]
+
+    calculated = 0
+    with sink:
+        for rows in parallel_imap(block_results, blocks(), workers=workers, chunksize=chunksize):
+            for row in rows:
+                sink.append(row)
+            sink.flush()
+            calculated += len(rows)
+
+            # Print progress message
+            done = resumed + calculated
+            print(f"Progress: {done / total_points * 100:.2f}% ({done} of {total_points} points, {calculated} calculated)")
+
+    return calculated
+
+
+def _refine_cells(cells, values, count, tol=None):
+    # Leaf cells to refine: the count cells of lowest corner value and the count cells of largest corner value spread
+    # (steepest change), in this order of priority. With tol, cells whose corner values all differ by less than tol
+    # (and cells without any value) are converged and not refined
+    corner_min = np.array([np.nanmin(values[cell]) if np.isfinite(values[cell]).any() else np.inf for cell in cells])
+    corner_spread = np.array([np.nanmax(values[cell]) - np.nanmin(values[cell]) if np.isfinite(values[cell]).any()
+                              else 0.0 for cell in cells])
+    order = list(np.argsort(corner_min, kind='stable')[:count]) + list(np.argsort(-corner_spread, kind='stable')[:count])
+    if tol is not None:
+        converged = [(np.isfinite(values[cell]).all() and corner_spread[n] < tol) or not np.isfinite(corner_min[n])
+                     for n, cell in enumerate(cells)]
+        candidates = [n for n in range(len(cells)) if not converged[n]]
+        order = [candidates[n] for n in np.argsort(corner_min[candidates], kind='stable')[:count]] + \
+                [candidates[n] for n in np.argsort(-corner_spread[candidates], kind='stable')[:count]]
+    return list(dict.fromkeys(order))
+
+
+def adaptive_sweep(axes, kpi='LCOA - monthly (EUR/tNH3)', max_level=3, budget=None, refine_fraction=0.1, tol=None,
+                   workers=1, chunksize=None, block_size=64, path=None):
+    """Returns the results (DataFrame of point index, refinement level, parameters and KPIs, in order of calculation)
+    of an adaptive sweep that minimizes kpi over the ranges of linear_axis() / log_axis() axes. The sweep starts with
+    the grid of the axis values and then repeatedly halves the grid cells (hyperrectangles between neighbouring grid
+    points) whose corners have the lowest kpi or the largest kpi spread (refine_fraction of the cells each by either
+    criterion), down to the spacing of the axis values / 2^max_level (the dense grid it approximates), or until budget
+    points are calculated. With tol, a cell whose corner kpi values all differ by less than tol is converged and not
+    refined any further, the sweep stops early once all cells are converged. Points without NH3 production (LCOA 0)
+    are disregarded. Points are calculated as in
+    run_sweep() and optionally streamed to the result store at path. The refinement only depends on the calculated
+    results, so an interrupted sweep resumes from its result store: points already stored are taken from the store
+    instead of being calculated. A store of another sweep (other axes, kpi or refinement settings, or another
+    calculation, see sweep_fingerprint()) raises ValueError."""
+    for axis in axes:
+        axis.from_unit(0.0)  # raises ValueError for axes of listed values
+    if tol is not None and not tol > 0:
+        raise ValueError(f"Invalid tol {tol!r} - tol has to be > 0")
+
+    # Integer lattice of the finest level: coordinate k of an axis of n values corresponds to k / ((n - 1) 2^max_level)
+    scale = 2 ** max_level
+    spacing = [(len(axis) - 1) * scale for axis in axes]
+    names = [axis.name for axis in axes]
+
+    def point_kwargs(coordinate):
+        return {axis.name: axis.from_unit(k / m) if m else axis.values[0]
+                for axis, k, m in zip(axes, coordinate, spacing)}
+
+    results = []  # result rows in order of calculation
+    values = {}  # kpi value of each calculated lattice coordinate
+
+    sink = None
+    stored = {}  # result rows of an interrupted sweep by point index
+    if path is not None:
+        sink = ResultSink(path, fingerprint=sweep_fingerprint())
+        df_stored = read_results(path)
+        if not df_stored.empty:
+            if not {'point', 'level', kpi, *names} <= set(df_stored.columns):
+                raise ValueError(f"The result store {path} holds the results of another sweep")
+            stored = {int(row['point']): row for row in df_stored.to_dict('records')}
+            print(f"Resuming from {len(stored)} points stored in {path}")
+
+    def stored_row(point, coordinate, level):
+        # Stored result row of a point, which has to be the same point of the same refinement level
+        row = stored[point]
+        if row['level'] != level or any(row[name] != np.float64(value)
+                                        for name, value in point_kwargs(coordinate).items()):
+            raise ValueError(f"The result store {path} holds the results of another adaptive sweep - use a new path")
+        return {**row, 'point': point, 'level': level}
+
+    def evaluate(coordinates, level):
+        # Calculate the KPIs of new lattice coordinates (in parallel blocks, see run_sweep()), or take them from the
+        # result store
+        coordinates = [c for c in dict.fromkeys(coordinates) if c not in values]
+        if budget is not None:
+            coordinates = coordinates[:max(budget - len(results), 0)]
+        start = len(results)
+        rows = {start + n: stored_row(start + n, c, level) for n, c in enumerate(coordinates) if start + n in stored}
+
+        new = [n for n in range(len(coordinates)) if start + n not in rows]
+        blocks = (([start + n for n in block], [point_kwargs(coordinates[n]) for n in block])
+                  for block in (new[b:b + block_size] for b in range(0, len(new), block_size)))
+        for block_rows in parallel_imap(block_results, blocks, workers=workers, chunksize=chunksize):
+            for row in block_rows:
+                row = {'point': row['point'], 'level': level, **row}
+                rows[row['point']] = row
+                if sink is not None:
+                    sink.append(row)
+            if sink is not None:
+                sink.flush()
+
+        for point in sorted(rows):
+            row = rows[point]
+            produced = row['Average annual NH3 production (tNH3)'] > 0
+            values[coordinates[point - start]] = row[kpi] if produced else np.nan
+            results.append(row)
+
+    # Level 0: grid of the axis values and its cells (lower corner, edge length on the lattice)
+    evaluate(list(itertools.product(*(range(0, m + 1, scale) for m in spacing))), level=0)
+    size = tuple(scale if m else 0 for m in spacing)
+    leaves = [(lower, size) for lower in itertools.product(*(range(0, m, scale) if m else [0] for m in spacing))]
+
+    def corners(cell):
+        lower, size = cell
+        return list(dict.fromkeys(itertools.product(*((k, k + s) for k, s in zip(lower, size)))))
+
+    for level in range(1, max_level + 1):
+        if budget is not None and len(results) >= budget:
+            break
+
+        cell_values = {cell: np.array([values.get(c, np.nan) for c in corners(cell)]) for cell in leaves}
+        count = max(1, int(np.ceil(refine_fraction * len(leaves))))
+        refine = [leaves[n] for n in _refine_cells(leaves, cell_values, count, tol=tol)]
+        if not refine:
+            print(f"Refinement level {level}: all {len(leaves)} cells converged (kpi spread < {tol})")
+            break
+
+        # Halve the selected cells along every axis: new points at the cell centre, face and edge midpoints
+        children = []
+        for lower, size in refine:
+            half = tuple(s // 2 for s in size)
+            children += [(tuple(k + h * b for k, h, b in zip(lower, half, bits)), half)
+                         for bits in itertools.product(*([0, 1] if h else [0] for h in half))]
+        evaluate([c for child in children for c in corners(child)], level=level)
+
+        refined = set(refine)
+        leaves = [cell for cell in leaves if cell not in refined] + children
+
+        best = np.nanmin(list(values.values()))
+        print(f"Refinement level {level}: {len(results)} points calculated, {len(leaves)} cells, best {kpi} {best:.4f}")
+
+    if sink is not None:
+        sink.close()
+
+    return pd.DataFrame(results, columns=list(results[0]) if results else ['point', 'level'] + names)
+
+
+if __name__ == '__main__':
+    # Sweep of three parameters (grid) and Latin-hypercube sample of the same ranges
+
+    import tempfile
+
+    axes = [
+        linear_axis('RES_Asset_Wind_Pnom_MW', 50, 150, 3),
+        linear_axis('RES_Asset_PV_Pnom_MW', 50, 150, 3),
+        log_axis('RES_Asset_Wind_PPA_price_EURpMWh', 30, 120, 4)
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        for label, points in [('Grid', grid_points(axes)), ('Latin-hypercube', latin_hypercube_points(axes, 16, seed=1))]:
+            path = os.path.join(directory, label)
+            start_time = time.perf_counter()
+            run_sweep(points, path)
+            end_time = time.perf_counter()
+            print(f"{label} sweep runtime ({len(points)} points): {end_time - start_time:.6f} seconds")
+            print(read_results(path, columns=['point'] + [axis.name for axis in axes] + ['LCOA - monthly (EUR/tNH3)']))
+
+    # Adaptive refinement of the LCOA optimum over Wind and PV capacity (dense grid equivalent: 25 x 25 points)
+    axes = [
+        linear_axis('RES_Asset_Wind_Pnom_MW', 20, 320, 4),
+        linear_axis('RES_Asset_PV_Pnom_MW', 20, 320, 4)
+    ]
+    start_time = time.perf_counter()
+    df_adaptive = adaptive_sweep(axes, max_level=3)
+    end_time = time.perf_counter()
+    print(f"Adaptive sweep runtime ({len(df_adaptive)} points): {end_time - start_time:.6f} seconds")
+    print(df_adaptive.loc[df_adaptive['LCOA - monthly (EUR/tNH3)'].where(
+        df_adaptive['Average annual NH3 production (tNH3)'] > 0).idxmin()])
@@ -8,18 +8,30 @@
 # As an input the function requires
 # - a plant configuration as is returned by plant_init() and
 # - a plant calculation as is returned by plant_cals()
+# - optionally the RES_Calendar of the RES profiles used in plant_calc() (see res_data)
 ####################################################################################################################
 
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+import res_data
+from functions import shutdown_events
 
-def visualize(df_out, plant_config, fig_name='EL_xxMW_RES_yyMW_BESS_zzMWh_cH2_vvt'):
+def visualize(df_out, plant_config, fig_name='EL_xxMW_RES_yyMW_BESS_zzMWh_cH2_vvt', calendar=None):
 
-    # Adjust output dataframe
-    df_out['DateTimes'] = pd.to_datetime(df_out['DateTimes'], format='%Y-%m-%d %H:%M')
-    df_out = df_out.drop(columns=['operation_mode'])
+    # Adjust output dataframe: index the hourly values (without initial time step 0) by the calendar time stamps
+    if calendar is None:
+        calendar = res_data.build_calendar(df_out['DateTimes'].iloc[1:])
+
+    # Shutdowns starting after the initial time step 0, with the calendar year they started in
+    syn_SD = shutdown_events(df_out['syn_NH3_out_tNH3'].to_numpy(), calendar=calendar)
+    syn_SD = syn_SD[syn_SD['t0'] > 0]
+    el_SD = shutdown_events(df_out['el_H2_out_tH2'].to_numpy(), calendar=calendar)
+    el_SD = el_SD[el_SD['t0'] > 0]
+
+    df_out = df_out.drop(columns=['DateTimes', 'operation_mode'])
     df_out = df_out.drop([0])
-    df_out.set_index('DateTimes', inplace=True)
+    df_out.index = pd.DatetimeIndex(calendar.DateTimes, name='DateTimes')
 
     # print(df_out)
 
@@ -88,35 +100,22 @@ def visualize(df_out, plant_config, fig_name='EL_xxMW_RES_yyMW_BESS_zzMWh_cH2_vv
     # Shut down Analysis
     ####################################################################################################################
 
-    all_years = pd.date_range(start=df_out.index.min(), end=df_out.index.max(), freq='YE')
-    # print(all_years)
-
-    syn_SD = df_out.syn_shutdown
-    syn_SD = syn_SD[syn_SD > 0]
-    syn_SD_agg = syn_SD.resample('YE').agg(['count', 'sum', 'mean', 'max', 'min'])
-    syn_SD_agg = syn_SD_agg.reindex(all_years, fill_value=0)
-
-    el_SD = df_out.el_shutdown
-    el_SD = el_SD[el_SD > 0]
-    el_SD_agg = el_SD.resample('YE').agg(['count', 'sum', 'mean', 'max', 'min'])
-    el_SD_agg = el_SD_agg.reindex(all_years, fill_value=0)
-
-    all_years = pd.date_range(start=df_out.index.min(), end=df_out.index.max(), freq='YE').year
-    # print(all_years)
-
-    syn_SD_plot_Data = [[0] for _ in all_years]
-    el_SD_plot_Data = [[0] for _ in all_years]
-
-    # Iterate over grouped data and replace the [0] only if there are values
-    for year, group in syn_SD.groupby(syn_SD.index.year):
-        if not group.empty:  # Ensure the group is not empty
-            year_index = all_years.get_loc(year)  # Get index of the year
-            syn_SD_plot_Data[year_index] = group.tolist()  # Replace with actual values
-
-    for year, group in el_SD.groupby(el_SD.index.year):
-        if not group.empty:  # Ensure the group is not empty
-            year_index = all_years.get_loc(year)  # Get index of the year
-            el_SD_plot_Data[year_index] = group.tolist()  # Replace with actual values
+    all_years = pd.Index(np.unique(calendar.year))
+
+    def shutdown_analysis(SD):
+        # Shutdown durations of each year ([0] for years without shutdowns), number of shutdowns and total downtime per
+        # year. The shutdowns are in order of time, so the durations of a year are a contiguous slice
+        year_index = all_years.get_indexer(SD['year'])
+        durations = np.split(SD['duration'].to_numpy(), np.searchsorted(year_index, np.arange(1, len(all_years))))
+        SD_plot_Data = [year_durations.tolist() if len(year_durations) else [0] for year_durations in durations]
+        SD_agg = pd.DataFrame({
+            'count': np.bincount(year_index, minlength=len(all_years)),
+            'sum': np.bincount(year_index, weights=SD['duration'], minlength=len(all_years)).astype(np.int64)
+        }, index=all_years)
+        return SD_plot_Data, SD_agg
+
+    syn_SD_plot_Data, syn_SD_agg = shutdown_analysis(syn_SD)
+    el_SD_plot_Data, el_SD_agg = shutdown_analysis(el_SD)
 
     # print(f"syn_SD: {syn_SD}")
     # print(f"syn_SD_agg: {syn_SD_agg}")